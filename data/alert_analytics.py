@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Report how often each alert of AlertsToSimulate.json is drawn by the app.
+
+AlertManager.computeProbabilities gives every alert of the current aircraft a
+weight from the multiplier of its priority (high, medium, low, and 0 for none),
+and draws an alert with probability weight / total weight of the aircraft. A
+share of the draws (knowledgeQuestionProportion) is a knowledge question
+instead, and an alert is drawn every flight interval. A knowledge question
+picks a random section of <aircraft>-Quiz.json and falls back to an alert when
+the section has fewer than 3 questions, or when the aircraft has no quiz: the
+share of the draws that are knowledge questions is the proportion times the
+share of the sections with enough questions, 0 without a quiz. So for an alert
+of probability p per draw:
+
+ - the expected number of draws until it first appears is 1 / (p * (1 - knowledge))
+ - the expected time until it first appears is that number of draws times the interval
+ - the probability it appears during a flight of n draws is 1 - (1 - p * (1 - knowledge))^n
+
+These ignore the repeat threshold, which removes the last drawn alerts for a
+few draws: with hundreds of alerts per aircraft the difference is small.
+
+The alerts are loaded once into columnar numpy arrays (aircraft, priority,
+category and alert type as integer codes), and the probabilities are computed
+for all the presets at once as a presets x alerts matrix, so comparing many
+multiplier settings costs about the same as one.
+
+Usage:
+    python alert_analytics.py                            # per aircraft and priority, default presets
+    python alert_analytics.py --alerts --csv alerts.csv  # one row per alert and preset
+    python alert_analytics.py --preset focus=100,10,1,0 --interval 5 --duration 90
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+from profiling import NULL_PROFILER, add_profile_arguments, run_profiled
+from validate_alerts import ALERT_TYPES, CATEGORIES, PRIORITIES
+
+# numpy is imported by the functions using it, so importing this module or running --help doesn't load it
+if TYPE_CHECKING:
+    import numpy as np
+
+# Average alert interval and flight duration in minutes
+INTERVAL = 10.0
+DURATION = 60.0
+# Questions of a knowledge question, as AlertManager.drawKnowledgeQuestion
+QUIZ_QUESTIONS = 3
+
+@dataclass
+class Preset:
+    """Priority multipliers and knowledge question proportion, as in the app settings."""
+    name: str
+    high: float
+    medium: float
+    low: float
+    knowledge: float = 0.1
+
+    def multipliers(self) -> List[float]:
+        """Multiplier of each priority, in the order of PRIORITIES (none is never drawn)."""
+        values = {'high': self.high, 'medium': self.medium, 'low': self.low, 'none': 0.0}
+        return [values[priority] for priority in PRIORITIES]
+
+# 'default' is the default of the app settings
+PRESETS = {
+    'default': Preset('default', 10.0, 5.0, 1.0, 0.1),
+    'uniform': Preset('uniform', 1.0, 1.0, 1.0, 0.1),
+    'high-focus': Preset('high-focus', 100.0, 10.0, 1.0, 0.1),
+    'no-knowledge': Preset('no-knowledge', 10.0, 5.0, 1.0, 0.0),
+}
+
+def parse_preset(spec: str) -> Preset:
+    """Parse name=high,medium,low[,knowledge]."""
+    name, _, values = spec.partition('=')
+    try:
+        numbers = [float(value) for value in values.split(',')]
+    except ValueError:
+        numbers = []
+    if not name or len(numbers) not in (3, 4):
+        raise ValueError(f"Invalid preset '{spec}', expected name=high,medium,low[,knowledge]")
+    return Preset(name, *numbers)
+
+def knowledge_share(aircraft: str, directory: str) -> float:
+    """Share of the knowledge draws of an aircraft that give questions: its quiz sections with enough of them."""
+    try:
+        with open(os.path.join(directory, f"{aircraft}-Quiz.json"), 'r', encoding='utf-8') as f:
+            sections = json.load(f).get('sections', {})
+    except FileNotFoundError:
+        return 0.0
+    if not sections:
+        return 0.0
+    return sum(len(questions) >= QUIZ_QUESTIONS for questions in sections.values()) / len(sections)
+
+class AlertColumns:
+    """
+    The alerts as columns: integer codes for the enums and aircraft, lists for the text.
+    The quizzes are read from quiz_dir, an aircraft without one never draws knowledge questions.
+    """
+
+    def __init__(self, alerts: List[Dict], quiz_dir: Optional[str] = None):
+        import numpy as np
+
+        self.uids = np.array([alert['uid'] for alert in alerts], dtype=np.int64)
+        self.messages = [alert.get('message') or '' for alert in alerts]
+        self.aircraft, self.aircraft_codes = np.unique(
+            np.array([alert.get('aircraftName') or '' for alert in alerts], dtype=str), return_inverse=True)
+        self.knowledge_share = np.array([knowledge_share(aircraft, quiz_dir) if quiz_dir else 0.0
+                                         for aircraft in self.aircraft])
+        self.priority_codes = self.codes(alerts, 'priority', PRIORITIES)
+        self.category_codes = self.codes(alerts, 'category', CATEGORIES)
+        self.type_codes = self.codes(alerts, 'alertType', ALERT_TYPES)
+
+    @staticmethod
+    def codes(alerts: List[Dict], field: str, values: List[str]) -> 'np.ndarray':
+        import numpy as np
+
+        index = {value: code for code, value in enumerate(values)}
+        return np.array([index[alert[field]] for alert in alerts], dtype=np.intp)
+
+    def __len__(self) -> int:
+        return len(self.uids)
+
+    def group_counts(self, *codes: 'np.ndarray', sizes: Sequence[int]) -> 'np.ndarray':
+        """Number of alerts for every combination of codes, as an array of shape `sizes`."""
+        import numpy as np
+
+        flat = np.ravel_multi_index(codes, sizes)
+        return np.bincount(flat, minlength=int(np.prod(sizes))).reshape(sizes)
+
+def load_alerts(json_file: str) -> AlertColumns:
+    with open(json_file, 'r', encoding='utf-8') as f:
+        return AlertColumns(json.load(f).get('alerts', []), os.path.dirname(os.path.abspath(json_file)))
+
+@dataclass
+class DrawProbabilities:
+    """Per draw probabilities of every alert (presets x alerts) and what follows from them."""
+    presets: List[Preset]
+    probability: 'np.ndarray'
+    expected_draws: 'np.ndarray'
+    expected_minutes: 'np.ndarray'
+    in_flight: 'np.ndarray'
+
+def draw_probabilities(columns: AlertColumns, presets: List[Preset],
+                       interval: float = INTERVAL, duration: float = DURATION) -> DrawProbabilities:
+    """Probabilities of computeProbabilities for every preset, and expected time to first appearance."""
+    import numpy as np
+
+    multipliers = np.array([preset.multipliers() for preset in presets])  # presets x priorities
+    # Share of the draws that are knowledge questions: presets x alerts
+    knowledge = np.array([preset.knowledge for preset in presets])[:, None] \
+        * columns.knowledge_share[columns.aircraft_codes]
+    weights = multipliers[:, columns.priority_codes]  # presets x alerts
+    # Total weight of each aircraft for every preset: presets x aircraft
+    aircraft_onehot = np.zeros((len(columns), len(columns.aircraft)))
+    aircraft_onehot[np.arange(len(columns)), columns.aircraft_codes] = 1.0
+    totals = weights @ aircraft_onehot
+    alert_totals = totals[:, columns.aircraft_codes]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        probability = np.where(alert_totals > 0, weights / alert_totals, 0.0)
+        per_draw = probability * (1.0 - knowledge)
+        expected_draws = np.where(per_draw > 0, 1.0 / per_draw, np.inf)
+    draws = max(int(duration // interval), 0)
+    return DrawProbabilities(
+        presets=presets,
+        probability=probability,
+        expected_draws=expected_draws,
+        expected_minutes=expected_draws * interval,
+        in_flight=1.0 - (1.0 - per_draw) ** draws,
+    )
+
+def priority_rows(columns: AlertColumns, draws: DrawProbabilities) -> List[Dict]:
+    """One row per preset, aircraft and priority: every alert of a priority has the same probability."""
+    import numpy as np
+
+    counts = columns.group_counts(columns.aircraft_codes, columns.priority_codes,
+                                  sizes=(len(columns.aircraft), len(PRIORITIES)))
+    # Any alert of each (aircraft, priority) group, to read the probabilities of the group
+    first = np.full(counts.shape, -1)
+    flat = np.ravel_multi_index((columns.aircraft_codes, columns.priority_codes), counts.shape)
+    first.ravel()[flat[::-1]] = np.arange(len(columns))[::-1]
+
+    rows = []
+    for p, preset in enumerate(draws.presets):
+        for a, aircraft in enumerate(columns.aircraft):
+            for code, priority in enumerate(PRIORITIES):
+                count = int(counts[a, code])
+                if not count:
+                    continue
+                alert = first[a, code]
+                probability = float(draws.probability[p, alert])
+                rows.append({
+                    'preset': preset.name,
+                    'aircraft': aircraft,
+                    'priority': priority,
+                    'alerts': count,
+                    'probability': probability,
+                    'share': probability * count,
+                    'expected_draws': float(draws.expected_draws[p, alert]),
+                    'expected_minutes': float(draws.expected_minutes[p, alert]),
+                    'in_flight': float(draws.in_flight[p, alert]),
+                })
+    return rows
+
+def alert_rows(columns: AlertColumns, draws: DrawProbabilities) -> List[Dict]:
+    """One row per preset and alert."""
+    rows = []
+    for p, preset in enumerate(draws.presets):
+        for i in range(len(columns)):
+            rows.append({
+                'preset': preset.name,
+                'uid': int(columns.uids[i]),
+                'aircraft': columns.aircraft[columns.aircraft_codes[i]],
+                'category': CATEGORIES[columns.category_codes[i]],
+                'alertType': ALERT_TYPES[columns.type_codes[i]],
+                'priority': PRIORITIES[columns.priority_codes[i]],
+                'message': columns.messages[i],
+                'probability': float(draws.probability[p, i]),
+                'expected_draws': float(draws.expected_draws[p, i]),
+                'expected_minutes': float(draws.expected_minutes[p, i]),
+                'in_flight': float(draws.in_flight[p, i]),
+            })
+    return rows
+
+def type_rows(columns: AlertColumns) -> List[Dict]:
+    """Number of alerts per aircraft, alert type and category."""
+    counts = columns.group_counts(columns.aircraft_codes, columns.type_codes, columns.category_codes,
+                                  sizes=(len(columns.aircraft), len(ALERT_TYPES), len(CATEGORIES)))
+    rows = []
+    for a, aircraft in enumerate(columns.aircraft):
+        for t, alert_type in enumerate(ALERT_TYPES):
+            if counts[a, t].any():
+                row = {'aircraft': aircraft, 'alertType': alert_type}
+                row.update({category: int(counts[a, t, c]) for c, category in enumerate(CATEGORIES)})
+                row['total'] = int(counts[a, t].sum())
+                rows.append(row)
+    return rows
+
+def format_value(value) -> str:
+    if isinstance(value, float):
+        if value == float('inf'):
+            return 'never'
+        if value <= 1:
+            return f"{value:.4f}"
+        return f"{value:,.1f}"
+    return str(value)
+
+def print_table(rows: List[Dict]) -> None:
+    if not rows:
+        print("No alerts")
+        return
+    columns = list(rows[0])
+    cells = [[format_value(row[column]) for column in columns] for row in rows]
+    widths = [max(len(column), *(len(line[i]) for line in cells)) for i, column in enumerate(columns)]
+    print(" | ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    print("-+-".join("-" * width for width in widths))
+    for line in cells:
+        print(" | ".join(cell.rjust(width) if cell[:1].isdigit() or cell == 'never' else cell.ljust(width)
+                         for cell, width in zip(line, widths)))
+
+def write_csv(rows: List[Dict], path: str) -> None:
+    if path == '-':
+        writer = csv.DictWriter(sys.stdout, fieldnames=list(rows[0]) if rows else [])
+        writer.writeheader()
+        writer.writerows(rows)
+        return
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else [])
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Wrote {len(rows)} rows to {path}")
+
+def analyze(json_file: str, presets: List[Preset], interval: float, duration: float,
+            per_alert: bool = False, aircraft: Optional[str] = None, profiler=None):
+    """Returns the type counts and the probability rows (per priority, or per alert)."""
+    profiler = profiler or NULL_PROFILER
+    with profiler.phase('load'):
+        columns = load_alerts(json_file)
+    profiler.count('alerts', len(columns))
+    with profiler.phase('probabilities'):
+        draws = draw_probabilities(columns, presets, interval, duration)
+    with profiler.phase('report'):
+        counts = type_rows(columns)
+        rows = alert_rows(columns, draws) if per_alert else priority_rows(columns, draws)
+    if aircraft:
+        counts = [row for row in counts if row['aircraft'] == aircraft]
+        rows = [row for row in rows if row['aircraft'] == aircraft]
+    return counts, rows
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description='Report the draw probability of the alerts for priority multiplier presets.')
+    parser.add_argument('json_file', nargs='?', default=os.path.join(script_dir, 'AlertsToSimulate.json'),
+                        help='Alerts JSON file (default: AlertsToSimulate.json)')
+    parser.add_argument('--preset', action='append', metavar='NAME=H,M,L[,K]',
+                        help=f'Preset of high, medium and low multipliers and knowledge proportion, or one of '
+                             f'{", ".join(PRESETS)}. Can be repeated (default: all built-in presets)')
+    parser.add_argument('--interval', type=float, default=INTERVAL,
+                        help=f'Average alert interval in minutes (default: {INTERVAL:g})')
+    parser.add_argument('--duration', type=float, default=DURATION,
+                        help=f'Flight duration in minutes (default: {DURATION:g})')
+    parser.add_argument('-a', '--aircraft', help='Only report this aircraft')
+    parser.add_argument('--alerts', action='store_true', help='One row per alert instead of per priority')
+    parser.add_argument('--csv', metavar='PATH', help='Write the probabilities as CSV to PATH (- for stdout)')
+    add_profile_arguments(parser)
+
+    args = parser.parse_args()
+
+    if args.interval <= 0:
+        parser.error("--interval must be greater than 0")
+    try:
+        presets = [PRESETS[spec] if spec in PRESETS else parse_preset(spec)
+                   for spec in args.preset] if args.preset else list(PRESETS.values())
+        counts, rows = run_profiled('alert_analytics', args, lambda profiler: analyze(
+            args.json_file, presets, args.interval, args.duration, args.alerts, args.aircraft, profiler))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+
+    if args.csv:
+        write_csv(rows, args.csv)
+        return
+    print("Alerts per aircraft and type:")
+    print_table(counts)
+    print(f"\nDraw probabilities (alert every {args.interval:g} min, {args.duration:g} min flight):")
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Serve the alerts and checklist files to the app with cheap update checks.
+
+The app checks for new alerts by fetching AlertsToSimulate.json and comparing its
+version with the one it has. This server makes those checks cheap:
+
+ - every file is published once when it is loaded: its bytes, a gzip variant
+   compressed at the highest level, and a strong ETag (content hash) for each
+ - responses carry the ETag and Cache-Control: no-cache, so clients revalidate
+   with If-None-Match and get an empty 304 Not Modified while nothing changed
+ - clients sending Accept-Encoding: gzip get the precompressed variant
+ - /version returns only the version of the alerts file and its ETag
+
+Files are published again when their modification time changes, so a new
+AlertsToSimulate.json from update_alerts.py is picked up without a restart.
+
+Files are served at /<name> and /latest/<name>, matching the path of the
+alertsDataUrl setting of the app.
+
+Usage:
+    python alerts_server.py                       # http://localhost:8000/latest/AlertsToSimulate.json
+    python alerts_server.py --port 8080 --host 0.0.0.0 -v
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+ALERTS_FILE = "AlertsToSimulate.json"
+SERVED_FILES = [ALERTS_FILE, "S22TG6-Checklists.json", "SF50-Checklists.json", "S22TG6-Quiz.json", "SF50-Quiz.json"]
+PATH_PREFIXES = ["/latest/", "/"]
+# Files on disk are checked for changes at most this often, in seconds
+REFRESH_INTERVAL = 1.0
+
+@dataclass
+class Variant:
+    """One representation of a published file."""
+    body: bytes
+    etag: str
+    encoding: Optional[str] = None
+
+@dataclass
+class PublishedFile:
+    """A file as served: identity and gzip variants, and its version if it has one."""
+    name: str
+    mtime: float
+    identity: Variant
+    gzip: Variant
+    version: Optional[str] = None
+    version_variant: Optional[Variant] = None
+
+def publish_file(path: str) -> PublishedFile:
+    """Read a file and build everything needed to serve it."""
+    mtime = os.path.getmtime(path)
+    with open(path, 'rb') as f:
+        body = f.read()
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    # mtime=0 so the compressed bytes only depend on the content
+    compressed = gzip.compress(body, compresslevel=9, mtime=0)
+
+    version = None
+    try:
+        data = json.loads(body)
+        if isinstance(data, dict):
+            version = data.get('version')
+    except ValueError:
+        pass
+    version_body = json.dumps({'version': version, 'etag': f'"{digest}"'}).encode('utf-8')
+
+    return PublishedFile(
+        name=os.path.basename(path),
+        mtime=mtime,
+        identity=Variant(body, f'"{digest}"'),
+        # Strong ETags identify a representation, so the gzip variant has its own
+        gzip=Variant(compressed, f'"{digest}-gz"', 'gzip'),
+        version=version,
+        version_variant=Variant(version_body, f'"{hashlib.sha256(version_body).hexdigest()[:32]}"'),
+    )
+
+class Publication:
+    """The published files of a directory, republished when they change on disk."""
+
+    def __init__(self, directory: str, names: List[str] = SERVED_FILES):
+        self.directory = directory
+        self.names = names
+        self.files: Dict[str, PublishedFile] = {}
+        self.lock = threading.Lock()
+        self.checked = 0.0
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Publish the files that are new or changed since they were last published."""
+        with self.lock:
+            self.checked = time.monotonic()
+            for name in self.names:
+                path = os.path.join(self.directory, name)
+                if not os.path.exists(path):
+                    self.files.pop(name, None)
+                    continue
+                published = self.files.get(name)
+                if published is None or published.mtime != os.path.getmtime(path):
+                    self.files[name] = publish_file(path)
+
+    def get(self, name: str) -> Optional[PublishedFile]:
+        if time.monotonic() - self.checked > REFRESH_INTERVAL:
+            self.refresh()
+        return self.files.get(name)
+
+def quality_value(params: str) -> float:
+    """The q-value of the parameters of an Accept-Encoding coding, 1 if absent and 0 if malformed."""
+    params = params.strip()
+    if not params.startswith('q='):
+        return 1.0
+    try:
+        return float(params[2:])
+    except ValueError:
+        return 0.0
+
+def accepts_gzip(header: Optional[str]) -> bool:
+    """
+    Whether an Accept-Encoding header allows gzip. An explicit gzip entry decides
+    over `*`, wherever they are in the header, as in `*;q=1, gzip;q=0`.
+    """
+    if not header:
+        return False
+    qualities: Dict[str, float] = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if coding == 'x-gzip':
+            coding = 'gzip'
+        if coding in ('gzip', '*'):
+            qualities[coding] = quality_value(params)
+    return qualities.get('gzip', qualities.get('*', 0.0)) > 0
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches an ETag (weak comparison, as for GET)."""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in header.split(','))
+
+class AlertsRequestHandler(BaseHTTPRequestHandler):
+    """Serves the published files, /version, and 304 responses to conditional requests."""
+
+    server_version = "AlertsServer/1.0"
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, don't let the body wait for an ACK
+    disable_nagle_algorithm = True
+    publication: Publication = None
+    verbose = False
+
+    def resolve(self) -> Tuple[Optional[PublishedFile], bool]:
+        """Return the file requested and whether it is the version endpoint."""
+        path = self.path.split('?', 1)[0]
+        if path in ('/version', '/latest/version'):
+            return self.publication.get(ALERTS_FILE), True
+        for prefix in PATH_PREFIXES:
+            if path.startswith(prefix):
+                name = path[len(prefix):]
+                if name in self.publication.names:
+                    return self.publication.get(name), False
+        return None, False
+
+    def send_body(self, status: int, body: bytes, headers: Dict[str, str], head_only: bool) -> None:
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if not head_only:
+            self.wfile.write(body)
+
+    def respond(self, head_only: bool) -> None:
+        published, version_only = self.resolve()
+        if published is None:
+            self.send_body(HTTPStatus.NOT_FOUND, b'{"error": "not found"}\n',
+                           {'Content-Type': 'application/json'}, head_only)
+            return
+
+        if version_only:
+            variant = published.version_variant
+        elif accepts_gzip(self.headers.get('Accept-Encoding')):
+            variant = published.gzip
+        else:
+            variant = published.identity
+
+        headers = {
+            'ETag': variant.etag,
+            'Cache-Control': 'no-cache',
+            'Vary': 'Accept-Encoding',
+        }
+        if etag_matches(self.headers.get('If-None-Match'), variant.etag):
+            self.send_body(HTTPStatus.NOT_MODIFIED, b'', headers, True)
+            return
+
+        headers['Content-Type'] = 'application/json'
+        if variant.encoding:
+            headers['Content-Encoding'] = variant.encoding
+        self.send_body(HTTPStatus.OK, variant.body, headers, head_only)
+
+    def do_GET(self):
+        self.respond(head_only=False)
+
+    def do_HEAD(self):
+        self.respond(head_only=True)
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+def make_server(directory: str, host: str = "localhost", port: int = 8000, verbose: bool = False) -> ThreadingHTTPServer:
+    """Create a server for the files of a directory. Port 0 picks a free port."""
+    handler = type('Handler', (AlertsRequestHandler,), {'publication': Publication(directory), 'verbose': verbose})
+    return ThreadingHTTPServer((host, port), handler)
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description='Serve the alerts and checklist files with ETags and gzip.')
+    parser.add_argument('-d', '--directory', default=script_dir, help='Directory of the files to serve (default: data directory)')
+    parser.add_argument('--host', default='localhost', help='Address to listen on (default: localhost)')
+    parser.add_argument('-p', '--port', type=int, default=8000, help='Port to listen on (default: 8000)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Log every request')
+
+    args = parser.parse_args()
+
+    server = make_server(args.directory, args.host, args.port, args.verbose)
+    publication = server.RequestHandlerClass.publication
+    for name, published in publication.files.items():
+        print(f"{name}: {len(published.identity.body)} bytes, {len(published.gzip.body)} gzip, "
+              f"version {published.version or '-'}")
+    host, port = server.server_address[:2]
+    print(f"Serving on http://{host}:{port}/latest/{ALERTS_FILE}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Single entry point of the data tools: alertsim-data <command> [arguments].
+
+Each command runs the main of one of the scripts of this directory with the
+rest of the command line, so `alertsim-data extract -v` is `python
+extract_checklists.py -v` and takes the same arguments and defaults. The
+module of a command is only imported when that command runs: `--help` and the
+light commands don't pay for pandas, numpy or the PDF and multiprocessing
+machinery of the others.
+
+`alertsim-data startup` checks that they stay that way: it times `--help` and
+`<command> --help` in fresh interpreters, and compares the median time over the
+start of a bare interpreter run just before, which is the cost of importing
+the command, with STARTUP_BUDGET_MS. As timings are noisy, it also fails if a
+command imports one of HEAVY_MODULES at startup, whatever the time.
+
+Usage:
+    python alertsim_data.py --help
+    python alertsim_data.py extract -v
+    python alertsim_data.py validate --txt S22TG6-Checklists.txt --json S22TG6-Checklists.json
+    python alertsim_data.py alerts --validate
+    python alertsim_data.py startup              # fails if a command starts over its budget or imports numpy, pandas, ...
+"""
+
+import sys
+
+PROG = 'alertsim-data'
+
+# Command: (module, description), in the order of the help
+COMMANDS = {
+    'extract': ('extract_checklists', 'Extract the checklists of a manual to JSON'),
+    'validate': ('validate_checklist', 'Validate a checklist JSON file against its manual'),
+    'sf50': ('process_sf50', 'Process the SF50 summary text into sf50_summary.csv'),
+    'sf50-checklists': ('sf50_checklists', 'Extract the SF50 procedures to SF50-Checklists.json'),
+    'validate-sf50': ('validate_sf50', 'Validate sf50_summary.csv against the SF50 procedures'),
+    'alerts': ('update_alerts', 'Convert, validate or write back AlertsToSimulate.xlsx'),
+    'validate-alerts': ('validate_alerts', 'Validate AlertsToSimulate.json against the app model'),
+    'analytics': ('alert_analytics', 'Report the draw probability of the alerts'),
+    'session': ('session_schedule', 'Generate seeded alert schedules of a session for a class'),
+    'quiz': ('quiz_to_markdown', 'Convert a quiz JSON file to markdown'),
+    'quiz-schedule': ('quiz_scheduler', 'Review the quiz questions with spaced repetition, or simulate campaigns'),
+    'build': ('build_data', 'Rebuild the generated data files that are out of date'),
+    'cache': ('artifact_cache', 'Show or clear the artifact cache of the tools'),
+}
+
+# Median time of `--help` and `<command> --help` over the start of a bare interpreter, in milliseconds.
+# About one and a half times the usual time on a busy machine, and under the ~100 ms of importing numpy.
+# The stdlib modules every tool needs (argparse, dataclasses, json, typing) take about 50 ms of them
+STARTUP_BUDGET_MS = {
+    '--help': 15,
+    'extract': 90,
+    'validate': 60,
+    'sf50': 90,
+    'sf50-checklists': 90,
+    'validate-sf50': 90,
+    'alerts': 70,
+    'validate-alerts': 80,
+    'analytics': 80,
+    'session': 90,
+    'quiz': 50,
+    'quiz-schedule': 80,
+    'build': 80,
+    'cache': 80,
+}
+
+# Modules only the code running a command may import: timings are noisy, the imports are not
+HEAVY_MODULES = ['numpy', 'pandas', 'openpyxl', 'multiprocessing', 'concurrent.futures']
+
+def print_help() -> None:
+    print(f"usage: {PROG} <command> [arguments]\n")
+    print("Run one of the data tools. `<command> --help` shows the arguments of a command.\n")
+    print("commands:")
+    for name, (module, description) in COMMANDS.items():
+        print(f"  {name:16s} {description} ({module}.py)")
+    print(f"  {'startup':16s} Time the start of every command against its budget")
+
+def run_command(name: str, arguments: list) -> None:
+    """Import the module of a command and run its main as if it was run with these arguments."""
+    import importlib
+
+    module = importlib.import_module(COMMANDS[name][0])
+    sys.argv = [f"{PROG} {name}", *arguments]
+    module.main()
+
+def run_time(command: list) -> float:
+    """Wall time of running a command, in milliseconds."""
+    import subprocess
+    import time
+
+    start = time.perf_counter()
+    subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return (time.perf_counter() - start) * 1000
+
+def imported_modules(command: list) -> set:
+    """Modules imported by a Python command, from its -X importtime report."""
+    import subprocess
+
+    result = subprocess.run([command[0], '-X', 'importtime', *command[1:]], stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True, check=True)
+    return {line.rsplit('|', 1)[1].strip() for line in result.stderr.splitlines()
+            if line.startswith('import time:') and '|' in line}
+
+def startup_time(command: list, repeat: int) -> tuple:
+    """
+    Median wall time of running a command and median time over a bare
+    interpreter, in milliseconds. Each run is paired with a run of a bare
+    interpreter just before it, so a machine getting busier during the check
+    slows both.
+    """
+    import statistics
+
+    bare = [sys.executable, '-c', 'pass']
+    times, overs = [], []
+    for _ in range(max(repeat, 1)):
+        baseline = run_time(bare)
+        milliseconds = run_time(command)
+        times.append(milliseconds)
+        overs.append(milliseconds - baseline)
+    return statistics.median(times), statistics.median(overs)
+
+def check_startup(arguments: list) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=f"{PROG} startup",
+                                     description='Time the start of every command against its budget.')
+    parser.add_argument('commands', nargs='*', help='Commands to time (default: --help and every command)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per command, the median is kept (default: 5)')
+    args = parser.parse_args(arguments)
+
+    names = args.commands or list(STARTUP_BUDGET_MS)
+    unknown = [name for name in names if name not in STARTUP_BUDGET_MS]
+    if unknown:
+        parser.error(f"unknown commands: {', '.join(unknown)}")
+
+    print(f"{'command':16s} {'ms':>8s} {'over':>8s} {'budget':>8s}")
+    over = []
+    for name in names:
+        arguments = [name] if name == '--help' else [name, '--help']
+        command = [sys.executable, __file__, *arguments]
+        # Also a first untimed run, which writes the bytecode of a clean tree
+        heavy = [module for module in HEAVY_MODULES if module in imported_modules(command)]
+        milliseconds, overhead = startup_time(command, args.repeat)
+        budget = STARTUP_BUDGET_MS[name]
+        within = overhead <= budget and not heavy
+        if not within:
+            over.append(name)
+        print(f"{name:16s} {milliseconds:8.1f} {overhead:8.1f} {budget:8d} {'✅' if within else '❌'}"
+              f"{' imports ' + ', '.join(heavy) if heavy else ''}")
+
+    if over:
+        print(f"\n❌ {len(over)} over budget or importing a heavy module: {', '.join(over)}")
+        sys.exit(1)
+    print("\n✅ Every command starts within its budget")
+
+def main():
+    arguments = sys.argv[1:]
+    if not arguments or arguments[0] in ('-h', '--help'):
+        print_help()
+        return
+    name, rest = arguments[0], arguments[1:]
+    if name == 'startup':
+        check_startup(rest)
+    elif name in COMMANDS:
+        run_command(name, rest)
+    else:
+        print(f"Error: unknown command '{name}', run {PROG} --help for the list")
+        sys.exit(2)
+
+if __name__ == "__main__":
+    main()
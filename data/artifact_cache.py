@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of the intermediate results of the data tools.
+
+Every tool keeps what is slow to compute and only depends on its inputs (the
+tokens of a manual, the parsed checklists, the pages of a PDF, the rows of a
+workbook, ...) in one shared directory, under the hash of its inputs, of the
+version of the tool that computed it and of the source of the modules that
+compute it. Editing one of these modules is enough to ignore what it cached
+before; the version is bumped for the changes their source doesn't show, such
+as a new release of a library they use.
+
+Entries are written to a temporary file of the writing process and moved in
+place, so several tools can read and write the cache at the same time: a
+reader sees a complete entry or none. The total size of the cache is capped:
+after a write, the least recently used entries are removed until it fits. A hit
+touches the modification time of the entry, which is what orders them.
+
+Each ArtifactCache counts its hits, misses, writes and evictions, reported as
+`cache.<tool>.*` counters when profiling.
+
+    ALERTSIM_CACHE_DIR=path      cache directory (default: .artifact_cache next to this file)
+    ALERTSIM_CACHE_MAX_MB=64     size cap in megabytes (default: 64)
+
+Usage:
+    python artifact_cache.py                    # entries and size of each tool
+    python artifact_cache.py --clear            # remove every entry
+    python artifact_cache.py --clear tokens     # remove the entries of a tool
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+CACHE_DIR_ENV = "ALERTSIM_CACHE_DIR"
+MAX_MB_ENV = "ALERTSIM_CACHE_MAX_MB"
+CACHE_DIR = os.environ.get(CACHE_DIR_ENV) or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".artifact_cache")
+DEFAULT_MAX_MB = 64
+# Temporary files older than this were left by a process that died while writing
+STALE_TMP_SECONDS = 3600
+
+def max_bytes_from_env() -> int:
+    try:
+        return int(float(os.environ.get(MAX_MB_ENV, DEFAULT_MAX_MB)) * 1024 * 1024)
+    except ValueError:
+        return DEFAULT_MAX_MB * 1024 * 1024
+
+# Hash of the source of each module, read once per process
+_source_digests: Dict[str, bytes] = {}
+
+def source_digest(module: str) -> bytes:
+    """Hash of the source file of an imported module, or of its name if it has none."""
+    if module not in _source_digests:
+        # '__main__' and the module name of a script hash the same, so a run and an import share the entries
+        source = module.encode('utf-8')
+        path = getattr(sys.modules.get(module) or importlib.import_module(module), '__file__', None)
+        if path:
+            try:
+                with open(path, 'rb') as f:
+                    source = f.read()
+            except OSError:
+                pass
+        _source_digests[module] = hashlib.sha256(source).digest()
+    return _source_digests[module]
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+def scan_entries(directory: str) -> Tuple[List[Tuple[float, int, str]], int]:
+    """(mtime, size, path) of every entry of a cache directory, and their total size. Removes stale temporary files."""
+    entries = []
+    total = 0
+    now = time.time()
+    try:
+        tools = list(os.scandir(directory))
+    except FileNotFoundError:
+        return entries, total
+    for tool in tools:
+        if not tool.is_dir():
+            continue
+        for entry in os.scandir(tool.path):
+            try:
+                stat = entry.stat()
+                if entry.name.endswith('.tmp'):
+                    if now - stat.st_mtime > STALE_TMP_SECONDS:
+                        os.remove(entry.path)
+                    continue
+            except FileNotFoundError:
+                # Evicted or replaced by another process meanwhile
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+    return entries, total
+
+class ArtifactCache:
+    """
+    Results of one tool, one file per key in <directory>/<tool>. A directory of
+    None disables the cache: every get misses and put does nothing. sources are
+    the names of the modules that compute the results (__name__ of the caller
+    and the modules it computes them with), whose source is part of every key.
+    """
+
+    def __init__(self, tool: str, version: Union[int, str], directory: Optional[str] = CACHE_DIR,
+                 max_bytes: Optional[int] = None, sources: Sequence[str] = ()):
+        self.tool = tool
+        self.version = str(version)
+        self.sources = tuple(sources)
+        self.directory = directory
+        self.max_bytes = max_bytes if max_bytes is not None else max_bytes_from_env()
+        self.stats = CacheStats()
+        # Estimate of the size of the whole cache, to only scan it when it may be over the cap
+        self._size: Optional[int] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    def key(self, *inputs: Union[bytes, str]) -> str:
+        """Hash of the inputs of a result, with the tool, its version and its sources."""
+        digest = hashlib.sha256()
+        for part in (self.tool, self.version, *map(source_digest, self.sources), *inputs):
+            data = part.encode('utf-8') if isinstance(part, str) else part
+            # The length keeps ('ab', 'c') and ('a', 'bc') apart
+            digest.update(len(data).to_bytes(8, 'little'))
+            digest.update(data)
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, self.tool, key)
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        if self.directory:
+            path = self.path(key)
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                try:
+                    os.utime(path)
+                except OSError:
+                    pass
+                self.stats.hits += 1
+                return data
+            except OSError:
+                pass
+        self.stats.misses += 1
+        return None
+
+    def put_bytes(self, key: str, data: bytes) -> None:
+        """Store an entry, then evict the least recently used ones if the cache is over its cap."""
+        if not self.directory or len(data) > self.max_bytes:
+            return
+        path = self.path(key)
+        # Unique to the process, so concurrent writers of an entry never write the same file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        except OSError:
+            # A cache that can't be written is a cache that misses
+            return
+        self.stats.writes += 1
+        if self._size is None:
+            self._size = scan_entries(self.directory)[1]
+        else:
+            self._size += len(data)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def get(self, key: str) -> Any:
+        """A JSON entry, None if missing or unreadable."""
+        data = self.get_bytes(key)
+        if data is not None:
+            try:
+                return json.loads(data)
+            except ValueError:
+                self.stats.hits -= 1
+                self.stats.misses += 1
+        return None
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a JSON entry. A value JSON can't represent is not stored."""
+        try:
+            data = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        except (TypeError, ValueError):
+            return
+        self.put_bytes(key, data)
+
+    def evict(self) -> None:
+        """Remove the least recently used entries of every tool until the cache fits in max_bytes."""
+        entries, total = scan_entries(self.directory)
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self.stats.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+
+    def report(self, profiler) -> None:
+        for name, value in asdict(self.stats).items():
+            profiler.count(f"cache.{self.tool}.{name}", value)
+
+def usage(directory: str) -> Dict[str, Dict[str, Any]]:
+    """Entries, size and last use of each tool in a cache directory."""
+    tools: Dict[str, Dict[str, Any]] = {}
+    for mtime, size, path in scan_entries(directory)[0]:
+        tool = tools.setdefault(os.path.basename(os.path.dirname(path)), {'entries': 0, 'bytes': 0, 'last_used': 0.0})
+        tool['entries'] += 1
+        tool['bytes'] += size
+        tool['last_used'] = max(tool['last_used'], mtime)
+    return tools
+
+def main():
+    parser = argparse.ArgumentParser(description='Show or clear the cache of the data tools.')
+    parser.add_argument('--cache', default=CACHE_DIR, help=f'Cache directory (default: {CACHE_DIR_ENV} or .artifact_cache)')
+    parser.add_argument('--clear', nargs='*', metavar='TOOL', help='Remove the entries of these tools, or of every tool')
+
+    args = parser.parse_args()
+
+    try:
+        if args.clear is not None:
+            import shutil
+
+            known = usage(args.cache)
+            unknown = [tool for tool in args.clear if tool not in known]
+            if unknown:
+                # Only the tools found in the cache, never a path out of it
+                raise ValueError(f"No entries of {', '.join(unknown)} in {args.cache}"
+                                 f" (tools: {', '.join(sorted(known)) or 'none'})")
+            tools = args.clear or list(known)
+            for tool in tools:
+                shutil.rmtree(os.path.join(args.cache, tool), ignore_errors=True)
+            print(f"Cleared {', '.join(tools) if tools else 'nothing'} in {args.cache}")
+            return
+        tools = usage(args.cache)
+    except (OSError, ValueError) as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+
+    print(f"{'tool':16s} {'entries':>8s} {'MB':>8s}  last used")
+    for name, tool in sorted(tools.items()):
+        last_used = time.strftime('%Y-%m-%d %H:%M', time.localtime(tool['last_used']))
+        print(f"{name:16s} {tool['entries']:8d} {tool['bytes'] / 1024 / 1024:8.2f}  {last_used}")
+    total = sum(tool['bytes'] for tool in tools.values())
+    print(f"{'total':16s} {sum(tool['entries'] for tool in tools.values()):8d} {total / 1024 / 1024:8.2f}"
+          f"  (cap {max_bytes_from_env() / 1024 / 1024:.0f} MB)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Benchmark the data tools on synthetic manuals of increasing size.
+
+For each size, synthetic inputs are generated with synthetic_manuals.py in a
+temporary directory and every entry point is timed (best of --repeat runs).
+Throughput is reported in input lines per second.
+
+Results can be saved as a JSON baseline, and later runs compared against it:
+the benchmark fails when the throughput of an entry point drops by more than
+--threshold compared to the baseline for the same size. The baseline is
+specific to a machine, so it is not committed: it is written next to this
+script as benchmark_baseline.json (ignored by git), or wherever --baseline
+points, e.g. a file restored from the CI cache. Comparing without a baseline is
+an error, unless --allow-missing-baseline is given, and so is comparing with a
+baseline of another --depth or --seed, or one with none of the entry points and
+sizes that were run. The ones it lacks are listed and not compared.
+
+Usage:
+    python benchmark_parsers.py --save-baseline       # record benchmark_baseline.json
+    python benchmark_parsers.py                       # compare against it, fails without one
+    python benchmark_parsers.py --allow-missing-baseline  # only report when there is no baseline
+    python benchmark_parsers.py --sizes 100,1000 --depth 2 --only extract
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from checklist_lexer import tokenize_file
+from extract_checklists import ChecklistParser
+from process_sf50 import process_file
+from sf50_checklists import SF50ChecklistParser
+from validate_alerts import validate_alerts_file
+from validate_checklist import validate_cas_messages, validate_checklist_steps, validate_checklist_titles
+from synthetic_manuals import generate_alerts, generate_checklist_manual, generate_sf50_procedures, generate_sf50_summary
+
+BASELINE_FILE = "benchmark_baseline.json"
+DEFAULT_SIZES = [50, 200, 800]
+
+class BenchmarkInputs:
+    """Synthetic input files of a given size, written to a directory."""
+
+    def __init__(self, directory: str, size: int, depth: int, seed: int):
+        self.directory = directory
+        self.size = size
+        self.checklists_txt = self.write("checklists.txt", generate_checklist_manual(size, depth, seed))
+        self.checklists_json = os.path.join(directory, "checklists.json")
+        self.sf50_summary = self.write("sf50_summary.txt", generate_sf50_summary(size, seed))
+        self.sf50_procedures = self.write("sf50_procedures.txt", generate_sf50_procedures(size, seed, depth))
+        self.sf50_csv = os.path.join(directory, "sf50_summary.csv")
+        # Alert files are much larger than manuals, so scale them up
+        self.alerts_json = self.write("alerts.json", json.dumps(generate_alerts(size * 100, seed), indent=4))
+
+        # The validators run against the parser output, on the tokens lexed once as validate_checklist.py does
+        run_extract(self)
+        self.checklists_tokens = tokenize_file(self.checklists_txt, None)
+
+    def write(self, name: str, text: str) -> str:
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def lines(self, *paths: str) -> int:
+        total = 0
+        for path in paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                total += sum(1 for _ in f)
+        return total
+
+def run_extract(inputs: BenchmarkInputs) -> None:
+    ChecklistParser().parse_checklist(inputs.checklists_txt, inputs.checklists_json)
+
+def run_lex(inputs: BenchmarkInputs) -> None:
+    tokenize_file(inputs.checklists_txt, None)
+
+def run_validate_titles(inputs: BenchmarkInputs) -> None:
+    assert validate_checklist_titles(inputs.checklists_txt, inputs.checklists_json, inputs.checklists_tokens).passed
+
+def run_validate_cas(inputs: BenchmarkInputs) -> None:
+    assert validate_cas_messages(inputs.checklists_txt, inputs.checklists_json, inputs.checklists_tokens).passed
+
+def run_validate_steps(inputs: BenchmarkInputs) -> None:
+    assert validate_checklist_steps(inputs.checklists_txt, inputs.checklists_json, inputs.checklists_tokens).passed
+
+def run_sf50(inputs: BenchmarkInputs) -> None:
+    process_file(inputs.sf50_summary, inputs.sf50_procedures, inputs.sf50_procedures, inputs.sf50_csv)
+
+def run_sf50_checklists(inputs: BenchmarkInputs) -> None:
+    SF50ChecklistParser().parse_file(inputs.sf50_procedures)
+
+def run_validate_alerts(inputs: BenchmarkInputs) -> None:
+    assert not validate_alerts_file(inputs.alerts_json)
+
+# name -> (function, input files whose lines measure the throughput)
+ENTRY_POINTS: Dict[str, Tuple[Callable[[BenchmarkInputs], None], Callable[[BenchmarkInputs], List[str]]]] = {
+    'lex': (run_lex, lambda inputs: [inputs.checklists_txt]),
+    'extract': (run_extract, lambda inputs: [inputs.checklists_txt]),
+    'validate.titles': (run_validate_titles, lambda inputs: [inputs.checklists_txt]),
+    'validate.cas': (run_validate_cas, lambda inputs: [inputs.checklists_txt]),
+    'validate.steps': (run_validate_steps, lambda inputs: [inputs.checklists_txt]),
+    'sf50': (run_sf50, lambda inputs: [inputs.sf50_summary, inputs.sf50_procedures, inputs.sf50_procedures]),
+    'sf50.checklists': (run_sf50_checklists, lambda inputs: [inputs.sf50_procedures]),
+    'alerts.validate': (run_validate_alerts, lambda inputs: [inputs.alerts_json]),
+}
+
+def time_entry(func: Callable[[BenchmarkInputs], None], inputs: BenchmarkInputs, repeat: int) -> float:
+    """Best wall time of `repeat` runs, with the tool output silenced."""
+    best = float('inf')
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func(inputs)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+def run_benchmarks(sizes: List[int], depth: int, repeat: int, seed: int,
+                   only: Optional[List[str]] = None) -> Dict:
+    entries = {name: entry for name, entry in ENTRY_POINTS.items()
+               if not only or any(name == o or name.startswith(o + '.') for o in only)}
+    results = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'depth': depth,
+        'seed': seed,
+        'results': {name: {} for name in entries},
+    }
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            with contextlib.redirect_stdout(io.StringIO()):
+                inputs = BenchmarkInputs(directory, size, depth, seed)
+            for name, (func, input_files) in entries.items():
+                seconds = time_entry(func, inputs, repeat)
+                lines = inputs.lines(*input_files(inputs))
+                results['results'][name][str(size)] = {
+                    'seconds': round(seconds, 6),
+                    'lines': lines,
+                    'lines_per_second': round(lines / seconds, 1) if seconds > 0 else None,
+                }
+                print(f"{name:18s} size {size:6d} {lines:8d} lines {seconds * 1000:10.2f} ms "
+                      f"{lines / seconds if seconds > 0 else 0:12.0f} lines/s")
+    return results
+
+def parameter_mismatches(baseline: Dict, depth: int, seed: int) -> List[str]:
+    """The generation parameters of the baseline that differ from this run: its inputs are not the same."""
+    return [f"{name} {value} (baseline {baseline[name]})" for name, value in (('depth', depth), ('seed', seed))
+            if name in baseline and baseline[name] != value]
+
+def compare_to_baseline(results: Dict, baseline: Dict, threshold: float) -> Tuple[List[str], List[str]]:
+    """
+    Return a description of every entry point whose throughput regressed beyond
+    threshold, and the entry points and sizes the baseline has no result for.
+    """
+    regressions = []
+    missing = []
+    for name, sizes in results['results'].items():
+        for size, current in sizes.items():
+            reference = baseline.get('results', {}).get(name, {}).get(size)
+            if not reference or not reference.get('lines_per_second') or not current['lines_per_second']:
+                missing.append(f"{name} size {size}")
+                continue
+            ratio = current['lines_per_second'] / reference['lines_per_second']
+            if ratio < 1.0 - threshold:
+                regressions.append(f"{name} size {size}: {current['lines_per_second']:.0f} lines/s vs "
+                                   f"baseline {reference['lines_per_second']:.0f} lines/s ({(ratio - 1) * 100:+.1f}%)")
+    return regressions, missing
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the data tools on synthetic manuals.')
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+                        help='Comma separated number of checklists/alerts to generate (default: %(default)s)')
+    parser.add_argument('--depth', type=int, default=3, help='Maximum item nesting depth (default: 3)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement, best is kept (default: 3)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic inputs (default: 0)')
+    parser.add_argument('--only', help=f'Comma separated entry points to run ({", ".join(ENTRY_POINTS)})')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='Baseline JSON file (default: %(default)s)')
+    parser.add_argument('--save-baseline', action='store_true', help='Save the results as the new baseline')
+    parser.add_argument('--allow-missing-baseline', action='store_true',
+                        help='Only report the results when there is no baseline, instead of failing')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed throughput drop vs the baseline before failing (default: 0.25)')
+    parser.add_argument('-o', '--output', help='Also write the results to this JSON file')
+
+    args = parser.parse_args()
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    baseline_path = os.path.join(script_dir, args.baseline)
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    only = args.only.split(',') if args.only else None
+
+    # Checked before running the benchmarks, which take a while
+    missing_baseline = not args.save_baseline and not os.path.exists(baseline_path)
+    if missing_baseline and not args.allow_missing_baseline:
+        print(f"Error: no baseline found at {baseline_path}, run with --save-baseline to create one "
+              f"or --allow-missing-baseline to only report the results")
+        sys.exit(1)
+    baseline = None
+    if not args.save_baseline and not missing_baseline:
+        try:
+            with open(baseline_path, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error: can't read the baseline {baseline_path}: {str(e)}")
+            sys.exit(1)
+        mismatches = parameter_mismatches(baseline, args.depth, args.seed)
+        if mismatches:
+            print(f"Error: the baseline was recorded on other inputs: {', '.join(mismatches)}")
+            sys.exit(1)
+
+    results = run_benchmarks(sizes, args.depth, args.repeat, args.seed, only)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+
+    if args.save_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4)
+        print(f"\nBaseline saved to {baseline_path}")
+        return
+
+    if missing_baseline:
+        print(f"\nNo baseline found at {baseline_path}, results not compared")
+        return
+
+    regressions, missing = compare_to_baseline(results, baseline, args.threshold)
+    compared = sum(len(sizes) for sizes in results['results'].values()) - len(missing)
+    if missing:
+        print(f"\n⚠️  Not in the baseline, not compared: {', '.join(missing)}")
+    if not compared:
+        print("\n❌ Nothing to compare: the baseline has none of these entry points and sizes")
+        sys.exit(1)
+    if regressions:
+        print(f"\n❌ Throughput regressed by more than {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        sys.exit(1)
+    print(f"\n✅ No regression beyond {args.threshold:.0%} against {args.baseline} ({compared} compared)")
+
+if __name__ == "__main__":
+    main()
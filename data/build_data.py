@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Incremental build of the generated data files.
+
+The data directory is a chain of steps, each one a script turning source files
+into generated files:
+
+    S22TG6-Checklists.txt -> extract_checklists.py -> S22TG6-Checklists.json
+                                                   -> validate_checklist.py
+    sf50_*.txt            -> process_sf50.py       -> sf50_summary.csv
+    sf50_emergency.txt    -> sf50_checklists.py    -> SF50-Checklists.json
+    sf50_abnormal.txt
+    AlertsToSimulate.xlsx -> update_alerts.py      -> AlertsToSimulate.json
+                                                   -> validate_alerts.py, update_alerts.py --validate
+
+Each step declares its inputs (including the script that implements it) and its
+outputs. The modules of the data directory imported by a script, directly or
+through other modules, are inputs of its steps as well, found from the imports
+of the scripts, so editing a shared module like checklist_lexer.py rebuilds the
+steps that use it. A step depends on another step when one of its inputs is an output of
+that step, which gives the dependency graph. The content hash of every input and
+output is recorded in .build_state.json after a successful run, and a step is
+only run again when one of its inputs changed or one of its outputs was modified
+or removed. Steps whose dependencies are satisfied run concurrently in worker
+processes.
+
+Usage:
+    python build_data.py                  # build everything that is out of date
+    python build_data.py checklists       # build one target and what it needs
+    python build_data.py --force          # rebuild everything
+    python build_data.py --dry-run        # show what would be rebuilt
+    python build_data.py --list           # list the steps
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = ".build_state.json"
+
+# Step actions run in worker processes: they are module level functions taking the
+# data directory, importing the tool they drive only when called, and returning
+# True on success. Anything printed is captured and reported by the driver.
+
+def build_checklists(data_dir: str) -> bool:
+    from artifact_cache import CACHE_DIR
+    from extract_checklists import ChecklistParser
+    parser = ChecklistParser(cache_dir=CACHE_DIR)
+    parser.parse_checklist(os.path.join(data_dir, "S22TG6-Checklists.txt"),
+                           os.path.join(data_dir, "S22TG6-Checklists.json"))
+    print(f"Extracted {len(parser.checklists)} checklists")
+    return True
+
+def validate_checklists(data_dir: str) -> bool:
+    import validate_checklist
+    from artifact_cache import CACHE_DIR
+    txt_path = os.path.join(data_dir, "S22TG6-Checklists.txt")
+    json_path = os.path.join(data_dir, "S22TG6-Checklists.json")
+    results = validate_checklist.ValidationResult()
+    results.add_test(validate_checklist.validate_checklist_titles(txt_path, json_path))
+    results.add_test(validate_checklist.validate_cas_messages(txt_path, json_path))
+    results.add_test(validate_checklist.validate_checklist_steps(txt_path, json_path, cache_dir=CACHE_DIR))
+    results.print_results()
+    passed, total = results.summary()
+    return passed == total
+
+def build_sf50_csv(data_dir: str) -> bool:
+    from artifact_cache import CACHE_DIR
+    from process_sf50 import process_file
+    process_file(os.path.join(data_dir, "sf50_summary.txt"),
+                 os.path.join(data_dir, "sf50_emergency.txt"),
+                 os.path.join(data_dir, "sf50_abnormal.txt"),
+                 os.path.join(data_dir, "sf50_summary.csv"), cache_dir=CACHE_DIR)
+    return True
+
+def build_sf50_checklists(data_dir: str) -> bool:
+    from sf50_checklists import extract_sf50_checklists
+    parser = extract_sf50_checklists([os.path.join(data_dir, "sf50_emergency.txt"),
+                                      os.path.join(data_dir, "sf50_abnormal.txt")],
+                                     os.path.join(data_dir, "SF50-Checklists.json"))
+    print(f"Extracted {len(parser.checklists)} checklists")
+    return True
+
+def build_alerts(data_dir: str) -> bool:
+    from artifact_cache import CACHE_DIR
+    from update_alerts import excel_to_json
+    excel_to_json(os.path.join(data_dir, "AlertsToSimulate.xlsx"), 0,
+                  os.path.join(data_dir, "AlertsToSimulate.json"), cache_dir=CACHE_DIR)
+    return True
+
+def validate_alerts(data_dir: str) -> bool:
+    from artifact_cache import CACHE_DIR
+    from update_alerts import validate_files
+    from validate_alerts import print_violations, validate_alerts_file
+    json_file = os.path.join(data_dir, "AlertsToSimulate.json")
+    violations = validate_alerts_file(json_file)
+    if violations:
+        print(f"❌ {len(violations)} invalid values in {json_file}:")
+        print_violations(violations)
+    return (validate_files(os.path.join(data_dir, "AlertsToSimulate.xlsx"), 0, json_file, cache_dir=CACHE_DIR)
+            and not violations)
+
+@dataclass
+class BuildStep:
+    """A step of the data build: produces outputs from inputs with an action."""
+    name: str
+    inputs: List[str]
+    outputs: List[str]
+    action: Callable[[str], bool]
+    description: str = ""
+    dependencies: Set[str] = field(default_factory=set)
+
+STEPS: List[BuildStep] = [
+    BuildStep(
+        name="checklists",
+        inputs=["S22TG6-Checklists.txt", "extract_checklists.py"],
+        outputs=["S22TG6-Checklists.json"],
+        action=build_checklists,
+        description="Extract SR22 checklists from the text manual",
+    ),
+    BuildStep(
+        name="validate-checklists",
+        inputs=["S22TG6-Checklists.txt", "S22TG6-Checklists.json", "validate_checklist.py"],
+        outputs=[],
+        action=validate_checklists,
+        description="Validate the SR22 checklist JSON against the text manual",
+    ),
+    BuildStep(
+        name="sf50-csv",
+        inputs=["sf50_summary.txt", "sf50_emergency.txt", "sf50_abnormal.txt", "process_sf50.py", "SF50-AlertRules.json"],
+        outputs=["sf50_summary.csv"],
+        action=build_sf50_csv,
+        description="Extract SF50 alerts from the summary and procedure texts",
+    ),
+    BuildStep(
+        name="sf50-checklists",
+        inputs=["sf50_emergency.txt", "sf50_abnormal.txt", "sf50_checklists.py", "extract_checklists.py"],
+        outputs=["SF50-Checklists.json"],
+        action=build_sf50_checklists,
+        description="Extract SF50 checklists from the procedure texts",
+    ),
+    BuildStep(
+        name="alerts",
+        inputs=["AlertsToSimulate.xlsx", "update_alerts.py", "validate_alerts.py"],
+        outputs=["AlertsToSimulate.json"],
+        action=build_alerts,
+        description="Convert the alerts spreadsheet to JSON",
+    ),
+    BuildStep(
+        name="validate-alerts",
+        inputs=["AlertsToSimulate.xlsx", "AlertsToSimulate.json", "update_alerts.py", "validate_alerts.py"],
+        outputs=[],
+        action=validate_alerts,
+        description="Validate the alerts JSON against the app model and the spreadsheet",
+    ),
+]
+
+def local_imports(script: str, data_dir: str) -> List[str]:
+    """File names of the modules of the data directory a script imports, directly or through them."""
+    import ast
+
+    found: List[str] = []
+    pending = [script]
+    while pending:
+        path = os.path.join(data_dir, pending.pop())
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                tree = ast.parse(f.read(), path)
+        except (OSError, SyntaxError):
+            # Reported as a missing or failing input by the build
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                file_name = f"{name.split('.')[0]}.py"
+                if file_name != script and file_name not in found and os.path.exists(os.path.join(data_dir, file_name)):
+                    found.append(file_name)
+                    pending.append(file_name)
+    return sorted(found)
+
+def file_hash(path: str) -> Optional[str]:
+    """Return the sha256 of a file content, or None if it does not exist."""
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def run_step(step: BuildStep, data_dir: str) -> Tuple[bool, str, float]:
+    """Run a step action in a worker, returning success, captured output and duration."""
+    if data_dir not in sys.path:
+        sys.path.insert(0, data_dir)
+    output = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            ok = bool(step.action(data_dir))
+    except Exception as e:
+        output.write(f"Error running {step.name}: {str(e)}\n")
+        ok = False
+    return ok, output.getvalue(), time.perf_counter() - start
+
+class DataBuild:
+    """Dependency graph of build steps with content hash based up to date checks."""
+
+    def __init__(self, steps: List[BuildStep], data_dir: str = SCRIPT_DIR, verbose: bool = False):
+        self.steps: Dict[str, BuildStep] = {step.name: step for step in steps}
+        self.data_dir = data_dir
+        self.verbose = verbose
+        self.state_path = os.path.join(data_dir, STATE_FILE)
+        self.state: Dict[str, Dict] = self.load_state()
+        self.hashes: Dict[str, Optional[str]] = {}
+
+        for step in steps:
+            modules = [module for script in step.inputs if script.endswith('.py')
+                       for module in local_imports(script, data_dir)]
+            step.inputs = list(dict.fromkeys(step.inputs + modules))
+
+        producers = {output: step.name for step in steps for output in step.outputs}
+        for step in steps:
+            step.dependencies = {producers[i] for i in step.inputs if i in producers and producers[i] != step.name}
+
+    def load_state(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self) -> None:
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=4, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+    def hash_of(self, name: str) -> Optional[str]:
+        if name not in self.hashes:
+            self.hashes[name] = file_hash(os.path.join(self.data_dir, name))
+        return self.hashes[name]
+
+    def closure(self, targets: List[str]) -> List[str]:
+        """Return the targets and everything they depend on, in dependency order."""
+        ordered: List[str] = []
+        visiting: Set[str] = set()
+
+        def visit(name: str):
+            if name in ordered:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle involving step '{name}'")
+            visiting.add(name)
+            for dependency in sorted(self.steps[name].dependencies):
+                visit(dependency)
+            visiting.discard(name)
+            ordered.append(name)
+
+        for target in targets:
+            if target not in self.steps:
+                raise ValueError(f"Unknown step '{target}', available: {', '.join(self.steps)}")
+            visit(target)
+        return ordered
+
+    def is_up_to_date(self, step: BuildStep) -> bool:
+        recorded = self.state.get(step.name)
+        if not recorded or not recorded.get('passed'):
+            return False
+        for name in step.inputs:
+            if recorded['inputs'].get(name) != self.hash_of(name):
+                return False
+        for name in step.outputs:
+            if recorded['outputs'].get(name) != self.hash_of(name):
+                return False
+        return True
+
+    def record(self, step: BuildStep, input_hashes: Dict[str, Optional[str]]) -> None:
+        for name in step.outputs:
+            self.hashes.pop(name, None)
+        self.state[step.name] = {
+            'passed': True,
+            'inputs': input_hashes,
+            'outputs': {name: self.hash_of(name) for name in step.outputs},
+        }
+
+    def build(self, targets: Optional[List[str]] = None, jobs: Optional[int] = None,
+              force: bool = False, dry_run: bool = False) -> bool:
+        """Build the targets, running out of date steps concurrently. Returns True on success."""
+        from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+        order = self.closure(targets or list(self.steps))
+        pending = list(order)
+        done: Set[str] = set()
+        failed: Set[str] = set()
+        running = {}
+        started = time.perf_counter()
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            while pending or running:
+                for name in list(pending):
+                    step = self.steps[name]
+                    if step.dependencies & failed:
+                        print(f"✗ {name}: skipped, dependency failed")
+                        failed.add(name)
+                        pending.remove(name)
+                        continue
+                    if not step.dependencies <= done:
+                        continue
+                    pending.remove(name)
+                    missing = [i for i in step.inputs if self.hash_of(i) is None]
+                    if missing:
+                        print(f"✗ {name}: missing inputs {missing}")
+                        failed.add(name)
+                        continue
+                    if not force and self.is_up_to_date(step):
+                        if self.verbose:
+                            print(f"  {name}: up to date")
+                        done.add(name)
+                        continue
+                    if dry_run:
+                        print(f"  {name}: would rebuild")
+                        done.add(name)
+                        continue
+                    input_hashes = {i: self.hash_of(i) for i in step.inputs}
+                    future = executor.submit(run_step, step, self.data_dir)
+                    running[future] = (step, input_hashes)
+
+                if not running:
+                    continue
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    step, input_hashes = running.pop(future)
+                    ok, output, elapsed = future.result()
+                    if ok:
+                        self.record(step, input_hashes)
+                        done.add(step.name)
+                        print(f"✓ {step.name} ({elapsed:.2f}s)")
+                    else:
+                        self.state.pop(step.name, None)
+                        failed.add(step.name)
+                        print(f"✗ {step.name} ({elapsed:.2f}s)")
+                    if output and (self.verbose or not ok):
+                        for line in output.rstrip().splitlines():
+                            print(f"    {line}")
+                    self.save_state()
+
+        if self.verbose:
+            print(f"\nBuild finished in {time.perf_counter() - started:.2f}s")
+        return not failed
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild the generated data files that are out of date.')
+    parser.add_argument('targets', nargs='*', help='Steps to build (default: all)')
+    parser.add_argument('-j', '--jobs', type=int, help='Number of worker processes (default: number of CPUs)')
+    parser.add_argument('-f', '--force', action='store_true', help='Rebuild even if up to date')
+    parser.add_argument('-n', '--dry-run', action='store_true', help='Only show what would be rebuilt')
+    parser.add_argument('-l', '--list', action='store_true', help='List the build steps and exit')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Show the output of every step')
+
+    args = parser.parse_args()
+
+    build = DataBuild(STEPS, verbose=args.verbose)
+
+    if args.list:
+        for name in build.closure(list(build.steps)):
+            step = build.steps[name]
+            status = "up to date" if build.is_up_to_date(step) else "out of date"
+            print(f"{name:20s} {status:12s} {step.description}")
+        return
+
+    try:
+        ok = build.build(args.targets, jobs=args.jobs, force=args.force, dry_run=args.dry_run)
+    except ValueError as e:
+        print(f"Error: {str(e)}")
+        exit(2)
+    exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Lexer of the checklist manual grammar, shared by the parser and the validation.
+
+Every line of a manual is classified once into a Token: its line number, its
+kind, its indent and the groups of the pattern that matched. The kinds are
+exclusive and tried in this order:
+
+ section      #SECTION                       groups: (name,)
+ subsection   ##Subsection                   groups: (name,)
+ checklist    ###Title                       groups: (title,)
+ cas_message  ALT 1 Caution                  groups: (message, type or None)
+ pfd_alert    PFD Alerts Window: "text"      groups: (text,)
+ item         1. / a. / (1) text ... ACTION  groups: (indent, 1, (1), a, text, action)
+ unnumbered   any other text                 groups: (indent, text, action)
+ blank        empty line                     groups: ()
+ other        a line no pattern accepts      groups: ()
+
+Patterns are matched on the line without its trailing whitespace, as
+ChecklistParser always did.
+
+tokenize_file keeps the tokens of a file in the artifact cache (artifact_cache.py),
+under the hash of the file content and LEXER_VERSION, so a manual is lexed once
+per change however many tools read it.
+
+Usage:
+    python checklist_lexer.py                        # token counts of S22TG6-Checklists.txt
+    python checklist_lexer.py manual.txt --dump      # print every token
+"""
+
+import argparse
+import io
+import os
+import re
+import sys
+from collections import Counter
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from artifact_cache import CACHE_DIR, ArtifactCache
+from profiling import NULL_PROFILER
+
+INPUT_FILE = "S22TG6-Checklists.txt"
+# Bump when the patterns or the tokens change, so cached tokens are lexed again
+LEXER_VERSION = 1
+
+# Line patterns of the manual grammar
+LINE_PATTERNS = {
+    'section': re.compile(r"#([A-Z].+)$"),
+    'subsection': re.compile(r"^##([A-Z].+)$"),
+    'checklist': re.compile(r"^###(.+)$"),
+    'item': re.compile(r"^(\s*)(?:(\d+)\.|\((\d+)\)|([a-z])\.)\s+(.+?)(?:\.\.\.\s*(.+))?$"),
+    'cas_message': re.compile(r"^([A-Z][A-Z0-9 ]+)(?: (Warning|Advisory|Caution))?$"),
+    'pfd_alert': re.compile(r'^PFD Alerts Window: [“"]([^“”"]*)[”"]$'),
+    'unnumbered': re.compile(r"^(\s*)(?!\d+\.|\(\d+\)|[a-z]\.)([^#].+?)(?:\.\.\.\s*(.+))?$")
+}
+
+# Order in which the patterns are tried, the first match gives the kind
+TOKEN_KINDS = ['section', 'subsection', 'checklist', 'cas_message', 'pfd_alert', 'item', 'unnumbered']
+
+class Token(NamedTuple):
+    line_number: int
+    kind: str
+    indent: int
+    groups: Tuple[Optional[str], ...]
+
+def lex_lines(lines: Iterable[str], first_line_number: int = 1, profiler=None) -> List[Token]:
+    """Classify every line."""
+    profiler = profiler or NULL_PROFILER
+    patterns = profiler.count_patterns(LINE_PATTERNS)
+    ordered = [(kind, patterns[kind].match) for kind in TOKEN_KINDS]
+    tokens = []
+    append = tokens.append
+    for line_number, line in enumerate(lines, first_line_number):
+        line = line.rstrip()
+        if not line:
+            append(Token(line_number, 'blank', 0, ()))
+            continue
+        indent = len(line) - len(line.lstrip())
+        for kind, match in ordered:
+            found = match(line)
+            if found:
+                append(Token(line_number, kind, indent, found.groups()))
+                break
+        else:
+            append(Token(line_number, 'other', indent, ()))
+    return tokens
+
+def tokenize_file(path: str, cache_dir: Optional[str] = CACHE_DIR, profiler=None) -> List[Token]:
+    """Tokens of a manual, from the cache if it was lexed since it last changed. cache_dir None disables the cache."""
+    profiler = profiler or NULL_PROFILER
+    with profiler.phase('read'):
+        with open(path, 'rb') as f:
+            data = f.read()
+    return tokenize_data(data, cache_dir, profiler)
+
+def tokenize_data(data: bytes, cache_dir: Optional[str] = CACHE_DIR, profiler=None) -> List[Token]:
+    """Tokens of the content of a manual, from the cache if it was lexed before."""
+    profiler = profiler or NULL_PROFILER
+    cache = ArtifactCache('tokens', LEXER_VERSION, cache_dir, sources=(__name__,))
+    key = cache.key(data)
+    with profiler.phase('lex'):
+        cached = cache.get(key)
+        if cached is not None:
+            tokens = [Token(line_number, kind, indent, tuple(groups)) for line_number, kind, indent, groups in cached]
+        else:
+            tokens = lex_lines(io.StringIO(data.decode('utf-8'), newline=None), profiler=profiler)
+            cache.put(key, tokens)
+    profiler.count('tokens.cached', cache.stats.hits)
+    cache.report(profiler)
+    return tokens
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description='Lex a checklist manual into tokens.')
+    parser.add_argument('txt_file', nargs='?', default=os.path.join(script_dir, INPUT_FILE),
+                        help=f'Manual text file (default: {INPUT_FILE})')
+    parser.add_argument('--dump', action='store_true', help='Print every token')
+    parser.add_argument('--cache', default=CACHE_DIR, help='Directory of the artifact cache (default: .artifact_cache)')
+    parser.add_argument('--no-cache', action='store_true', help='Lex without using the cache')
+
+    args = parser.parse_args()
+
+    try:
+        tokens = tokenize_file(args.txt_file, None if args.no_cache else args.cache)
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+
+    if args.dump:
+        for token in tokens:
+            print(f"{token.line_number:5d} {token.kind:12s} {token.indent:2d} {token.groups}")
+        return
+    counts = Counter(token.kind for token in tokens)
+    print(f"{args.txt_file}: {len(tokens)} lines")
+    for kind in TOKEN_KINDS + ['blank', 'other']:
+        print(f"  {kind:12s} {counts[kind]:6d}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Checklist store: the checklists of every aircraft as JSON Lines, with an index of their byte offsets.
+
+Every line of the store is one checklist in the parser schema with its
+aircraft and the revision of the write that added it. Replacing the checklists
+of an aircraft appends them as a new revision: the lines already written never
+move, and the lines of the older revision are dead until the store is
+compacted, which happens when a write would leave more dead bytes than live
+ones.
+
+The sidecar index (Checklists.index.jsonl for Checklists.jsonl) is a header
+line, mapping every aircraft to the byte range of its lines and to the range
+of its record in the index, followed by one record per aircraft mapping its
+titles and CAS alerts to the [offset, length] of their lines. ChecklistStore
+memory-maps the store, decodes the header and only the record of the aircraft
+asked for, then only the lines asked for, so finding one checklist reads one
+record and one line whatever the number of aircraft and checklists in the
+store. The index records the size and modification time of the store it was
+built for: if the store changed without it, the offsets are rebuilt by
+scanning the store, keeping the last revision of every aircraft, and the index
+is written again.
+
+extract_checklists.py and sf50_checklists.py write into a store with
+`--schema jsonl`, each replacing the checklists of its aircraft.
+
+Usage:
+    python checklist_store.py                                   # aircraft and checklists of Checklists.jsonl
+    python checklist_store.py --add SF50-Checklists.json -a SF50
+    python checklist_store.py -a S22TG6 --title "Engine Failure In Flight"
+    python checklist_store.py -a SF50 --alert "ENGINE FIRE"
+"""
+
+import argparse
+import json
+import mmap
+import os
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+STORE_FILE = "Checklists.jsonl"
+FORMAT = "checklist-store-index"
+VERSION = 2
+
+# [offset, length] of a line of the store
+Entry = List[int]
+
+def index_path(store_path: str) -> str:
+    return f"{os.path.splitext(store_path)[0]}.index.jsonl"
+
+def encode_json(value) -> bytes:
+    # Newlines in strings are escaped by JSON, so a value is always one line
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+def encode_line(aircraft: str, revision: int, checklist: Dict) -> bytes:
+    return encode_json({'aircraft': aircraft, 'revision': revision, **checklist})
+
+class _IndexBuilder:
+    """The summary (byte range, revision, counts) and the record (titles, alerts) of every aircraft."""
+
+    def __init__(self):
+        self.aircraft: Dict[str, Dict] = {}
+        self.records: Dict[str, Dict] = {}
+        self.revision = 0
+
+    def add(self, aircraft: str, revision: int, checklist: Dict, offset: int, length: int) -> None:
+        self.revision = max(self.revision, revision)
+        summary = self.aircraft.get(aircraft)
+        if summary is not None and summary['revision'] > revision:
+            # A line of a replaced revision
+            return
+        if summary is None or summary['revision'] < revision:
+            summary = self.aircraft[aircraft] = {'range': [offset, offset], 'revision': revision,
+                                                 'checklists': 0, 'alerts': 0}
+            self.records[aircraft] = {'titles': {}, 'alerts': {}}
+        record = self.records[aircraft]
+        summary['range'][1] = offset + length
+        summary['checklists'] += 1
+        record['titles'].setdefault(checklist['title'], []).append([offset, length])
+        if checklist.get('alert'):
+            record['alerts'].setdefault(checklist['alert'], []).append([offset, length])
+            summary['alerts'] = len(record['alerts'])
+
+    def add_shifted(self, aircraft: str, summary: Dict, record: Dict, shift: int) -> None:
+        """An aircraft copied unchanged to another position of the store."""
+        def shifted(entries: Dict[str, List[Entry]]) -> Dict[str, List[Entry]]:
+            return {key: [[offset + shift, length] for offset, length in values] for key, values in entries.items()}
+        self.revision = max(self.revision, summary['revision'])
+        self.aircraft[aircraft] = {**summary, 'range': [summary['range'][0] + shift, summary['range'][1] + shift]}
+        self.records[aircraft] = {'titles': shifted(record['titles']), 'alerts': shifted(record['alerts'])}
+
+def scan_index(data) -> _IndexBuilder:
+    """The index of a store, by decoding every line."""
+    builder = _IndexBuilder()
+    offset = 0
+    size = len(data)
+    while offset < size:
+        end = data.find(b'\n', offset)
+        end = size if end < 0 else end + 1
+        if end - offset > 1:
+            checklist = json.loads(data[offset:end])
+            builder.add(checklist.pop('aircraft'), checklist.pop('revision', 0), checklist, offset, end - offset)
+        offset = end
+    return builder
+
+def write_index(store_path: str, stat: os.stat_result, revision: int, aircraft: Dict[str, Dict],
+                records: Dict[str, bytes]) -> None:
+    """
+    Write the index of a store: the header, with the range of the encoded
+    record of every aircraft counted from the end of the header, then the records.
+    """
+    position = 0
+    summaries = {}
+    for name, summary in aircraft.items():
+        summaries[name] = {**summary, 'index': [position, len(records[name])]}
+        position += len(records[name])
+    header = encode_json({
+        'format': FORMAT,
+        'version': VERSION,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'revision': revision,
+        'aircraft': summaries,
+    })
+    path = index_path(store_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.writelines(records[name] for name in aircraft)
+    os.replace(tmp_path, path)
+
+def write_store(store_path: str, aircraft: str, checklists: List[Dict]) -> None:
+    """
+    Replace the checklists of an aircraft in a store, creating it if needed.
+
+    The checklists are appended as a new revision and the records of the other
+    aircraft are copied to the new index as they are, so a write costs the
+    checklists written whatever the size of the store. When the replaced lines
+    would make the dead bytes outgrow the live ones, the live lines are copied
+    to a new store instead, written to a temporary file and moved in place.
+    The index is written last.
+    """
+    store = ChecklistStore(store_path) if os.path.exists(store_path) else None
+    try:
+        revision = store.revision + 1 if store else 1
+        size = len(store.data) if store else 0
+        others = sorted(((name, summary) for name, summary in store.header.items() if name != aircraft),
+                        key=lambda item: item[1]['range'][0]) if store else []
+        live = sum(summary['range'][1] - summary['range'][0] for _, summary in others)
+        lines = [encode_line(aircraft, revision, checklist) for checklist in checklists]
+        builder = _IndexBuilder()
+        records: Dict[str, bytes] = {}
+        # Without lines the old revision would come back with a scan of the store, so it is removed
+        compact = store is None or not lines or size - live > live + sum(map(len, lines))
+        if compact:
+            # The live lines of the other aircraft, then the new revision
+            chunks = []
+            position = 0
+            for name, summary in others:
+                start, end = summary['range']
+                chunks.append(store.data[start:end])
+                builder.add_shifted(name, summary, store.record(name), position - start)
+                position += end - start
+        else:
+            # After the lines already written, which keep their offsets
+            builder.aircraft = dict(others)
+            records = {name: store.record_bytes(name) for name, _ in others}
+            position = size
+    finally:
+        if store:
+            store.close()
+
+    new = _IndexBuilder()
+    for checklist, line in zip(checklists, lines):
+        new.add(aircraft, revision, checklist, position, len(line))
+        position += len(line)
+    if compact:
+        tmp_path = f"{store_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.writelines(chunks)
+            f.writelines(lines)
+        stat = os.stat(tmp_path)
+        os.replace(tmp_path, store_path)
+    else:
+        with open(store_path, 'ab') as f:
+            f.writelines(lines)
+            f.flush()
+            stat = os.fstat(f.fileno())
+    builder.aircraft.update(new.aircraft)
+    records.update({name: encode_json(record) for name, record in {**builder.records, **new.records}.items()})
+    write_index(store_path, stat, revision, builder.aircraft, records)
+
+class ChecklistStore:
+    """A memory-mapped checklist store, decoding only the index records and the checklists looked up."""
+
+    def __init__(self, store_path: str):
+        self.path = store_path
+        self.file = open(store_path, 'rb')
+        self.index_file = None
+        stat = os.fstat(self.file.fileno())
+        # An empty file can't be mapped
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b''
+        # Records decoded so far, by aircraft
+        self.records: Dict[str, Dict] = {}
+        self.header: Dict[str, Dict] = {}
+        self.revision = 0
+        self.load_index(stat)
+
+    def load_index(self, stat: os.stat_result) -> None:
+        """Read the header of the index, or rebuild the index if it is missing or stale and write it again."""
+        try:
+            self.index_file = open(index_path(self.path), 'rb')
+            header = json.loads(self.index_file.readline())
+            if (header.get('format') == FORMAT and header.get('version') == VERSION
+                    and header.get('size') == stat.st_size and header.get('mtime_ns') == stat.st_mtime_ns):
+                self.header = header['aircraft']
+                self.revision = header['revision']
+                # The record ranges count from the end of the header
+                self.records_start = self.index_file.tell()
+                return
+        except (OSError, ValueError, AttributeError):
+            pass
+        if self.index_file:
+            self.index_file.close()
+            self.index_file = None
+        # Missing or stale: the offsets of the store as it is now
+        builder = scan_index(self.data)
+        self.header = builder.aircraft
+        self.records = builder.records
+        self.revision = builder.revision
+        try:
+            write_index(self.path, stat, self.revision, self.header,
+                        {name: encode_json(record) for name, record in self.records.items()})
+        except OSError:
+            # A store that can't be indexed is scanned again next time
+            pass
+
+    def record_bytes(self, aircraft: str) -> bytes:
+        """The encoded index record of an aircraft."""
+        if self.index_file is None:
+            return encode_json(self.records[aircraft])
+        offset, length = self.header[aircraft]['index']
+        self.index_file.seek(self.records_start + offset)
+        return self.index_file.read(length)
+
+    def record(self, aircraft: str) -> Dict:
+        """The titles and alerts of an aircraft, empty if it isn't in the store."""
+        if aircraft not in self.header:
+            return {'titles': {}, 'alerts': {}}
+        if aircraft not in self.records:
+            self.records[aircraft] = json.loads(self.record_bytes(aircraft))
+        return self.records[aircraft]
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        if self.index_file:
+            self.index_file.close()
+        self.file.close()
+
+    def __enter__(self) -> 'ChecklistStore':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def read(self, entry: Entry) -> Dict:
+        offset, length = entry
+        checklist = json.loads(self.data[offset:offset + length])
+        del checklist['aircraft']
+        checklist.pop('revision', None)
+        return checklist
+
+    def aircraft(self) -> List[str]:
+        return list(self.header)
+
+    def titles(self, aircraft: str) -> List[str]:
+        return list(self.record(aircraft)['titles'])
+
+    def get(self, aircraft: str, title: str, occurrence: int = 0) -> Optional[Dict]:
+        """A checklist by title, the `occurrence`th one if the title appears several times."""
+        entries = self.record(aircraft)['titles'].get(title, [])
+        return self.read(entries[occurrence]) if occurrence < len(entries) else None
+
+    def by_alert(self, aircraft: str, alert: str) -> List[Dict]:
+        """The checklists of a CAS alert (a Warning and a Caution procedure can share one)."""
+        return [self.read(entry) for entry in self.record(aircraft)['alerts'].get(alert, [])]
+
+    def checklists(self, aircraft: str) -> Iterator[Dict]:
+        """All the checklists of an aircraft, in order."""
+        entries = sorted(entry for entries in self.record(aircraft)['titles'].values() for entry in entries)
+        return (self.read(entry) for entry in entries)
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description='Add checklists to a JSON Lines checklist store or look them up.')
+    parser.add_argument('store', nargs='?', default=os.path.join(script_dir, STORE_FILE),
+                        help=f'Store file (default: {STORE_FILE})')
+    parser.add_argument('-a', '--aircraft', help='Aircraft of the checklists')
+    parser.add_argument('--add', metavar='JSON', help='Replace the checklists of --aircraft with this parser schema file')
+    parser.add_argument('--title', help='Print the checklist of --aircraft with this title')
+    parser.add_argument('--alert', help='Print the checklists of --aircraft for this CAS alert')
+
+    args = parser.parse_args()
+
+    if (args.add or args.title or args.alert) and not args.aircraft:
+        parser.error("--add, --title and --alert need --aircraft")
+    try:
+        if args.add:
+            with open(args.add, 'r', encoding='utf-8') as f:
+                checklists = json.load(f)
+            write_store(args.store, args.aircraft, checklists)
+            print(f"Wrote {len(checklists)} {args.aircraft} checklists to {args.store}")
+            return
+        start = time.perf_counter()
+        with ChecklistStore(args.store) as store:
+            if args.title or args.alert:
+                found = [store.get(args.aircraft, args.title)] if args.title else store.by_alert(args.aircraft, args.alert)
+                found = [checklist for checklist in found if checklist]
+                elapsed = time.perf_counter() - start
+                for checklist in found:
+                    print(json.dumps(checklist, ensure_ascii=False, indent=4))
+                print(f"{len(found)} checklists found in {elapsed * 1000:.2f} ms")
+                if not found:
+                    sys.exit(1)
+                return
+            for aircraft in store.aircraft():
+                summary = store.header[aircraft]
+                first, last = summary['range']
+                print(f"{aircraft}: {summary['checklists']} checklists, {summary['alerts']} alerts, {last - first:,d} bytes")
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Compact encoding of the checklist JSON files, and a loader that expands it on demand.
+
+The checklists of a manual repeat the same text many times ("Airspeed", "Power
+Lever", "Land as soon as practical"...) and often whole groups of steps, which
+the parser output stores in full every time. The compact encoding stores:
+
+ - every string once, in a string table, referenced by its index (-1 for None)
+ - every distinct step subtree once, in a step table where a step is
+   [instruction, action, is_conditional, indent_level, step_number, [sub steps]]
+   and the sub steps are indexes of earlier entries, so identical subtrees,
+   down to single steps, are shared
+ - the checklists as [title, section, subsection, alert, alert_type,
+   alert_message, [steps]]
+
+CompactChecklists loads such a file and expands a checklist into the same
+dictionary as the parser output only when it is accessed. The app decodes the
+parser output, this encoding is for the tools and for transferring the files.
+
+Usage:
+    python compact_checklists.py                              # compare sizes and decode times
+    python compact_checklists.py SF50-Checklists.json -o SF50-Checklists.compact.json
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+FORMAT = "compact-checklists"
+VERSION = 1
+CHECKLIST_FIELDS = ['title', 'section', 'subsection', 'alert', 'alert_type', 'alert_message']
+
+class _Encoder:
+    def __init__(self):
+        self.strings: List[str] = []
+        self.string_index: Dict[str, int] = {}
+        self.steps: List[List] = []
+        self.step_index: Dict[Tuple, int] = {}
+
+    def string(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        index = self.string_index.get(value)
+        if index is None:
+            index = self.string_index[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+    def step(self, step: Dict) -> int:
+        # The sub steps are encoded first, so a step only refers to earlier entries
+        sub_steps = tuple(self.step(sub_step) for sub_step in step['sub_steps'])
+        key = (self.string(step['instruction']), self.string(step['action']), int(step['is_conditional']),
+               step['indent_level'], self.string(step['step_number']), sub_steps)
+        index = self.step_index.get(key)
+        if index is None:
+            index = self.step_index[key] = len(self.steps)
+            self.steps.append([*key[:5], list(sub_steps)])
+        return index
+
+def to_compact(checklists: List[Dict]) -> Dict:
+    """Encode checklists in the parser schema with a string table and shared step subtrees."""
+    encoder = _Encoder()
+    encoded = [[encoder.string(checklist[field]) for field in CHECKLIST_FIELDS]
+               + [[encoder.step(step) for step in checklist['steps']]]
+               for checklist in checklists]
+    return {
+        'format': FORMAT,
+        'version': VERSION,
+        'strings': encoder.strings,
+        'steps': encoder.steps,
+        'checklists': encoded,
+    }
+
+def write_compact(checklists: List[Dict], output_path: str) -> None:
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(to_compact(checklists), f, separators=(',', ':'))
+
+class CompactChecklists:
+    """Checklists of a compact file, expanded to parser dictionaries when accessed."""
+
+    def __init__(self, data: Dict):
+        if data.get('format') != FORMAT or data.get('version') != VERSION:
+            raise ValueError(f"Not a {FORMAT} version {VERSION} file")
+        self.strings: List[str] = data['strings']
+        self.steps: List[List] = data['steps']
+        self.checklists: List[List] = data['checklists']
+
+    @classmethod
+    def load(cls, path: str) -> 'CompactChecklists':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def string(self, index: int) -> Optional[str]:
+        return None if index < 0 else self.strings[index]
+
+    def expand_step(self, index: int) -> Dict:
+        instruction, action, is_conditional, indent_level, step_number, sub_steps = self.steps[index]
+        return {
+            'instruction': self.strings[instruction],
+            'action': self.strings[action],
+            'is_conditional': bool(is_conditional),
+            'indent_level': indent_level,
+            'step_number': self.string(step_number),
+            'sub_steps': [self.expand_step(sub_step) for sub_step in sub_steps],
+        }
+
+    def __len__(self) -> int:
+        return len(self.checklists)
+
+    def __getitem__(self, index: int) -> Dict:
+        encoded = self.checklists[index]
+        checklist: Dict[str, Any] = {field: self.string(value) for field, value in zip(CHECKLIST_FIELDS, encoded)}
+        checklist['steps'] = [self.expand_step(step) for step in encoded[-1]]
+        return checklist
+
+    def __iter__(self) -> Iterator[Dict]:
+        return (self[index] for index in range(len(self)))
+
+    def titles(self) -> List[str]:
+        """The titles, without expanding any checklist."""
+        return [self.strings[encoded[0]] for encoded in self.checklists]
+
+    def find(self, title: str) -> Optional[Dict]:
+        """The first checklist with this title, the only one expanded."""
+        for position, encoded in enumerate(self.checklists):
+            if self.strings[encoded[0]] == title:
+                return self[position]
+        return None
+
+    def expand(self) -> List[Dict]:
+        return list(self)
+
+def best_time(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def compare(json_file: str, repeat: int = 5) -> bool:
+    """Print the size and decode time of the parser and compact encodings. Returns whether they round trip."""
+    with open(json_file, 'r', encoding='utf-8') as f:
+        text = f.read()
+    checklists = json.loads(text)
+    compact = to_compact(checklists)
+    encodings = {
+        'parser (indented)': text,
+        'parser (minified)': json.dumps(checklists, separators=(',', ':')),
+        'compact': json.dumps(compact, separators=(',', ':')),
+    }
+    total_steps = sum(1 for _ in _walk_steps(checklists))
+    print(f"{json_file}: {len(checklists)} checklists, {total_steps} steps, "
+          f"{len(compact['steps'])} distinct step subtrees, {len(compact['strings'])} distinct strings")
+    print(f"{'encoding':20s} {'bytes':>10s} {'gzip':>10s} {'decode ms':>10s}")
+    for name, encoded in encodings.items():
+        size = len(encoded.encode('utf-8'))
+        zipped = len(gzip.compress(encoded.encode('utf-8')))
+        seconds = best_time(lambda: json.loads(encoded), repeat)
+        print(f"{name:20s} {size:10,d} {zipped:10,d} {seconds * 1000:10.2f}")
+
+    compact_text = encodings['compact']
+    full = best_time(lambda: CompactChecklists(json.loads(compact_text)).expand(), repeat)
+    one = best_time(lambda: CompactChecklists(json.loads(compact_text))[len(checklists) // 2], repeat)
+    print(f"{'compact + expand all':20s} {'':>10s} {'':>10s} {full * 1000:10.2f}")
+    print(f"{'compact + expand one':20s} {'':>10s} {'':>10s} {one * 1000:10.2f}")
+
+    identical = CompactChecklists(compact).expand() == checklists
+    print("✅ Expands to the same checklists" if identical else "❌ Does not expand to the same checklists")
+    return identical
+
+def _walk_steps(checklists: List[Dict]) -> Iterator[Dict]:
+    stack = [step for checklist in checklists for step in checklist['steps']]
+    while stack:
+        step = stack.pop()
+        yield step
+        stack.extend(step['sub_steps'])
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description='Compare or write the compact encoding of a checklist JSON file.')
+    parser.add_argument('json_file', nargs='?', default=os.path.join(script_dir, 'S22TG6-Checklists.json'),
+                        help='Checklist JSON file in the parser schema (default: S22TG6-Checklists.json)')
+    parser.add_argument('-o', '--output', help='Write the compact encoding to this file instead of comparing')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per timing, the best is kept (default: 5)')
+
+    args = parser.parse_args()
+
+    try:
+        if args.output:
+            with open(args.json_file, 'r', encoding='utf-8') as f:
+                write_compact(json.load(f), args.output)
+            print(f"Successfully generated {args.output}")
+            return
+        identical = compare(args.json_file, args.repeat)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+    sys.exit(0 if identical else 1)
+
+if __name__ == "__main__":
+    main()
@@ -14,19 +14,70 @@ Line patterns:
  line of text that don't have normal text during a checklist are comments for the checklist
 
  items spans multiple line, until the next pattern they should be merged.
+
+The lines are classified by checklist_lexer.py, and the parser builds the checklists from its tokens.
+The checklists parsed from a file are kept in the artifact cache (artifact_cache.py)
+under the hash of its content, so an unchanged manual is not parsed again.
 """
 
+import io
 import json
 import re
 import os
-import uuid
+import sys
 import argparse
-from typing import Dict, List, Optional, Union, Tuple
+import logging
+from collections import Counter, deque
+from typing import TYPE_CHECKING, Deque, Dict, List, Optional, Union, Tuple
 from dataclasses import dataclass, asdict
 
+from profiling import NULL_PROFILER, add_profile_arguments, run_profiled
+
+# The lexer, the cache, the store and the compact schema are imported by the code
+# using them, so importing this module or running --help doesn't load them
+if TYPE_CHECKING:
+    from checklist_lexer import Token
+
 # Define the input and output files
 INPUT_FILE = "S22TG6-Checklists.txt"
 OUTPUT_FILE = "S22TG6-Checklists.json"
+AIRCRAFT = "S22TG6"
+# Bump when the parser builds different checklists from the same tokens, so cached checklists are parsed again
+PARSER_VERSION = 1
+
+# 'parser' is the snake_case output decoded by the app, 'app' adds stable ids
+# and uses the camelCase property names of the app model, 'compact' is the parser
+# output with shared strings and steps (compact_checklists.py)
+SCHEMAS = ['parser', 'app', 'compact', 'jsonl']
+# uuid5 of the same names in this namespace always gives the same ids. It is
+# uuid5(NAMESPACE_URL, "https://flyfun.aero/alertsimulator/checklists"), written
+# out so importing this module doesn't load uuid and hashlib
+CHECKLIST_ID_NAMESPACE = '8b873b2f-af07-559c-9b61-82d73e79ce31'
+
+# Diagnostics go through this logger with lazy %-formatting, so they cost a level
+# check when verbose output is off. When on, they are buffered and written in batches.
+# They are off unless the program turns them on with configure_logging, whatever
+# the level of the root logger: the parser itself never changes the logging setup.
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+LOG_BUFFER_CAPACITY = 1000
+_log_handler: Optional['logging.handlers.MemoryHandler'] = None
+
+def configure_logging(verbose: bool) -> None:
+    """Send the parser diagnostics to stdout through a buffered handler, at debug level if verbose."""
+    global _log_handler
+    if verbose and _log_handler is None:
+        from logging.handlers import MemoryHandler
+        target = logging.StreamHandler(sys.stdout)
+        target.setFormatter(logging.Formatter('%(message)s'))
+        _log_handler = MemoryHandler(LOG_BUFFER_CAPACITY, flushLevel=logging.ERROR, target=target)
+        logger.addHandler(_log_handler)
+        logger.propagate = False
+    logger.setLevel(logging.DEBUG if verbose else logging.WARNING)
+
+def flush_logging() -> None:
+    if _log_handler is not None:
+        _log_handler.flush()
 
 @dataclass
 class ChecklistStep:
@@ -47,9 +98,154 @@ class Checklist:
     alert_message: Optional[str]
     steps: List[ChecklistStep]
 
+def step_from_dict(step: Dict) -> ChecklistStep:
+    return ChecklistStep(**{**step, 'sub_steps': [step_from_dict(sub_step) for sub_step in step['sub_steps']]})
+
+def checklist_from_dict(checklist: Dict) -> Checklist:
+    """A checklist of the parser schema back to its dataclass."""
+    return Checklist(**{**checklist, 'steps': [step_from_dict(step) for step in checklist['steps']]})
+
+@dataclass
+class ChecklistBlock:
+    """Lines of a manual from one checklist title to the next, with the headers in effect at its start."""
+    first_line: int
+    section: Optional[str]
+    subsection: Optional[str]
+    lines: List[str]
+
+def split_checklist_blocks(lines: List[str]) -> List[ChecklistBlock]:
+    """
+    Split the lines of a manual at every checklist title.
+
+    The parser resets its state at each ### line, so each block can be parsed on
+    its own from the section and subsection in effect at its start, and parsing
+    the blocks in order gives the same checklists as parsing the whole manual.
+    The first block holds the lines before the first title.
+    """
+    from checklist_lexer import LINE_PATTERNS
+
+    blocks = [ChecklistBlock(1, None, None, [])]
+    section = subsection = None
+    section_pattern = LINE_PATTERNS['section']
+    subsection_pattern = LINE_PATTERNS['subsection']
+    for i, line in enumerate(lines, 1):
+        if line.startswith('#'):
+            stripped = line.rstrip()
+            if stripped.startswith('###'):
+                blocks.append(ChecklistBlock(i, section, subsection, []))
+            else:
+                match = section_pattern.match(stripped)
+                if match:
+                    section = match.group(1)
+                match = subsection_pattern.match(stripped)
+                if match:
+                    subsection = match.group(1)
+        blocks[-1].lines.append(line)
+    return blocks
+
+def group_blocks(blocks: List[ChecklistBlock], chunks: int) -> List[ChecklistBlock]:
+    """
+    Merge consecutive blocks into at most `chunks` blocks of about the same number of lines.
+
+    A merged block starts from the section and subsection of its first block, so
+    it parses to the checklists of the blocks it merges.
+    """
+    target = sum(len(block.lines) for block in blocks) / max(chunks, 1)
+    merged: List[ChecklistBlock] = []
+    for block in blocks:
+        if merged and len(merged[-1].lines) + len(block.lines) / 2 <= target:
+            merged[-1].lines.extend(block.lines)
+        else:
+            merged.append(ChecklistBlock(block.first_line, block.section, block.subsection, list(block.lines)))
+    return merged
+
+def parse_chunk(block: ChecklistBlock) -> List[Checklist]:
+    """Parse one chunk in a worker process."""
+    return ChecklistParser().parse_block(block)
+
+def parse_parallel(lines: List[str], jobs: Optional[int] = None, chunks: Optional[int] = None) -> List[Checklist]:
+    """
+    Parse the lines of a manual with a pool of `jobs` processes.
+
+    The manual is cut at checklist titles (split_checklist_blocks) into `chunks`
+    chunks (default: 4 per process, so a slow chunk does not hold up the others),
+    each carrying the section and subsection in effect at its start. The chunks
+    are parsed independently and their checklists concatenated in order, which
+    gives the same checklists as parsing the whole manual.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    blocks = group_blocks(split_checklist_blocks(lines), chunks or jobs * 4)
+    if jobs <= 1 or len(blocks) <= 1:
+        return [checklist for block in blocks for checklist in parse_chunk(block)]
+    # Imported here so the tools importing this module don't load multiprocessing at startup
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=min(jobs, len(blocks))) as executor:
+        return [checklist for checklists in executor.map(parse_chunk, blocks) for checklist in checklists]
+
+def checklist_id(name: str) -> str:
+    import uuid
+    return str(uuid.uuid5(uuid.UUID(CHECKLIST_ID_NAMESPACE), name))
+
+def app_step(step: ChecklistStep, checklist_key: str, path: str) -> Dict:
+    """A step in the app schema, with an id derived from its checklist and its position."""
+    return {
+        'id': checklist_id(f"{checklist_key}/steps/{path}"),
+        'instruction': step.instruction,
+        'action': step.action,
+        'isConditional': step.is_conditional,
+        'indentLevel': step.indent_level,
+        'stepNumber': step.step_number,
+        'subSteps': [app_step(sub_step, checklist_key, f"{path}.{i}") for i, sub_step in enumerate(step.sub_steps, 1)],
+    }
+
+def to_app_schema(checklists: List[Checklist], aircraft: str) -> List[Dict]:
+    """
+    Convert checklists to the app schema with deterministic ids.
+
+    The id of a checklist is the uuid5 of (aircraft, section, title), and the id
+    of a step adds its position path (1, 1.2...), so regenerating an unchanged
+    manual gives the same ids. A title repeated in a section gets an occurrence
+    number.
+    """
+    occurrences: Counter = Counter()
+    result = []
+    for checklist in checklists:
+        key = f"{aircraft}/{checklist.section}/{checklist.title}"
+        occurrences[key] += 1
+        if occurrences[key] > 1:
+            key = f"{key}#{occurrences[key]}"
+        result.append({
+            'id': checklist_id(key),
+            'title': checklist.title,
+            'section': checklist.section,
+            'subsection': checklist.subsection,
+            'alert': checklist.alert,
+            'alertType': checklist.alert_type,
+            'alertMessage': checklist.alert_message,
+            'steps': [app_step(step, key, str(i)) for i, step in enumerate(checklist.steps, 1)],
+        })
+    return result
+
+def dump_json(data, json_file, schema: str = 'parser') -> None:
+    """Write the output of a schema, indented unless it is the compact one."""
+    if schema == 'compact':
+        json.dump(data, json_file, separators=(',', ':'))
+    else:
+        json.dump(data, json_file, indent=4)
+
 class ChecklistParser:
-    def __init__(self, verbose: bool = False):
+    def __init__(self, verbose: Optional[bool] = None, profiler=None, trace_size: int = 0,
+                 cache_dir: Optional[str] = None):
+        # verbose=True or False turns the diagnostics on or off with configure_logging, as before the
+        # program configured the logging in main. The default leaves the logging setup as it is.
         self.verbose = verbose
+        if verbose is not None:
+            configure_logging(verbose)
+        self.profiler = profiler or NULL_PROFILER
+        # Artifact cache of the tokens and checklists used by parse_checklist, None to always parse the file
+        self.cache_dir = cache_dir
+        # Ring buffer of (line number, classification, checklist title), dumped on error
+        self.trace: Optional[Deque[Tuple[int, str, Optional[str]]]] = deque(maxlen=trace_size) if trace_size > 0 else None
         self.checklists: List[Checklist] = []
         self.current_checklist: Optional[Checklist] = None
         self.current_step: Optional[ChecklistStep] = None
@@ -60,17 +256,20 @@ class ChecklistParser:
         self.pending_pfd_alert: Optional[str] = None
         self.line_count = 0
         
-        # Define regex patterns
-        self.patterns = {
-            'section': re.compile(r"#([A-Z].+)$"),
-            'subsection': re.compile(r"^##([A-Z].+)$"),
-            'checklist': re.compile(r"^###(.+)$"),
-            'item': re.compile(r"^(\s*)(?:(\d+)\.|\((\d+)\)|([a-z])\.)\s+(.+?)(?:\.\.\.\s*(.+))?$"),
-            'cas_message': re.compile(r"^([A-Z][A-Z0-9 ]+)(?: (Warning|Advisory|Caution))?$"),
-            'pfd_alert': re.compile(r'^PFD Alerts Window: [“"]([^“”"]*)[”"]$'),
-            'unnumbered': re.compile(r"^(\s*)(?!\d+\.|\(\d+\)|[a-z]\.)([^#].+?)(?:\.\.\.\s*(.+))?$")
+        self.handlers = {
+            'section': self.process_section_header,
+            'subsection': self.process_subsection_header,
+            'checklist': self.process_checklist_header,
+            'cas_message': self.process_cas_message,
+            'pfd_alert': self.process_pfd_alert,
+            'item': self.process_numbered_step,
+            'unnumbered': self.process_unnumbered_step,
         }
 
+        # Only install the per-line instrumentation when profiling
+        if self.profiler.enabled:
+            self.add_step_to_checklist = self.profiler.timed('build_tree', self.add_step_to_checklist)
+
     def create_checklist_step(self, instruction: str, action: str, indent_level: int, 
                             step_number: Optional[str] = None) -> ChecklistStep:
         """Create a new ChecklistStep with the given parameters."""
@@ -127,196 +326,276 @@ class ChecklistParser:
                 self.current_checklist.steps.append(step)
             self.current_step = step
 
-    def process_section_header(self, line: str, line_number: int):
-        """Process a section header line."""
-        match = self.patterns['section'].match(line)
-        if match:
-            self.current_section = match.group(1)
-            if self.verbose:
-                print(f"Found section: {self.current_section} at line {line_number}")
-
-    def process_subsection_header(self, line: str, line_number: int):
-        """Process a subsection header line."""
-        match = self.patterns['subsection'].match(line)
-        if match:
-            self.current_subsection = match.group(1)
-            if self.verbose:
-                print(f"Found subsection: {self.current_subsection} at line {line_number}")
-
-    def process_checklist_header(self, line: str, line_number: int):
-        """Process a checklist header line."""
-        match = self.patterns['checklist'].match(line)
-        if match:
-            if self.current_checklist:
-                self.checklists.append(self.current_checklist)
-            
-            self.current_checklist = Checklist(
-                title=match.group(1).strip(),
-                section=self.current_section or "",
-                subsection=self.current_subsection,
-                steps=[],
-                alert=None,
-                alert_type=None,
-                alert_message=None
-            )
-            self.current_step = None
-            self.current_alert = None
-            self.current_alert_type = None
-            self.pending_pfd_alert = None
-            
-            if self.verbose:
-                print(f"Found checklist: {self.current_checklist.title} at line {line_number}")
-
-    def process_pfd_alert(self, line: str, line_number: int):
-        """Process a PFD alert line."""
-        match = self.patterns['pfd_alert'].match(line)
-        if match and self.current_checklist:
-            self.pending_pfd_alert = match.group(1).strip()
-            self.current_checklist.alert_message = self.pending_pfd_alert
-            if self.verbose:
-                print(f"Found PFD Alert: {self.pending_pfd_alert} at line {line_number}")
-
-    def process_cas_message(self, line: str, line_number: int):
-        """Process a CAS message line."""
-        match = self.patterns['cas_message'].match(line)
-        if match and self.current_checklist:
-            self.current_alert = match.group(1).strip()
-            self.current_alert_type = match.group(2).strip() if match.group(2) else None
-            self.current_checklist.alert = self.current_alert
-            self.current_checklist.alert_type = self.current_alert_type
-            
-            if self.verbose:
-                print(f"Found CAS message: {self.current_alert} at line {line_number}")
+    def process_section_header(self, token: 'Token') -> bool:
+        self.current_section = token.groups[0]
+        logger.debug("Found section: %s at line %d", self.current_section, token.line_number)
+        return True
 
-    def process_numbered_step(self, line: str, line_number: int) -> bool:
-        """Process a numbered checklist step. Returns True if a step was processed."""
-        match = self.patterns['item'].match(line)
-        if match and self.current_checklist:
-            indent, num1, num2, num3, content, action = match.groups()
-            
-            # Calculate indent level (2 spaces = 1 level)
-            indent_level = len(indent) // 2
-            
-            # Split content into instruction and action
-            instruction = content.strip()
-            action = action.strip() if action else ""
-            
-            # Remove dots from action text
-            if action:
-                action = re.sub(r'\.+', '', action).strip()
-            
-            # Determine step number format
-            step_number = None
-            if num1:  # "1", "2", etc.
-                step_number = num1
-                indent_level = 0
-            elif num2:  # "(1)", "(2)", etc.
-                step_number = f"({num2})"
-                indent_level = 2
-            elif num3:  # "a", "b", etc.
-                step_number = num3
-                indent_level = 1
-
-            step = self.create_checklist_step(instruction, action, indent_level, step_number)
-            self.add_step_to_checklist(step, indent_level)
-            
-            if self.verbose:
-                print(f"Found step: {step_number} - {instruction} at line {line_number}")
-            return True
-        return False
-
-    def process_unnumbered_step(self, line: str, line_number: int):
-        """Process an unnumbered checklist step."""
-        # Skip if this is a section, subsection, or checklist title
-        if (self.patterns['section'].match(line) or 
-            self.patterns['subsection'].match(line) or 
-            self.patterns['checklist'].match(line)):
-            return
-            
-        # Skip if this is a CAS message or PFD Alert
-        if (self.patterns['cas_message'].match(line) or 
-            self.patterns['pfd_alert'].match(line)):
-            return
-            
-        match = self.patterns['unnumbered'].match(line)
-        if match and self.current_checklist:
-            indent, content, action = match.groups()
-            
-            # Calculate indent level (2 spaces = 1 level)
-            indent_level = len(indent) // 2
-            
-            # Split content into instruction and action
-            instruction = content.strip()
-            action = action.strip() if action else ""
-            
-            # Remove dots from action text
-            if action:
-                action = re.sub(r'\.+', '', action).strip()
-            
-            step = self.create_checklist_step(instruction, action, indent_level)
-            self.add_step_to_checklist(step, indent_level)
-            
-            if self.verbose:
-                print(f"Found unnumbered step: {instruction} at line {line_number}")
+    def process_subsection_header(self, token: 'Token') -> bool:
+        self.current_subsection = token.groups[0]
+        logger.debug("Found subsection: %s at line %d", self.current_subsection, token.line_number)
+        return True
 
-    def parse_checklist(self, file_path: str, output_path: str) -> None:
-        """Parse the checklist file and generate a JSON output."""
-        if self.verbose:
-            print(f"Opening input file: {file_path}")
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            
-        for i, line in enumerate(lines, 1):
-            self.line_count += 1
-            line = line.rstrip()
-            
-            # Skip empty lines
-            if not line:
-                continue
-            
-            # Process each type of line in order of precedence
-            # First check for headers and alerts
-            self.process_section_header(line, i)
-            self.process_subsection_header(line, i)
-            self.process_checklist_header(line, i)
-            self.process_cas_message(line, i)
-            self.process_pfd_alert(line, i)
-            
-            # Then process steps - only process unnumbered if numbered didn't match
-            if not self.process_numbered_step(line, i):
-                self.process_unnumbered_step(line, i)
-        
-        # Add the last checklist
+    def process_checklist_header(self, token: 'Token') -> bool:
         if self.current_checklist:
             self.checklists.append(self.current_checklist)
-        
-        if self.verbose:
-            print(f"\nProcessing complete:")
-            print(f"Total lines processed: {self.line_count}")
-            print(f"Total checklists found: {len(self.checklists)}")
-            print(f"Writing output to: {output_path}")
-        
-        # Convert dataclasses to dictionaries for JSON serialization
-        def dataclass_to_dict(obj):
-            if isinstance(obj, (Checklist, ChecklistStep)):
-                return {k: dataclass_to_dict(v) for k, v in asdict(obj).items()}
-            elif isinstance(obj, list):
-                return [dataclass_to_dict(item) for item in obj]
-            return obj
-        
+
+        self.current_checklist = Checklist(
+            title=token.groups[0].strip(),
+            section=self.current_section or "",
+            subsection=self.current_subsection,
+            steps=[],
+            alert=None,
+            alert_type=None,
+            alert_message=None
+        )
+        self.current_step = None
+        self.current_alert = None
+        self.current_alert_type = None
+        self.pending_pfd_alert = None
+
+        logger.debug("Found checklist: %s at line %d", self.current_checklist.title, token.line_number)
+        return True
+
+    def process_pfd_alert(self, token: 'Token') -> bool:
+        """Process a PFD alert line. Returns True if an alert message was set."""
+        if not self.current_checklist:
+            return False
+        self.pending_pfd_alert = token.groups[0].strip()
+        self.current_checklist.alert_message = self.pending_pfd_alert
+        logger.debug("Found PFD Alert: %s at line %d", self.pending_pfd_alert, token.line_number)
+        return True
+
+    def process_cas_message(self, token: 'Token') -> bool:
+        """Process a CAS message line. Returns True if an alert was set."""
+        if not self.current_checklist:
+            return False
+        message, alert_type = token.groups
+        self.current_alert = message.strip()
+        self.current_alert_type = alert_type.strip() if alert_type else None
+        self.current_checklist.alert = self.current_alert
+        self.current_checklist.alert_type = self.current_alert_type
+
+        logger.debug("Found CAS message: %s at line %d", self.current_alert, token.line_number)
+        return True
+
+    def process_numbered_step(self, token: 'Token') -> bool:
+        """Process a numbered checklist step. Returns True if a step was processed."""
+        if not self.current_checklist:
+            return False
+        indent, num1, num2, num3, content, action = token.groups
+
+        # Calculate indent level (2 spaces = 1 level)
+        indent_level = len(indent) // 2
+
+        # Split content into instruction and action
+        instruction = content.strip()
+        action = action.strip() if action else ""
+
+        # Remove dots from action text
+        if action:
+            action = re.sub(r'\.+', '', action).strip()
+
+        # Determine step number format
+        step_number = None
+        if num1:  # "1", "2", etc.
+            step_number = num1
+            indent_level = 0
+        elif num2:  # "(1)", "(2)", etc.
+            step_number = f"({num2})"
+            indent_level = 2
+        elif num3:  # "a", "b", etc.
+            step_number = num3
+            indent_level = 1
+
+        step = self.create_checklist_step(instruction, action, indent_level, step_number)
+        self.add_step_to_checklist(step, indent_level)
+
+        logger.debug("Found step: %s - %s at line %d", step_number, instruction, token.line_number)
+        return True
+
+    def process_unnumbered_step(self, token: 'Token') -> bool:
+        """Process an unnumbered checklist step. Returns True if a step was processed."""
+        if not self.current_checklist:
+            return False
+        indent, content, action = token.groups
+
+        # Calculate indent level (2 spaces = 1 level)
+        indent_level = len(indent) // 2
+
+        # Split content into instruction and action
+        instruction = content.strip()
+        action = action.strip() if action else ""
+
+        # Remove dots from action text
+        if action:
+            action = re.sub(r'\.+', '', action).strip()
+
+        step = self.create_checklist_step(instruction, action, indent_level)
+        self.add_step_to_checklist(step, indent_level)
+
+        logger.debug("Found unnumbered step: %s at line %d", instruction, token.line_number)
+        return True
+
+    def process_token(self, token: 'Token') -> Optional[str]:
+        """Process the token of one line. Returns its kind, None if it was ignored."""
+        handler = self.handlers.get(token.kind)
+        kind = token.kind if handler and handler(token) else None
+
+        if self.trace is not None:
+            title = self.current_checklist.title if self.current_checklist else None
+            self.trace.append((token.line_number, kind or 'ignored', title))
+        return kind
+
+    def dump_trace(self, file=None) -> None:
+        """Write the most recent traced lines, oldest first."""
+        if not self.trace:
+            return
+        file = file or sys.stderr
+        print(f"Last {len(self.trace)} lines processed:", file=file)
+        for line_number, kind, title in self.trace:
+            print(f"  line {line_number:5d} {kind:12s} {title or ''}", file=file)
+
+    def parse_lines(self, lines: List[str], first_line_number: int = 1) -> List[Checklist]:
+        """Parse the lines of a manual. Returns the checklists that have steps."""
+        from checklist_lexer import lex_lines
+
+        with self.profiler.phase('lex'):
+            tokens = lex_lines(lines, first_line_number, self.profiler)
+        return self.parse_tokens(tokens)
+
+    def parse_tokens(self, tokens: List['Token']) -> List[Checklist]:
+        """Parse the tokens of a manual. Returns the checklists that have steps."""
+        with self.profiler.phase('classify'):
+            token = None
+            try:
+                for token in tokens:
+                    self.line_count += 1
+
+                    # Skip empty lines
+                    if token.kind == 'blank':
+                        continue
+
+                    self.process_token(token)
+            except Exception:
+                flush_logging()
+                if self.trace is not None and token is not None:
+                    title = self.current_checklist.title if self.current_checklist else None
+                    self.trace.append((token.line_number, 'error', title))
+                self.dump_trace()
+                raise
+
+            # Add the last checklist
+            if self.current_checklist:
+                self.checklists.append(self.current_checklist)
+                self.current_checklist = None
+
+        self.profiler.count('lines', self.line_count)
+        self.profiler.count('checklists', len(self.checklists))
+
+        logger.info("\nProcessing complete:")
+        logger.info("Total lines processed: %d", self.line_count)
+        logger.info("Total checklists found: %d", len(self.checklists))
+
         # Filter out empty checklists and those without alert messages
         self.checklists = [c for c in self.checklists if c.steps]
-        
-        with open(output_path, 'w', encoding='utf-8') as json_file:
-            json.dump(dataclass_to_dict(self.checklists), json_file, indent=4)
+        return self.checklists
+
+    def parse_block(self, block: ChecklistBlock, tokens: Optional[List['Token']] = None) -> List[Checklist]:
+        """Parse one block of split_checklist_blocks, starting from its section and subsection."""
+        self.current_section = block.section
+        self.current_subsection = block.subsection
+        if tokens is None:
+            return self.parse_lines(block.lines, block.first_line)
+        return self.parse_tokens(tokens)
+
+    def to_dicts(self, schema: str = 'parser', aircraft: str = AIRCRAFT) -> Union[List[Dict], Dict]:
+        """Convert the parsed checklists to dictionaries for JSON serialization (jsonl is the parser schema)."""
+        if schema == 'app':
+            return to_app_schema(self.checklists, aircraft)
+        checklists = [asdict(checklist) for checklist in self.checklists]
+        if schema == 'compact':
+            from compact_checklists import to_compact
+            return to_compact(checklists)
+        return checklists
+
+    def write_json(self, output_path: str, schema: str = 'parser', aircraft: str = AIRCRAFT) -> None:
+        """Write the parsed checklists to a JSON file, or to the aircraft of a checklist store for jsonl."""
+        with self.profiler.phase('serialize'):
+            if schema == 'jsonl':
+                from checklist_store import write_store
+                write_store(output_path, aircraft, self.to_dicts('parser'))
+                return
+            with open(output_path, 'w', encoding='utf-8') as json_file:
+                dump_json(self.to_dicts(schema, aircraft), json_file, schema)
+
+    def parse_checklist(self, file_path: str, output_path: str, schema: str = 'parser',
+                        aircraft: str = AIRCRAFT, jobs: int = 1) -> None:
+        """
+        Parse the checklist file and generate a JSON output. With jobs > 1 the file
+        is parsed in parallel, unless a trace is kept: it needs the lines in order.
+        The checklists of a file that was parsed before come from the artifact cache.
+        """
+        from artifact_cache import ArtifactCache
+        from checklist_lexer import LEXER_VERSION, tokenize_data
+
+        logger.info("Opening input file: %s", file_path)
+
+        with self.profiler.phase('read'):
+            with open(file_path, 'rb') as f:
+                data = f.read()
+        # The trace comes from parsing, so traced runs always parse
+        cache = ArtifactCache('checklists', PARSER_VERSION, self.cache_dir if self.trace is None else None,
+                              sources=(__name__, 'checklist_lexer'))
+        key = cache.key(data, str(LEXER_VERSION))
+        cached = cache.get(key)
+
+        if cached is not None:
+            self.checklists = [checklist_from_dict(checklist) for checklist in cached]
+            self.profiler.count('checklists', len(self.checklists))
+            logger.info("Unchanged input, %d checklists read from the cache (--no-cache for the parsing diagnostics)",
+                        len(self.checklists))
+        elif jobs > 1 and self.trace is None:
+            lines = io.StringIO(data.decode('utf-8'), newline=None).readlines()
+            with self.profiler.phase('parse_parallel'):
+                self.checklists = parse_parallel(lines, jobs)
+            self.line_count = len(lines)
+            self.profiler.count('lines', self.line_count)
+            self.profiler.count('checklists', len(self.checklists))
+            logger.info("Parsed %d lines in parallel with %d processes, %d checklists found",
+                        self.line_count, jobs, len(self.checklists))
+        else:
+            self.parse_tokens(tokenize_data(data, self.cache_dir, self.profiler))
+        if cached is None and cache.enabled:
+            cache.put(key, [asdict(checklist) for checklist in self.checklists])
+        cache.report(self.profiler)
+
+        logger.info("Writing output to: %s", output_path)
+        flush_logging()
+
+        self.write_json(output_path, schema, aircraft)
 
 def main():
+    from checklist_store import STORE_FILE
+
     # Set up argument parser
     parser = argparse.ArgumentParser(description='Extract checklists from SR22T-Checklists.txt and generate a JSON file.')
     parser.add_argument('-v', '--verbose', action='store_true', help='Enable verbose output', default=True)
+    parser.add_argument('-q', '--quiet', dest='verbose', action='store_false', help='Disable verbose output')
+    parser.add_argument('--trace', type=int, default=0, metavar='N',
+                        help='Keep the classification of the last N lines and print them if parsing fails')
     parser.add_argument('-i', '--input', help='Input file path (default: SR22T-Checklists.txt)')
     parser.add_argument('-o', '--output', help='Output file path (default: SR22TG6-Checklists.json)')
+    parser.add_argument('--schema', choices=SCHEMAS, default='parser',
+                        help='Output schema: parser (snake_case, decoded by the app), app (camelCase with stable ids) '
+                             'or compact (shared strings and steps), or jsonl to replace the checklists of the aircraft '
+                             f'in a checklist store (default output: {STORE_FILE})')
+    parser.add_argument('--aircraft', default=AIRCRAFT,
+                        help=f'Aircraft name for the ids of the app schema and the checklist store (default: {AIRCRAFT})')
+    parser.add_argument('--no-cache', action='store_true', help='Parse the input without using the artifact cache')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Parse the manual in parallel with this many processes, 0 for the number of CPUs (default: 1)')
+    add_profile_arguments(parser)
     
     args = parser.parse_args()
     
@@ -325,7 +604,7 @@ def main():
     
     # Use command line arguments or defaults
     input_file = args.input or INPUT_FILE
-    output_file = args.output or OUTPUT_FILE
+    output_file = args.output or (STORE_FILE if args.schema == 'jsonl' else OUTPUT_FILE)
     
     # Construct full paths
     input_path = os.path.join(script_dir, input_file)
@@ -336,10 +615,16 @@ def main():
         print(f"Error: Input file '{input_file}' not found in {script_dir}")
         return
     
+    configure_logging(args.verbose)
     try:
         print(f"Processing {input_file}...")
-        parser = ChecklistParser(verbose=args.verbose)
-        parser.parse_checklist(input_path, output_path)
+        def run(profiler):
+            from artifact_cache import CACHE_DIR
+            parser = ChecklistParser(profiler=profiler, trace_size=args.trace,
+                                     cache_dir=None if args.no_cache else CACHE_DIR)
+            parser.parse_checklist(input_path, output_path, args.schema, args.aircraft,
+                                   jobs=args.jobs or os.cpu_count() or 1)
+        run_profiled('extract_checklists', args, run)
         print(f"Successfully generated {output_file}")
     except Exception as e:
         print(f"Error processing file: {str(e)}")
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Differential fuzzing of the checklist parser engines.
+
+Random checklist manuals are generated from the grammar documented in
+extract_checklists.py, either as well structured manuals (synthetic_manuals.py)
+or as arbitrary sequences of grammar lines (headers, items at any level,
+unnumbered comments, CAS messages, PFD alerts, blank lines) which exercise the
+parser state machine in unusual orders. Each input is parsed by the reference
+engine, the frozen line by line parser of reference_parser.py, and by every
+other engine, the live ChecklistParser included, and the resulting JSON trees
+must be identical. The reference output is also checked for a few properties
+that hold for any input.
+
+When engines disagree, the input is shrunk by removing lines (delta debugging)
+while the disagreement remains, and the minimal input is reported and saved.
+
+An engine is a function taking the manual text and returning the list of
+checklist dictionaries as written in the JSON file. Other implementations can be
+tested without registering them with --engine module:function.
+
+Usage:
+    python fuzz_checklist_parser.py                        # all registered engines
+    python fuzz_checklist_parser.py -n 2000 --seed 42
+    python fuzz_checklist_parser.py --engine my_parser:parse_text
+"""
+
+import argparse
+import importlib
+import json
+import os
+import random
+import sys
+import tempfile
+from dataclasses import asdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from checklist_lexer import tokenize_file
+from extract_checklists import ChecklistParser, parse_parallel, split_checklist_blocks
+from reference_parser import parse_text as reference_engine
+from synthetic_manuals import ACTIONS, CAS_TYPES, CONDITIONS, FAULTS, NOUNS, OBJECTS, SECTIONS, SYSTEMS, \
+    generate_checklist_manual
+
+Engine = Callable[[str], List[Dict]]
+
+def memory_engine(text: str) -> List[Dict]:
+    """ChecklistParser run in memory."""
+    parser = ChecklistParser()
+    parser.parse_lines(text.splitlines(keepends=True))
+    return parser.to_dicts()
+
+def file_engine(text: str) -> List[Dict]:
+    """ChecklistParser run as the command line does, through files on disk."""
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, "manual.txt")
+        output_path = os.path.join(directory, "manual.json")
+        with open(input_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        ChecklistParser().parse_checklist(input_path, output_path)
+        with open(output_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+def blocks_engine(text: str) -> List[Dict]:
+    """ChecklistParser run on each checklist block on its own, as the watch mode does."""
+    checklists = []
+    for block in split_checklist_blocks(text.splitlines(keepends=True)):
+        checklists.extend(ChecklistParser().parse_block(block))
+    return [asdict(checklist) for checklist in checklists]
+
+def cached_tokens_engine(text: str) -> List[Dict]:
+    """ChecklistParser run on the tokens read back from the artifact cache."""
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, "manual.txt")
+        cache_dir = os.path.join(directory, "cache")
+        with open(input_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        tokenize_file(input_path, cache_dir)
+        parser = ChecklistParser()
+        parser.parse_tokens(tokenize_file(input_path, cache_dir))
+        return parser.to_dicts()
+
+def cached_checklists_engine(text: str) -> List[Dict]:
+    """ChecklistParser.parse_checklist run twice, the second time reading the checklists back from the artifact cache."""
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, "manual.txt")
+        output_path = os.path.join(directory, "manual.json")
+        cache_dir = os.path.join(directory, "cache")
+        with open(input_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        ChecklistParser(cache_dir=cache_dir).parse_checklist(input_path, output_path)
+        ChecklistParser(cache_dir=cache_dir).parse_checklist(input_path, output_path)
+        with open(output_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+def parallel_engine(text: str) -> List[Dict]:
+    """parse_parallel with two processes and a chunk per checklist, to cut at every boundary."""
+    lines = text.splitlines(keepends=True)
+    return [asdict(checklist) for checklist in parse_parallel(lines, jobs=2, chunks=len(lines))]
+
+ENGINES: Dict[str, Engine] = {
+    'memory': memory_engine,
+    'file': file_engine,
+    'blocks': blocks_engine,
+    'tokens': cached_tokens_engine,
+    'cached': cached_checklists_engine,
+    'parallel': parallel_engine,
+}
+
+def load_engine(spec: str) -> Engine:
+    """Load an engine from a registered name or a module:function specification."""
+    if spec in ENGINES:
+        return ENGINES[spec]
+    module_name, _, function_name = spec.partition(':')
+    if not function_name:
+        raise ValueError(f"Unknown engine '{spec}', expected one of {', '.join(ENGINES)} or module:function")
+    return getattr(importlib.import_module(module_name), function_name)
+
+def random_grammar_line(rng: random.Random) -> str:
+    """One line of any kind the grammar allows, in no particular context."""
+    roll = rng.random()
+    noun = rng.choice(NOUNS)
+    if roll < 0.04:
+        return f"#{rng.choice(SECTIONS)}"
+    if roll < 0.08:
+        return f"##{noun} Procedures"
+    if roll < 0.18:
+        return f"###{noun} {rng.choice(FAULTS).capitalize()} {rng.randint(1, 20)}"
+    if roll < 0.24:
+        message = f"{rng.choice(SYSTEMS)} {rng.randint(1, 3)}"
+        return f"{message} {rng.choice(CAS_TYPES)}" if rng.random() < 0.5 else message
+    if roll < 0.28:
+        quote_open, quote_close = rng.choice([('"', '"'), ('“', '”')])
+        return f"PFD Alerts Window: {quote_open}{noun} {rng.choice(FAULTS).lower()}{quote_close}"
+    if roll < 0.34:
+        return ""
+    if roll < 0.42:
+        indent = " " * rng.choice([0, 0, 2, 4, 5])
+        return f"{indent}{rng.choice(CONDITIONS)} {rng.choice(OBJECTS)}"
+    number = rng.choice([f"{rng.randint(1, 12)}.", f"{rng.choice('abcdefg')}.", f"({rng.randint(1, 6)})"])
+    indent = " " * rng.choice([0, 0, 0, 2, 4])
+    if rng.random() < 0.7:
+        dots = "." * rng.randint(1, 30)
+        return f"{indent}{number} {noun} {dots} {rng.choice(ACTIONS)}"
+    return f"{indent}{number} {rng.choice(CONDITIONS)} {rng.choice(OBJECTS)}."
+
+def random_manual(rng: random.Random) -> str:
+    """A random manual: either well structured or a random sequence of grammar lines."""
+    if rng.random() < 0.5:
+        return generate_checklist_manual(rng.randint(1, 12), rng.randint(1, 3), rng.randrange(1 << 30),
+                                         cas_ratio=rng.random())
+    return "\n".join(random_grammar_line(rng) for _ in range(rng.randint(1, 60))) + "\n"
+
+def run_engine(engine: Engine, text: str) -> Tuple[Optional[List[Dict]], Optional[str]]:
+    """Return the engine output, or the exception it raised described as a string."""
+    try:
+        return engine(text), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+def first_difference(expected, actual, path: str = "") -> Optional[str]:
+    """Describe the first place where two JSON trees differ, None if they are equal."""
+    if type(expected) != type(actual):
+        return f"{path or '/'}: {expected!r} != {actual!r}"
+    if isinstance(expected, dict):
+        for key in sorted(set(expected) | set(actual)):
+            if key not in expected or key not in actual:
+                return f"{path}/{key}: only in {'reference' if key in expected else 'engine'}"
+            difference = first_difference(expected[key], actual[key], f"{path}/{key}")
+            if difference:
+                return difference
+        return None
+    if isinstance(expected, list):
+        for index, (e, a) in enumerate(zip(expected, actual)):
+            difference = first_difference(e, a, f"{path}[{index}]")
+            if difference:
+                return difference
+        if len(expected) != len(actual):
+            return f"{path or '/'}: {len(expected)} items != {len(actual)} items"
+        return None
+    return None if expected == actual else f"{path or '/'}: {expected!r} != {actual!r}"
+
+def disagreement(reference: Engine, engine: Engine, text: str) -> Optional[str]:
+    """Describe how the engine disagrees with the reference on text, None if they agree."""
+    expected, expected_error = run_engine(reference, text)
+    actual, actual_error = run_engine(engine, text)
+    if expected_error or actual_error:
+        if expected_error and actual_error and expected_error.split(':')[0] == actual_error.split(':')[0]:
+            return None
+        return f"reference: {expected_error or 'ok'}, engine: {actual_error or 'ok'}"
+    return first_difference(expected, actual)
+
+def check_properties(text: str, checklists: List[Dict]) -> List[str]:
+    """Properties the reference output must have for any input."""
+    problems = []
+    titles = {line.rstrip()[3:].strip() for line in text.splitlines() if line.startswith('###')}
+
+    def check_steps(steps: List[Dict], parent_level: int, title: str):
+        for step in steps:
+            if step['indent_level'] <= parent_level:
+                problems.append(f"'{title}': step '{step['instruction']}' is not indented below its parent")
+            if step['instruction'] not in text:
+                problems.append(f"'{title}': step '{step['instruction']}' does not appear in the input")
+            check_steps(step['sub_steps'], step['indent_level'], title)
+
+    for checklist in checklists:
+        if checklist['title'] not in titles:
+            problems.append(f"checklist '{checklist['title']}' has no ### line in the input")
+        if not checklist['steps']:
+            problems.append(f"checklist '{checklist['title']}' has no steps")
+        check_steps(checklist['steps'], -1, checklist['title'])
+    return problems
+
+def shrink(lines: List[str], fails: Callable[[List[str]], bool]) -> List[str]:
+    """Reduce lines to a smaller list that still fails (ddmin delta debugging)."""
+    granularity = 2
+    while len(lines) >= 2:
+        chunk = max(1, len(lines) // granularity)
+        reduced = False
+        for start in range(0, len(lines), chunk):
+            candidate = lines[:start] + lines[start + chunk:]
+            if candidate and fails(candidate):
+                lines = candidate
+                granularity = max(granularity - 1, 2)
+                reduced = True
+                break
+        if not reduced:
+            if chunk == 1:
+                break
+            granularity = min(granularity * 2, len(lines))
+    return lines
+
+def fuzz(engines: Dict[str, Engine], iterations: int, seed: int,
+         failures_dir: Optional[str] = None, verbose: bool = False) -> int:
+    """Run the fuzzing loop. Returns the number of failing inputs."""
+    rng = random.Random(seed)
+    failures = 0
+    for iteration in range(iterations):
+        text = random_manual(rng)
+        problems = []
+
+        expected, error = run_engine(reference_engine, text)
+        if expected is not None:
+            problems.extend(f"property: {p}" for p in check_properties(text, expected))
+
+        failing_engine = None
+        for name, engine in engines.items():
+            difference = disagreement(reference_engine, engine, text)
+            if difference:
+                problems.append(f"{name}: {difference}")
+                failing_engine = engine
+                break
+
+        if not problems:
+            if verbose:
+                print(f"iteration {iteration}: ok ({len(text.splitlines())} lines)")
+            continue
+
+        failures += 1
+        lines = text.splitlines()
+        if failing_engine:
+            lines = shrink(lines, lambda candidate: disagreement(
+                reference_engine, failing_engine, "\n".join(candidate) + "\n") is not None)
+            minimal_text = "\n".join(lines) + "\n"
+            problems.append(f"on minimal input: {disagreement(reference_engine, failing_engine, minimal_text)}")
+        else:
+            def violates(candidate: List[str]) -> bool:
+                candidate_text = "\n".join(candidate) + "\n"
+                output, _ = run_engine(reference_engine, candidate_text)
+                return output is not None and bool(check_properties(candidate_text, output))
+            lines = shrink(lines, violates)
+
+        print(f"\n✗ iteration {iteration} (seed {seed}):")
+        for problem in problems:
+            print(f"  {problem}")
+        print(f"  minimal input ({len(lines)} lines):")
+        for line in lines:
+            print(f"    |{line}")
+        if failures_dir:
+            os.makedirs(failures_dir, exist_ok=True)
+            path = os.path.join(failures_dir, f"failure-{seed}-{iteration}.txt")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+            print(f"  saved to {path}")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that checklist parser engines produce identical JSON on random manuals.')
+    parser.add_argument('-n', '--iterations', type=int, default=500, help='Number of random manuals (default: 500)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--engine', action='append',
+                        help=f'Engine to compare with the reference, registered ({", ".join(ENGINES)}) or '
+                             f'module:function. Can be repeated (default: all registered engines)')
+    parser.add_argument('--failures', metavar='DIR', help='Save the shrunk failing inputs in this directory')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Report every iteration')
+
+    args = parser.parse_args()
+
+    try:
+        engines = {spec: load_engine(spec) for spec in args.engine} if args.engine else dict(ENGINES)
+    except (ValueError, ImportError, AttributeError) as e:
+        print(f"Error: {str(e)}")
+        sys.exit(2)
+
+    failures = fuzz(engines, args.iterations, args.seed, args.failures, args.verbose)
+    print(f"\n{args.iterations - failures}/{args.iterations} inputs agree across "
+          f"reference and {', '.join(engines)}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
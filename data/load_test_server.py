@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Load test of alerts_server.py with a fleet of simulated app clients.
+
+Each client polls for alert updates over its own keep-alive connection, the way
+the app would with a given strategy:
+
+ - full: plain GET of the alerts file every time, as the app does today
+ - gzip: GET with Accept-Encoding: gzip
+ - conditional: GET with Accept-Encoding: gzip and If-None-Match with the last ETag
+ - version: conditional GET of /version, then of the alerts file only when the version changed
+
+For each strategy the requests per second, the status codes and the bytes
+transferred (status line, headers and body) are reported.
+
+By default the server is started in process on a free port and serves the data
+directory; --url tests a running server instead.
+
+Usage:
+    python load_test_server.py
+    python load_test_server.py --clients 100 --polls 50 --modes full,conditional
+    python load_test_server.py --url http://localhost:8000
+"""
+
+import argparse
+import http.client
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+from alerts_server import ALERTS_FILE, make_server
+
+MODES = ['full', 'gzip', 'conditional', 'version']
+
+class ClientStats:
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+        self.statuses: Counter = Counter()
+
+    def add(self, other: 'ClientStats') -> None:
+        self.requests += other.requests
+        self.bytes += other.bytes
+        self.statuses.update(other.statuses)
+
+def request(connection: http.client.HTTPConnection, path: str, headers: Dict[str, str],
+            stats: ClientStats) -> http.client.HTTPResponse:
+    connection.request('GET', path, headers=headers)
+    response = connection.getresponse()
+    body = response.read()
+    header_bytes = len(f"HTTP/1.1 {response.status} {response.reason}\r\n") + 2
+    header_bytes += sum(len(f"{key}: {value}\r\n") for key, value in response.getheaders())
+    stats.requests += 1
+    stats.bytes += header_bytes + len(body)
+    stats.statuses[response.status] += 1
+    return response
+
+def run_client(host: str, port: int, prefix: str, mode: str, polls: int) -> ClientStats:
+    """Poll for updates `polls` times with one strategy."""
+    stats = ClientStats()
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    alerts_path = f"{prefix}/latest/{ALERTS_FILE}"
+    etags: Dict[str, str] = {}
+    try:
+        for _ in range(polls):
+            headers = {} if mode == 'full' else {'Accept-Encoding': 'gzip'}
+            if mode in ('conditional', 'version'):
+                if mode == 'version':
+                    version_headers = dict(headers)
+                    if 'version' in etags:
+                        version_headers['If-None-Match'] = etags['version']
+                    response = request(connection, f"{prefix}/version", version_headers, stats)
+                    if response.status == 304:
+                        continue
+                    etags['version'] = response.getheader('ETag')
+                if 'alerts' in etags:
+                    headers['If-None-Match'] = etags['alerts']
+            response = request(connection, alerts_path, headers, stats)
+            if response.getheader('ETag'):
+                etags['alerts'] = response.getheader('ETag')
+    finally:
+        connection.close()
+    return stats
+
+def run_fleet(host: str, port: int, prefix: str, mode: str, clients: int, polls: int) -> Dict:
+    results: List[Optional[ClientStats]] = [None] * clients
+
+    def client(index: int):
+        results[index] = run_client(host, port, prefix, mode, polls)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    total = ClientStats()
+    for stats in results:
+        if stats:
+            total.add(stats)
+    return {
+        'mode': mode,
+        'requests': total.requests,
+        'seconds': elapsed,
+        'requests_per_second': total.requests / elapsed if elapsed > 0 else 0,
+        'bytes': total.bytes,
+        'bytes_per_poll': total.bytes / (clients * polls),
+        'statuses': dict(total.statuses),
+    }
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description='Load test the alerts server with simulated clients.')
+    parser.add_argument('--url', help='Base URL of a running server (default: start one on the data directory)')
+    parser.add_argument('-d', '--directory', default=script_dir, help='Directory served by the in process server')
+    parser.add_argument('-c', '--clients', type=int, default=20, help='Number of simulated clients (default: 20)')
+    parser.add_argument('-n', '--polls', type=int, default=25, help='Update checks per client (default: 25)')
+    parser.add_argument('--modes', default=','.join(MODES), help=f'Comma separated strategies (default: {",".join(MODES)})')
+
+    args = parser.parse_args()
+    modes = [m for m in args.modes.split(',') if m]
+    for mode in modes:
+        if mode not in MODES:
+            parser.error(f"unknown mode '{mode}', expected one of {', '.join(MODES)}")
+
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port, prefix = url.hostname, url.port or 80, url.path.rstrip('/')
+    else:
+        server = make_server(args.directory, 'localhost', 0)
+        host, port = server.server_address[:2]
+        prefix = ''
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        print(f"{args.clients} clients x {args.polls} update checks against http://{host}:{port}{prefix}\n")
+        print(f"{'mode':12s} {'requests':>9s} {'req/s':>9s} {'bytes':>12s} {'bytes/check':>12s}  statuses")
+        for mode in modes:
+            result = run_fleet(host, port, prefix, mode, args.clients, args.polls)
+            statuses = ', '.join(f"{status}: {count}" for status, count in sorted(result['statuses'].items()))
+            print(f"{mode:12s} {result['requests']:9d} {result['requests_per_second']:9.0f} "
+                  f"{result['bytes']:12d} {result['bytes_per_poll']:12.0f}  {statuses}")
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == "__main__":
+    main()
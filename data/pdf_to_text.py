@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Convert a checklist manual PDF to the text grammar read by extract_checklists.py.
+
+The structure of the manual is recovered from the layout of each page rather
+than from the raw text order:
+
+ - the section tab printed at the top of the page (NORMAL, ABNORMAL, EMERGENCY)
+   becomes a #SECTION line when it changes
+ - bold text in the sub section size (14pt) becomes a ##subsection line
+ - bold text in the checklist title size (12pt) becomes a ###checklist line
+ - other lines are kept as they are, top to bottom, so items, CAS messages and
+   comments are classified by extract_checklists.py as usual
+ - running headers, footers, side tabs and table of contents pages are dropped,
+   and lines indented under the previous line (wrapped items) are merged into it
+
+Pages are extracted in parallel worker processes. The layout of each extracted
+page is kept in the artifact cache (artifact_cache.py) under the hash of the page
+content stream and of the fonts and XObjects it uses, so when a new revision of
+the manual lands only the pages that changed are extracted again.
+
+The output is a starting point to review against the PDF: it is written next to
+the PDF as <name>.extracted.txt by default so it does not overwrite the hand
+edited S22TG6-Checklists.txt.
+
+Requires pypdf, and cryptography for encrypted manuals like the SR22T one.
+
+Usage:
+    python pdf_to_text.py                                   # S22TG6-Checklists.pdf
+    python pdf_to_text.py manual.pdf -o manual.txt -j 4
+    python pdf_to_text.py manual.pdf --json manual.json     # also run extract_checklists
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+
+from artifact_cache import CACHE_DIR, ArtifactCache
+from profiling import NULL_PROFILER, add_profile_arguments, run_profiled
+
+INPUT_FILE = "S22TG6-Checklists.pdf"
+# Bump when the page extraction changes, so cached pages are extracted again
+EXTRACTOR_VERSION = 1
+
+ITEM_PATTERN = re.compile(r'^(\d+\.|[a-z]\.|\(\d+\))\s')
+CAS_PATTERN = re.compile(r'\b(Warning|Caution|Advisory)\b')
+CONTINUED_PATTERN = re.compile(r'^\(Continued( on (next|following) page)?\)$', re.IGNORECASE)
+
+@dataclass
+class PageLayout:
+    """Where things are on a manual page, in PDF points from the bottom left corner."""
+    subsection_size: float = 14.0
+    checklist_size: float = 12.0
+    tab_top: float = 695.0        # bold text above this is the section tab
+    header_top: float = 660.0     # other text above this is the running header
+    footer_bottom: float = 125.0  # text below this is the footer
+    right_margin: float = 480.0   # text right of this is a side tab
+    line_tolerance: float = 3.0   # runs whose baselines are closer than this are on the same line
+    indent: float = 5.0           # a line starting this much right of the previous one continues it
+
+def open_pdf(path: str, password: str = ""):
+    """Open a PDF with pypdf, decrypting it if needed."""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise RuntimeError("pypdf is required to read PDF manuals, install it with: pip install pypdf cryptography")
+    # pypdf logs a warning for every font it cannot fully decode, which is noise here
+    logging.getLogger("pypdf").setLevel(logging.ERROR)
+    reader = PdfReader(path)
+    if reader.is_encrypted:
+        reader.decrypt(password)
+    return reader
+
+def hash_pdf_object(digest, obj, seen: set) -> None:
+    """
+    Feed a PDF object and everything it references to a hash: dictionaries by
+    sorted key, arrays in order, streams with their data. Each indirect object
+    is followed once, which also stops at reference cycles. The data of images
+    is left out, it has no text.
+    """
+    if hasattr(obj, 'idnum'):
+        reference = (obj.idnum, obj.generation)
+        digest.update(f"R{reference}".encode('utf-8'))
+        if reference in seen:
+            return
+        seen.add(reference)
+        obj = obj.get_object()
+    if isinstance(obj, dict):
+        digest.update(b"<<")
+        for key in sorted(obj):
+            if key == '/Parent':
+                continue  # the page tree, not what the page draws
+            digest.update(str(key).encode('utf-8'))
+            hash_pdf_object(digest, obj.raw_get(key) if hasattr(obj, 'raw_get') else obj[key], seen)
+        digest.update(b">>")
+        if hasattr(obj, 'get_data') and obj.get('/Subtype') != '/Image':
+            try:
+                digest.update(obj.get_data())
+            except Exception:
+                # A filter pypdf can't decode: the encoded data changes with the stream all the same
+                digest.update(getattr(obj, '_data', b"") or b"")
+    elif isinstance(obj, list):
+        digest.update(b"[")
+        for item in obj:
+            hash_pdf_object(digest, item, seen)
+        digest.update(b"]")
+    else:
+        digest.update(repr(obj).encode('utf-8'))
+
+def page_hash(page, layout: PageLayout) -> str:
+    """
+    Hash of what determines the extracted text of a page: its content stream, the
+    resources it draws with (fonts, and form XObjects whose content is text of
+    the page too), and the layout.
+    """
+    digest = hashlib.sha256()
+    contents = page.get_contents()
+    digest.update(contents.get_data() if contents is not None else b"")
+    hash_pdf_object(digest, page.get('/Resources'), set())
+    digest.update(json.dumps(asdict(layout), sort_keys=True).encode('utf-8'))
+    digest.update(str(EXTRACTOR_VERSION).encode('utf-8'))
+    return digest.hexdigest()
+
+def extract_page(page, layout: PageLayout) -> Dict:
+    """Extract the lines of a page with their kind, and the section tab of the page."""
+    runs: List[Tuple[float, float, float, bool, bool, str]] = []
+
+    def visit(text, cm, tm, font, font_size):
+        if not text.strip():
+            return
+        # Position and size on the page: text matrix combined with the transformation matrix
+        a, b, c, d, e, f = tm
+        ca, cb, cc, cd, ce, cf = cm
+        x = e * ca + f * cc + ce
+        y = e * cb + f * cd + cf
+        horizontal, vertical = a * ca + b * cc, a * cb + b * cd
+        if abs(vertical) > abs(horizontal):
+            return  # rotated text, like the tab labels on the page edge
+        size = font_size * (horizontal ** 2 + vertical ** 2) ** 0.5
+        name = font.get('/BaseFont', '') if font else ''
+        runs.append((y, x, round(size, 1), 'Bold' in name, 'Oblique' in name or 'Italic' in name,
+                     text.replace('\n', '')))
+
+    page.extract_text(visitor_text=visit)
+
+    section = None
+    body = []
+    for y, x, size, bold, italic, text in runs:
+        if size < 1:
+            continue  # hidden text
+        if y >= layout.tab_top:
+            if bold and section is None:
+                section = text.strip()
+            continue
+        if y >= layout.header_top or y <= layout.footer_bottom or x >= layout.right_margin:
+            continue
+        body.append((y, x, size, bold, italic, text))
+
+    # Group runs into lines, top to bottom and left to right
+    lines: List[Dict] = []
+    current_y = None
+    for y, x, size, bold, italic, text in sorted(body, key=lambda run: (-run[0], run[1])):
+        if current_y is None or abs(y - current_y) > layout.line_tolerance:
+            kind = 'text'
+            if bold and abs(size - layout.subsection_size) < 0.5:
+                kind = 'subsection'
+            elif bold and abs(size - layout.checklist_size) < 0.5:
+                kind = 'checklist'
+            elif bold and italic and not CAS_PATTERN.search(text) and not text.rstrip().endswith(':'):
+                kind = 'variant'
+            lines.append({'kind': kind, 'x': round(x, 1), 'bold': bold, 'italic': italic, 'text': text})
+            current_y = y
+        else:
+            lines[-1]['text'] += text
+
+    for line in lines:
+        line['text'] = line['text'].strip()
+    lines = [line for line in lines if line['text']]
+    skip = any(line['kind'] == 'subsection' and line['text'] == 'Table of Contents' for line in lines)
+    return {'section': section, 'skip': skip, 'lines': lines}
+
+def extract_pages(pdf_path: str, password: str, indexes: List[int], layout: PageLayout) -> Dict[int, Dict]:
+    """Extract some pages of a PDF, run in a worker process."""
+    reader = open_pdf(pdf_path, password)
+    return {index: extract_page(reader.pages[index], layout) for index in indexes}
+
+def extract_manual(pdf_path: str, password: str = "", layout: Optional[PageLayout] = None,
+                   cache_dir: Optional[str] = None, jobs: Optional[int] = None,
+                   verbose: bool = False, profiler=NULL_PROFILER) -> List[Dict]:
+    """Return the extracted pages of a manual, extracting only the pages missing from the cache."""
+    layout = layout or PageLayout()
+    cache = ArtifactCache('pdf_pages', EXTRACTOR_VERSION, cache_dir, sources=(__name__,))
+
+    with profiler.phase('hash'):
+        reader = open_pdf(pdf_path, password)
+        keys = [page_hash(page, layout) for page in reader.pages]
+
+    pages: List[Optional[Dict]] = [cache.get(key) for key in keys]
+    missing = [index for index, page in enumerate(pages) if page is None]
+    if verbose:
+        print(f"{len(keys)} pages, {cache.stats.hits} cached, {len(missing)} to extract")
+
+    with profiler.phase('extract'):
+        workers = min(jobs or os.cpu_count() or 1, len(missing))
+        if workers <= 1:
+            extracted = {index: extract_page(reader.pages[index], layout) for index in missing}
+        else:
+            # Interleave the pages so the workers get a similar share of the dense ones
+            chunks = [missing[n::workers] for n in range(workers)]
+            extracted = {}
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for result in executor.map(extract_pages, [pdf_path] * workers, [password] * workers,
+                                           chunks, [layout] * workers):
+                    extracted.update(result)
+
+    for index, page in extracted.items():
+        pages[index] = page
+        cache.put(keys[index], page)
+
+    profiler.count('pages', len(keys))
+    profiler.count('pages.cached', cache.stats.hits)
+    profiler.count('pages.extracted', len(missing))
+    cache.report(profiler)
+    return pages
+
+def pages_to_lines(pages: List[Dict], layout: Optional[PageLayout] = None) -> List[str]:
+    """Turn extracted pages into lines of the checklist text grammar."""
+    layout = layout or PageLayout()
+    lines: List[str] = []
+    section = None
+    subsection = None  # sub section title, until a checklist title follows it
+    title = None       # current checklist title
+    last_kind = None
+    previous = None    # last body line of the current checklist, to merge wrapped lines into
+
+    for page in pages:
+        if page['skip']:
+            continue
+        if page['section'] and page['section'] != section:
+            section = page['section']
+            lines.extend(["", f"#{section.upper()}", ""])
+            title = subsection = last_kind = previous = None
+        for line in page['lines']:
+            kind = line['kind']
+            text = " ".join(line['text'].split())
+            if CONTINUED_PATTERN.match(text):
+                continue
+            if kind == 'subsection':
+                lines.extend(["", f"##{text}"])
+                subsection, title, previous = text, None, None
+            elif kind == 'checklist' and last_kind == 'checklist':
+                # Title wrapped over several lines
+                title = f"{title}{text}" if title.endswith('-') else f"{title} {text}"
+                lines[-1] = f"###{title}"
+            elif kind == 'checklist':
+                if text != title:  # otherwise the title is repeated on the page the checklist continues on
+                    lines.extend(["", f"###{text}"])
+                    title = text
+                subsection, previous = None, None
+            elif kind == 'variant' and title:
+                # Bold italic sub headings split a checklist in variants, like "On Ground" and "In-Flight"
+                lines.extend(["", f"###{title} {text}"])
+                previous = None
+            else:
+                if subsection:
+                    # Sub section without checklist titles: the sub section is the checklist
+                    lines.append(f"###{subsection}")
+                    title, subsection = subsection, None
+                if (previous is not None and not line['bold'] and not line['italic'] and not ITEM_PATTERN.match(text)
+                        and line['x'] > previous['x'] + layout.indent):
+                    lines[-1] = f"{lines[-1].rstrip()} {text}"
+                else:
+                    lines.append(text)
+                    previous = None if line['bold'] else line
+            last_kind = kind
+    return [line for n, line in enumerate(lines) if line or (n > 0 and lines[n - 1])]
+
+def write_text(lines: List[str], output_path: str) -> None:
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines).strip("\n") + "\n")
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description='Convert a checklist manual PDF to the text grammar of extract_checklists.py.')
+    parser.add_argument('pdf', nargs='?', default=os.path.join(script_dir, INPUT_FILE),
+                        help=f'Manual PDF (default: {INPUT_FILE})')
+    parser.add_argument('-o', '--output', help='Output text file (default: <pdf name>.extracted.txt)')
+    parser.add_argument('--json', metavar='PATH', help='Also parse the text with extract_checklists and write the JSON')
+    parser.add_argument('-j', '--jobs', type=int, help='Number of worker processes (default: number of CPUs)')
+    parser.add_argument('--password', default="", help='Password of an encrypted PDF (default: empty)')
+    parser.add_argument('--cache', default=CACHE_DIR,
+                        help='Directory of the artifact cache keeping the extracted pages (default: .artifact_cache)')
+    parser.add_argument('--no-cache', action='store_true', help='Extract every page without using the cache')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Show cache statistics')
+    add_profile_arguments(parser)
+
+    args = parser.parse_args()
+    output_path = args.output or os.path.splitext(args.pdf)[0] + ".extracted.txt"
+
+    def run(profiler):
+        pages = extract_manual(args.pdf, args.password, cache_dir=None if args.no_cache else args.cache,
+                               jobs=args.jobs, verbose=args.verbose, profiler=profiler)
+        with profiler.phase('assemble'):
+            lines = pages_to_lines(pages)
+        write_text(lines, output_path)
+        print(f"Wrote {len(lines)} lines to {output_path}")
+        if args.json:
+            from extract_checklists import ChecklistParser
+            checklist_parser = ChecklistParser(profiler=profiler)
+            checklist_parser.parse_lines([line + "\n" for line in lines])
+            with profiler.phase('serialize'):
+                checklist_parser.write_json(args.json)
+            print(f"Wrote {len(checklist_parser.checklists)} checklists to {args.json}")
+
+    try:
+        run_profiled('pdf_to_text', args, run)
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
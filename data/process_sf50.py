@@ -6,12 +6,17 @@ Extracts section, category, alert type, and message information from the summary
 
 import argparse
 import csv
+import io
+import json
 import os
 import re
+import sys
 import logging
 from dataclasses import dataclass
 from typing import List, Optional, Tuple, Dict
 
+from profiling import NULL_PROFILER, add_profile_arguments, run_profiled
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -19,6 +24,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Bump when load_cas_descriptions finds different descriptions in the same file, so cached ones are found again
+DESCRIPTIONS_VERSION = 1
+
 @dataclass
 class AlertEntry:
     """Represents a single alert entry with its properties."""
@@ -34,14 +42,73 @@ class AlertEntry:
         """Convert alert_type to lowercase after initialization."""
         self.alert_type = self.alert_type.lower()
 
+@dataclass
+class SectionRule:
+    """Category of situation alerts and priority of all alerts in the sections matching the rule."""
+    situation_category: str
+    priority: str
+    contains: Optional[str] = None
+    startswith: Optional[str] = None
+
+    def matches(self, section: str) -> bool:
+        """Whether the rule applies to a lowercased section name. A rule without condition always applies."""
+        if self.contains is not None and self.contains not in section:
+            return False
+        if self.startswith is not None and not section.startswith(self.startswith):
+            return False
+        return True
+
+class AlertRules:
+    """
+    Classification rules of the alerts of an aircraft, loaded from <aircraft>-AlertRules.json.
+
+    - cas_types: the alert types that can follow a CAS message and the category they give
+    - default_cas_category: the category of CAS messages without a type
+    - sections: the first rule matching the (lowercased) section name gives the
+      category of situation alerts and the priority of every alert of the section
+    """
+
+    def __init__(self, rules: Dict):
+        self.aircraft: str = rules['aircraft']
+        self.cas_categories: Dict[str, str] = rules['cas_types']
+        self.default_cas_category: str = rules['default_cas_category']
+        self.sections = [SectionRule(**rule) for rule in rules['sections']]
+
+        types = '|'.join(re.escape(cas_type) for cas_type in self.cas_categories)
+        self.cas_type_pattern = re.compile(f'({types})')
+        # Descriptions in the procedure files: a message line ending with its type
+        self.typed_message_pattern = re.compile(rf'^[A-Z0-9\s]+({types})$')
+        self.type_suffix_pattern = re.compile(rf'\s+({types})$')
+
+    def section_rule(self, section: str) -> SectionRule:
+        lowered = section.lower()
+        for rule in self.sections:
+            if rule.matches(lowered):
+                return rule
+        raise ValueError(f"No rule for section '{section}' in the {self.aircraft} alert rules")
+
+def load_rules(aircraft: str = "SF50", directory: Optional[str] = None) -> AlertRules:
+    """Load the alert rules of an aircraft from the data directory."""
+    directory = directory or os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(directory, f"{aircraft}-AlertRules.json"), 'r', encoding='utf-8') as f:
+        return AlertRules(json.load(f))
+
 class SF50Processor:
     """Processes SF50 summary text files into structured alert entries."""
     
-    def __init__(self, debug: bool = False):
+    def __init__(self, debug: bool = False, profiler=None, rules: Optional[AlertRules] = None,
+                 cache_dir: Optional[str] = None):
         self.current_section = None
+        # Category of situation alerts and priority of the current section, set at each Section header
+        self.section_category: Optional[str] = None
+        self.section_priority: Optional[str] = None
         self.entries: List[AlertEntry] = []
         self.cas_descriptions: Dict[str, str] = {}
         self.debug = debug
+        self.profiler = profiler or NULL_PROFILER
+        self.rules = rules or load_rules()
+        # Artifact cache of the descriptions of the procedure files, None to always read them
+        self.cache_dir = cache_dir
     
     def load_cas_descriptions(self, file_path: str) -> None:
         """Load CAS descriptions from emergency/abnormal file.
@@ -58,8 +125,30 @@ class SF50Processor:
         if self.debug:
             logger.info(f"\nProcessing file: {file_path}")
         
-        with open(file_path, 'r') as f:
-            lines = [line.strip() for line in f if line.strip() and line.strip() != "Procedure Complete"]  # Remove empty lines and "Procedure Complete"
+        with self.profiler.phase('read'):
+            with open(file_path, 'rb') as f:
+                data = f.read()
+        # Imported here so running --help doesn't load the cache
+        from artifact_cache import ArtifactCache
+
+        # The debug output comes from reading the descriptions, so debug runs always read them
+        cache = ArtifactCache('cas_descriptions', DESCRIPTIONS_VERSION, None if self.debug else self.cache_dir,
+                              sources=(__name__,))
+        key = cache.key(data, self.rules.typed_message_pattern.pattern)
+        descriptions = cache.get(key)
+        if descriptions is None:
+            text = io.StringIO(data.decode('utf-8'), newline=None)
+            lines = [line.strip() for line in text if line.strip() and line.strip() != "Procedure Complete"]  # Remove empty lines and "Procedure Complete"
+            self.profiler.count('description_lines', len(lines))
+            descriptions = self.parse_cas_descriptions(lines)
+            cache.put(key, descriptions)
+        self.cas_descriptions.update(descriptions)
+        cache.report(self.profiler)
+
+    def parse_cas_descriptions(self, lines: List[str]) -> Dict[str, str]:
+        """The CAS descriptions of the stripped lines of a procedure file, by message."""
+        descriptions: Dict[str, str] = {}
+        with self.profiler.phase('descriptions'):
             i = 0
             in_afcs_section = False
             previous_line = None
@@ -89,7 +178,7 @@ class SF50Processor:
                                 logger.info(f"Found AFCS description:")
                                 logger.info(f"  Message: {previous_line}")
                                 logger.info(f"  Description: {line}")
-                            self.cas_descriptions[previous_line] = line
+                            descriptions[previous_line] = line
                         i += 1
                         continue
                     previous_line = line
@@ -97,10 +186,10 @@ class SF50Processor:
                     # Normal CAS message processing
                     if i < len(lines) - 2:  # Need at least 3 lines for a complete entry
                         # Check if this is a CAS message line with type (uppercase + Caution/Advisory)
-                        if re.match(r'^[A-Z0-9\s]+(Caution|Advisory|Warning)$', line):
+                        if self.rules.typed_message_pattern.match(line):
                             message_with_type = lines[i]
                             # Extract just the message part (remove the type)
-                            message = re.sub(r'\s+(Caution|Advisory|Warning)$', '', message_with_type)
+                            message = self.rules.type_suffix_pattern.sub('', message_with_type)
                             
                             # Check if next line is just the message
                             if lines[i + 1] == message:
@@ -111,9 +200,10 @@ class SF50Processor:
                                         logger.info(f"Found CAS description:")
                                         logger.info(f"  Message: {message}")
                                         logger.info(f"  Description: {description}")
-                                    self.cas_descriptions[message] = description
+                                    descriptions[message] = description
                                 i += 2  # Skip the next two lines
                 i += 1
+        return descriptions
     
     def process_line(self, line: str) -> None:
         """Process a single line of the input file."""
@@ -125,6 +215,9 @@ class SF50Processor:
         if line.startswith("Section"):
             # Extract everything after the colon
             self.current_section = line.split(":", 1)[1].strip()
+            rule = self.rules.section_rule(self.current_section)
+            self.section_category = rule.situation_category
+            self.section_priority = rule.priority
             return
             
         # Skip if no section has been set
@@ -145,28 +238,17 @@ class SF50Processor:
     def _get_category(self, alert_type: str, is_situation: bool = False) -> str:
         """Determine the category based on alert type and section."""
         if is_situation:
-            return "emergency" if "emergency" in self.current_section.lower() else "abnormal"
-        else:
-            if alert_type == "Advisory":
-                return "normal"
-            elif alert_type == "Warning":
-                return "emergency"
-            elif alert_type == "Caution":
-                return "abnormal"
-            return "abnormal"
+            return self.section_category
+        return self.rules.cas_categories.get(alert_type, self.rules.default_cas_category)
     
     def _get_priority(self) -> str:
         """Determine the priority based on section type."""
-        if "emergency" in self.current_section.lower():
-            return "high"
-        if self.current_section.lower().startswith("normal"):
-            return "low"
-        return "medium"
+        return self.section_priority
     
     def _process_cas_alert(self, line: str) -> None:
         """Process a CAS type alert line."""
-        # Find the first occurrence of Caution/Advisory/Warning
-        type_match = re.search(r'(Caution|Advisory|Warning)', line)
+        # Find the first occurrence of an alert type (Caution/Advisory/Warning)
+        type_match = self.rules.cas_type_pattern.search(line)
         if type_match:
             # Split the line at the alert type
             type_start = type_match.start()
@@ -199,6 +281,7 @@ class SF50Processor:
             alert_type="cas",  # Still use lowercase 'cas' for the output
             priority=self._get_priority(),
             message=message,
+            aircraft_name=self.rules.aircraft,
             submessage=submessage
         ))
     
@@ -220,12 +303,13 @@ class SF50Processor:
             alert_type="situation",
             priority=self._get_priority(),
             message=message,
+            aircraft_name=self.rules.aircraft,
             submessage=submessage
         ))
     
     def write_csv(self, output_file: str) -> None:
         """Write processed entries to CSV file."""
-        with open(output_file, 'w', newline='') as f:
+        with self.profiler.phase('serialize'), open(output_file, 'w', newline='') as f:
             writer = csv.writer(f)
             writer.writerow(['category', 'alert_type', 'action', 'priority', 'aircraft_name', 'message', 'submessage'])
             for entry in self.entries:
@@ -239,20 +323,29 @@ class SF50Processor:
                     entry.submessage or ''
                 ])
 
-def process_file(input_file: str, emergency_file: str, abnormal_file: str, output_file: Optional[str] = None, debug: bool = False) -> None:
+def process_file(input_file: str, emergency_file: str, abnormal_file: str, output_file: Optional[str] = None, debug: bool = False,
+                 profiler=None, rules: Optional[AlertRules] = None, cache_dir: Optional[str] = None) -> None:
     """Process input file and write results to output file."""
     if output_file is None:
         output_file = os.path.splitext(input_file)[0] + '.csv'
     
-    processor = SF50Processor(debug=debug)
+    processor = SF50Processor(debug=debug, profiler=profiler, rules=rules, cache_dir=cache_dir)
     
     # Load descriptions from emergency and abnormal files
     processor.load_cas_descriptions(emergency_file)
     processor.load_cas_descriptions(abnormal_file)
     
-    with open(input_file, 'r') as f:
-        for line in f:
+    with processor.profiler.phase('read'):
+        with open(input_file, 'r') as f:
+            lines = f.readlines()
+
+    with processor.profiler.phase('classify'):
+        for line in lines:
             processor.process_line(line)
+
+    processor.profiler.count('lines', len(lines))
+    processor.profiler.count('alerts', len(processor.entries))
+    processor.profiler.count('descriptions', len(processor.cas_descriptions))
     
     processor.write_csv(output_file)
     print(f"Processed {len(processor.entries)} alerts. Output written to {output_file}")
@@ -283,9 +376,29 @@ def main():
         action='store_true',
         help='Enable debug logging'
     )
+    parser.add_argument(
+        '-a', '--aircraft',
+        default='SF50',
+        help='Aircraft whose <aircraft>-AlertRules.json classifies the alerts (default: SF50)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Read the procedure descriptions without using the artifact cache'
+    )
+    add_profile_arguments(parser)
     
     args = parser.parse_args()
-    process_file(args.input_file, args.emergency_file, args.abnormal_file, args.output, args.debug)
+    try:
+        rules = load_rules(args.aircraft)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: cannot load the {args.aircraft} alert rules: {str(e)}")
+        sys.exit(1)
+    from artifact_cache import CACHE_DIR
+    run_profiled('process_sf50', args,
+                 lambda profiler: process_file(args.input_file, args.emergency_file, args.abnormal_file,
+                                               args.output, args.debug, profiler, rules,
+                                               None if args.no_cache else CACHE_DIR))
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Opt-in timing instrumentation for the data tools.
+
+A Profiler records per-phase timings, counters (lines processed, regex matches,
+...) and the peak memory of the process, and writes them as JSON so runs can be
+compared when the manuals grow. Phases nest: the time of a phase excludes the
+time spent in phases entered while it was active, so the phases of a run add up
+to the total.
+
+When profiling is not requested the tools use NULL_PROFILER, whose methods do
+nothing, and the per-line instrumentation (pattern match counting, timed
+functions) is not installed at all, so it costs nothing.
+
+Profiling is enabled with the --profile flag of each tool or the ALERTSIM_PROFILE
+environment variable:
+
+    ALERTSIM_PROFILE=1               write <tool>.profile.json in the current directory
+    ALERTSIM_PROFILE=path.json       write to that file
+    ALERTSIM_PROFILE=some/directory  write <tool>.profile.json in that directory
+    ALERTSIM_CPROFILE=path.prof      also run the tool under cProfile (--cprofile)
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Pattern
+
+PROFILE_ENV = "ALERTSIM_PROFILE"
+CPROFILE_ENV = "ALERTSIM_CPROFILE"
+
+class CountingPattern:
+    """Wrap a compiled regex to count how many times it is tried and matches."""
+
+    def __init__(self, name: str, pattern: Pattern, profiler: 'Profiler'):
+        self.name = name
+        self.pattern = pattern
+        self.profiler = profiler
+
+    def _record(self, match):
+        counters = self.profiler.counters
+        key = f"regex.{self.name}"
+        counters[key + ".tried"] = counters.get(key + ".tried", 0) + 1
+        if match:
+            counters[key + ".matched"] = counters.get(key + ".matched", 0) + 1
+        return match
+
+    def match(self, *args, **kwargs):
+        return self._record(self.pattern.match(*args, **kwargs))
+
+    def search(self, *args, **kwargs):
+        return self._record(self.pattern.search(*args, **kwargs))
+
+    def fullmatch(self, *args, **kwargs):
+        return self._record(self.pattern.fullmatch(*args, **kwargs))
+
+    def __getattr__(self, attr):
+        return getattr(self.pattern, attr)
+
+class Profiler:
+    """Collect phase timings and counters for one run of a tool."""
+
+    enabled = True
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.phases: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self._stack: List[List[Any]] = []
+        self._start = time.perf_counter()
+
+    def _enter(self, name: str) -> None:
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def _exit(self) -> None:
+        name, start, nested = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed - nested
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as the phase `name`."""
+        self._enter(name)
+        try:
+            yield
+        finally:
+            self._exit()
+
+    def timed(self, name: str, func: Callable) -> Callable:
+        """Return func wrapped so each call is timed as the phase `name`."""
+        def wrapper(*args, **kwargs):
+            self._enter(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._exit()
+        return wrapper
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def count_patterns(self, patterns: Dict[str, Pattern]) -> Dict[str, Any]:
+        """Return a copy of a name -> compiled regex dict where each pattern counts its matches."""
+        return {name: CountingPattern(name, pattern, self) for name, pattern in patterns.items()}
+
+    def report(self) -> Dict[str, Any]:
+        total = time.perf_counter() - self._start
+        report = {
+            'tool': self.tool,
+            'total_seconds': round(total, 6),
+            'phases': {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            'counters': dict(sorted(self.counters.items())),
+            'peak_memory_bytes': peak_memory_bytes(),
+        }
+        lines = self.counters.get('lines')
+        if lines and total > 0:
+            report['lines_per_second'] = round(lines / total, 1)
+        return report
+
+    def write(self, path: str) -> None:
+        if os.path.isdir(path):
+            path = os.path.join(path, f"{self.tool}.profile.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=4)
+        print(f"Profile written to {path}", file=sys.stderr)
+
+class NullProfiler:
+    """Profiler that records nothing, used when profiling is disabled."""
+
+    enabled = False
+
+    @contextmanager
+    def phase(self, name: str):
+        yield
+
+    def timed(self, name: str, func: Callable) -> Callable:
+        return func
+
+    def count(self, name: str, n: int = 1) -> None:
+        pass
+
+    def count_patterns(self, patterns: Dict[str, Pattern]) -> Dict[str, Any]:
+        return patterns
+
+NULL_PROFILER = NullProfiler()
+
+def peak_memory_bytes() -> Optional[int]:
+    """Peak resident memory of the process, or None where it is not available."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the --profile and --cprofile options to a tool argument parser."""
+    parser.add_argument('--profile', nargs='?', const='.', metavar='PATH',
+                        help=f'Write phase timings as JSON to PATH (file or directory, default: '
+                             f'current directory). Also enabled by {PROFILE_ENV}')
+    parser.add_argument('--cprofile', metavar='PATH',
+                        help=f'Run under cProfile and write the stats to PATH. Also enabled by {CPROFILE_ENV}')
+
+def profile_path(args: Optional[argparse.Namespace] = None) -> Optional[str]:
+    """Where to write the profile report, from the command line or the environment."""
+    path = getattr(args, 'profile', None) or os.environ.get(PROFILE_ENV)
+    if not path or path.lower() in ('0', 'false', 'no'):
+        return None
+    if path.lower() in ('1', 'true', 'yes'):
+        return '.'
+    return path
+
+def profiler_for(tool: str, args: Optional[argparse.Namespace] = None):
+    """Return a Profiler if profiling was requested for this run, NULL_PROFILER otherwise."""
+    return Profiler(tool) if profile_path(args) else NULL_PROFILER
+
+def run_profiled(tool: str, args: Optional[argparse.Namespace], func: Callable[[Any], Any]) -> Any:
+    """Call func(profiler), then write the profile report and cProfile stats if requested."""
+    profiler = profiler_for(tool, args)
+    cprofile_path = getattr(args, 'cprofile', None) or os.environ.get(CPROFILE_ENV)
+
+    if cprofile_path:
+        import cProfile
+        stats = cProfile.Profile()
+        stats.enable()
+    try:
+        return func(profiler)
+    finally:
+        if cprofile_path:
+            stats.disable()
+            stats.dump_stats(cprofile_path)
+            print(f"cProfile stats written to {cprofile_path}", file=sys.stderr)
+        if profiler.enabled:
+            profiler.write(profile_path(args))
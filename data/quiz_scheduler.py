@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Spaced repetition of the knowledge questions of the quiz banks.
+
+AlertManager.drawKnowledgeQuestion picks a random section and three random
+questions of it, whatever was asked before. QuizScheduler keeps a review state
+per question instead, Leitner style:
+
+ - a question answered right moves up a box and is due again after
+   INTERVAL_DAYS of its box (1, 3, 7... days), one answered wrong goes back to
+   box 0 and is due again after RETRY_MINUTES
+ - every section keeps its questions in a heap ordered by due time, new
+   questions first in a random order, so a draw takes the section whose first
+   question is the most overdue and pops up to QUESTIONS_PER_DRAW questions of
+   it, in O(log n) per question
+ - the states are saved as one [box, due minute, reviews, lapses] array per
+   question key (a hash of aircraft, section and question), only for the
+   questions reviewed at least once
+
+The banks are S22TG6-Quiz.json (sections of questions) and sf50_memory_qa.json
+(memory items of every aircraft), and several can be scheduled together.
+
+simulate runs a study campaign of flights where, as in the app, an alert is
+drawn every interval and is a knowledge question with the knowledge question
+proportion. Recall follows a forgetting curve whose stability grows with every
+right answer, and the scheduler is compared with the random draws of the app
+for every proportion.
+
+Usage:
+    python quiz_scheduler.py                                   # simulate 90 days for several proportions
+    python quiz_scheduler.py --days 365 --flights-per-week 3 --proportion 0.1,0.3
+    python quiz_scheduler.py sf50_memory_qa.json --quiz --state sf50.schedule.json
+    python quiz_scheduler.py --stats --state sf50.schedule.json
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+QUIZ_FILE = "S22TG6-Quiz.json"
+FORMAT = "quiz-schedule"
+VERSION = 1
+
+# Questions of a knowledge question alert, as AlertManager.drawKnowledgeQuestion
+QUESTIONS_PER_DRAW = 3
+# Days until a question answered right is due again, by box (box 0 is a new or forgotten question)
+INTERVAL_DAYS = [0, 1, 3, 7, 14, 30, 60]
+# A question answered wrong comes back in the same flight
+RETRY_MINUTES = 10
+MASTERED_BOX = 4
+MINUTES_PER_DAY = 24 * 60
+
+# Average alert interval and flight duration in minutes, as alert_analytics.py
+INTERVAL = 10.0
+DURATION = 60.0
+PROPORTIONS = [0.05, 0.1, 0.2, 0.3]
+
+@dataclass
+class Question:
+    key: str
+    aircraft: str
+    section: str
+    question: str
+    answer: str
+
+def question_key(aircraft: str, section: str, question: str) -> str:
+    import hashlib
+    return hashlib.sha1(f"{aircraft}\0{section}\0{question}".encode('utf-8')).hexdigest()[:10]
+
+def load_bank(path: str) -> List[Question]:
+    """Questions of a quiz file: {'sections': ...} for one aircraft, or {'aircraft': {name: {'memory_items': ...}}}."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if 'sections' in data:
+        # The aircraft of S22TG6-Quiz.json is its file name
+        banks = {os.path.basename(path).split('-')[0]: data['sections']}
+    elif 'aircraft' in data:
+        banks = {name: aircraft.get('memory_items', {}) for name, aircraft in data['aircraft'].items()}
+    else:
+        raise ValueError(f"{path} has neither 'sections' nor 'aircraft'")
+    return [Question(question_key(aircraft, section, item['question']), aircraft, section,
+                     item['question'], item['answer'])
+            for aircraft, sections in banks.items()
+            for section, items in sections.items()
+            for item in items]
+
+@dataclass
+class ReviewState:
+    box: int = 0
+    due: float = 0.0  # in days
+    reviews: int = 0
+    lapses: int = 0
+
+class QuizScheduler:
+    """Review states of the questions, in one heap per section ordered by due time."""
+
+    def __init__(self, questions: List[Question], states: Optional[Dict[str, ReviewState]] = None,
+                 seed: Optional[int] = None):
+        self.questions = {question.key: question for question in questions}
+        self.states = {key: (states or {}).get(key) or ReviewState() for key in self.questions}
+        self.heaps: Dict[Tuple[str, str], List[Tuple[float, int, str]]] = {}
+        self.order = 0
+        # New questions share due time 0, the order of the heaps is shuffled once to draw them at random
+        keys = list(self.questions)
+        random.Random(seed).shuffle(keys)
+        for key in keys:
+            self.push(key)
+
+    def section(self, key: str) -> Tuple[str, str]:
+        question = self.questions[key]
+        return question.aircraft, question.section
+
+    def push(self, key: str) -> None:
+        self.order += 1
+        heapq.heappush(self.heaps.setdefault(self.section(key), []), (self.states[key].due, self.order, key))
+
+    def draw(self, count: int = QUESTIONS_PER_DRAW) -> List[Question]:
+        """
+        The first questions of the section whose next question is the most overdue.
+
+        The questions are taken out of the heap until they are reviewed, so every
+        drawn question must be passed to review to be asked again.
+        """
+        heaps = [heap for heap in self.heaps.values() if heap]
+        if not heaps:
+            return []
+        heap = min(heaps, key=lambda heap: heap[0][:2])
+        return [self.questions[heapq.heappop(heap)[2]] for _ in range(min(count, len(heap)))]
+
+    def review(self, key: str, correct: bool, now: float) -> None:
+        """Record an answer given at `now` (in days) and schedule the next review of the question."""
+        state = self.states[key]
+        state.reviews += 1
+        if correct:
+            state.box = min(state.box + 1, len(INTERVAL_DAYS) - 1)
+            state.due = now + INTERVAL_DAYS[state.box]
+        else:
+            state.box = 0
+            state.lapses += 1
+            state.due = now + RETRY_MINUTES / MINUTES_PER_DAY
+        self.push(key)
+
+    def due_count(self, now: float) -> int:
+        return sum(1 for state in self.states.values() if state.due <= now)
+
+    def box_counts(self) -> List[int]:
+        counts = [0] * len(INTERVAL_DAYS)
+        for state in self.states.values():
+            counts[state.box] += 1
+        return counts
+
+    def to_json(self) -> Dict:
+        """The states of the reviewed questions, with the due time in whole minutes."""
+        return {
+            'format': FORMAT,
+            'version': VERSION,
+            'states': {key: [state.box, math.ceil(state.due * MINUTES_PER_DAY), state.reviews, state.lapses]
+                       for key, state in self.states.items() if state.reviews},
+        }
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_json(), f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, questions: List[Question], path: str, seed: Optional[int] = None) -> 'QuizScheduler':
+        """The scheduler with the states saved in `path`, if it exists. Questions no longer in the banks are dropped."""
+        states = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if (not isinstance(data, dict) or data.get('format') != FORMAT or data.get('version') != VERSION
+                    or not isinstance(data.get('states'), dict)):
+                raise ValueError(f"{path} is not a {FORMAT} version {VERSION} file")
+            try:
+                states = {key: ReviewState(int(box), due / MINUTES_PER_DAY, int(reviews), int(lapses))
+                          for key, (box, due, reviews, lapses) in data['states'].items()}
+            except (TypeError, ValueError):
+                raise ValueError(f"{path} has an invalid review state") from None
+        return cls(questions, states, seed)
+
+class RandomDraw:
+    """The draws of AlertManager.drawKnowledgeQuestion: a random section, then random questions of it."""
+
+    def __init__(self, questions: List[Question], seed: Optional[int] = None):
+        self.sections: Dict[Tuple[str, str], List[Question]] = {}
+        for question in questions:
+            self.sections.setdefault((question.aircraft, question.section), []).append(question)
+        # The app skips sections with fewer questions than a draw
+        self.eligible = [questions for questions in self.sections.values() if len(questions) >= QUESTIONS_PER_DRAW]
+        self.random = random.Random(seed)
+
+    def draw(self, count: int = QUESTIONS_PER_DRAW) -> List[Question]:
+        if not self.eligible:
+            return []
+        return self.random.sample(self.random.choice(self.eligible), count)
+
+    def review(self, key: str, correct: bool, now: float) -> None:
+        pass
+
+# Recall model of the simulation: a question never seen is answered right with
+# INITIAL_RECALL, and once its answer was read the probability decays from 1
+# back to INITIAL_RECALL as exp(-elapsed / stability). Reading the answer of a
+# new question gives INITIAL_STABILITY (in days), a right answer multiplies the
+# stability by up to STABILITY_GROWTH, the more the less likely it was to be
+# recalled so a question asked again too early gains little, and a wrong answer
+# halves it.
+INITIAL_RECALL = 0.3
+INITIAL_STABILITY = 5.0
+STABILITY_GROWTH = 5.0
+RECALLED = 0.9
+
+@dataclass
+class Campaign:
+    days: int = 90
+    flights_per_week: float = 2.0
+    duration: float = DURATION
+    interval: float = INTERVAL
+    proportion: float = 0.1
+
+@dataclass
+class CampaignResult:
+    strategy: str
+    proportion: float
+    asked: int
+    coverage: float
+    recall: float
+    recalled: float
+
+class Memory:
+    """What a simulated pilot remembers of every question."""
+
+    def __init__(self, keys: List[str]):
+        self.stability = dict.fromkeys(keys, 0.0)
+        self.last_seen = dict.fromkeys(keys, 0.0)
+
+    def recall(self, key: str, now: float) -> float:
+        stability = self.stability[key]
+        if not stability:
+            return INITIAL_RECALL
+        return INITIAL_RECALL + (1 - INITIAL_RECALL) * math.exp(-(now - self.last_seen[key]) / stability)
+
+    def answer(self, key: str, now: float, rng: random.Random) -> bool:
+        recall = self.recall(key, now)
+        correct = rng.random() < recall
+        stability = self.stability[key]
+        if not stability:
+            self.stability[key] = INITIAL_STABILITY
+        elif correct:
+            self.stability[key] = stability * (1 + (STABILITY_GROWTH - 1) * (1 - recall))
+        else:
+            self.stability[key] = max(stability / 2, INITIAL_STABILITY)
+        self.last_seen[key] = now
+        return correct
+
+def simulate(questions: List[Question], campaign: Campaign, strategy: str = 'scheduled',
+             seed: Optional[int] = None) -> CampaignResult:
+    """Run a campaign of flights with the scheduler or the random draws of the app."""
+    rng = random.Random(seed)
+    draws = QuizScheduler(questions, seed=seed) if strategy == 'scheduled' else RandomDraw(questions, seed)
+    memory = Memory([question.key for question in questions])
+    flights = int(campaign.days * campaign.flights_per_week / 7)
+    alerts_per_flight = max(int(campaign.duration // campaign.interval), 0)
+    asked = 0
+    for flight in range(flights):
+        start = flight * 7 / campaign.flights_per_week
+        for alert in range(alerts_per_flight):
+            if rng.random() >= campaign.proportion:
+                continue
+            now = start + (alert + 1) * campaign.interval / MINUTES_PER_DAY
+            for question in draws.draw():
+                draws.review(question.key, memory.answer(question.key, now, rng), now)
+                asked += 1
+
+    end = campaign.days
+    recalls = [memory.recall(question.key, end) for question in questions]
+    return CampaignResult(
+        strategy=strategy,
+        proportion=campaign.proportion,
+        asked=asked,
+        coverage=sum(1 for stability in memory.stability.values() if stability) / len(questions),
+        recall=sum(recalls) / len(recalls),
+        recalled=sum(1 for recall in recalls if recall >= RECALLED) / len(recalls),
+    )
+
+def compare_proportions(questions: List[Question], campaign: Campaign, proportions: List[float],
+                        runs: int = 20, seed: int = 0) -> List[CampaignResult]:
+    """Average results of `runs` campaigns for every proportion and strategy."""
+    results = []
+    for proportion in proportions:
+        for strategy in ('random', 'scheduled'):
+            campaign.proportion = proportion
+            runs_results = [simulate(questions, campaign, strategy, seed + run) for run in range(runs)]
+            results.append(CampaignResult(
+                strategy=strategy,
+                proportion=proportion,
+                asked=round(sum(r.asked for r in runs_results) / runs),
+                coverage=sum(r.coverage for r in runs_results) / runs,
+                recall=sum(r.recall for r in runs_results) / runs,
+                recalled=sum(r.recalled for r in runs_results) / runs,
+            ))
+    return results
+
+def print_results(results: List[CampaignResult], campaign: Campaign, question_count: int) -> None:
+    print(f"{question_count} questions, {campaign.days} days, {campaign.flights_per_week:g} flights per week of "
+          f"{campaign.duration:g} min, an alert every {campaign.interval:g} min")
+    print(f"{'proportion':>10s} {'strategy':10s} {'asked':>7s} {'seen':>6s} {'recall':>7s} "
+          f"{f'>={RECALLED:.0%}':>6s}")
+    for result in results:
+        print(f"{result.proportion:10.2f} {result.strategy:10s} {result.asked:7d} {result.coverage:6.0%} "
+              f"{result.recall:7.0%} {result.recalled:6.0%}")
+
+def run_quiz(scheduler: QuizScheduler) -> None:
+    """Ask the next questions on the terminal and record the answers. End of input stops the quiz early."""
+    now = time.time() / 86400
+    questions = scheduler.draw()
+    if not questions:
+        print("No questions")
+        return
+    print(f"{questions[0].aircraft} {questions[0].section} Knowledge Questions\n")
+    answered = 0
+    try:
+        for question in questions:
+            input(f"Q: {question.question}\n(enter to show the answer) ")
+            print(f"A: {question.answer}")
+            correct = input("Right? [y/N] ").strip().lower().startswith('y')
+            scheduler.review(question.key, correct, now)
+            answered += 1
+            print()
+    except (EOFError, KeyboardInterrupt):
+        print(f"\nStopped after {answered} of {len(questions)} questions")
+
+def print_stats(scheduler: QuizScheduler) -> None:
+    now = time.time() / 86400
+    counts = scheduler.box_counts()
+    print(f"{len(scheduler.questions)} questions, {scheduler.due_count(now)} due")
+    for box, count in enumerate(counts):
+        days = INTERVAL_DAYS[box]
+        label = 'new or forgotten' if box == 0 else f"due after {days} day{'s' if days > 1 else ''}"
+        print(f"  box {box} ({label}): {count}")
+    mastered = sum(counts[MASTERED_BOX:])
+    print(f"  mastered: {mastered} ({mastered / max(len(scheduler.questions), 1):.0%})")
+
+def parse_proportions(text: str) -> List[float]:
+    try:
+        proportions = [float(value) for value in text.split(',')]
+    except ValueError:
+        proportions = []
+    if not proportions or not all(0.0 <= value <= 1.0 for value in proportions):
+        raise argparse.ArgumentTypeError(f"invalid proportions '{text}', expected values between 0 and 1")
+    return proportions
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description='Schedule the quiz questions with spaced repetition, or simulate study campaigns.')
+    parser.add_argument('banks', nargs='*', help=f'Quiz files (default: {QUIZ_FILE})')
+    parser.add_argument('--quiz', action='store_true', help='Ask the next questions and save the answers in --state')
+    parser.add_argument('--stats', action='store_true', help='Show the review state saved in --state')
+    parser.add_argument('--state', default='quiz.schedule.json', help='Review state file (default: quiz.schedule.json)')
+    parser.add_argument('--days', type=int, default=90, help='Days of the simulated campaign (default: 90)')
+    parser.add_argument('--flights-per-week', type=float, default=2.0, help='Simulated flights per week (default: 2)')
+    parser.add_argument('--duration', type=float, default=DURATION, help=f'Flight duration in minutes (default: {DURATION:g})')
+    parser.add_argument('--interval', type=float, default=INTERVAL, help=f'Minutes between alerts (default: {INTERVAL:g})')
+    parser.add_argument('--proportion', type=parse_proportions, default=PROPORTIONS,
+                        help='Knowledge question proportions to compare (default: 0.05,0.1,0.2,0.3)')
+    parser.add_argument('--runs', type=int, default=20, help='Campaigns averaged per proportion (default: 20)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the first campaign (default: 0)')
+
+    args = parser.parse_args()
+
+    try:
+        banks = args.banks or [os.path.join(script_dir, QUIZ_FILE)]
+        questions = [question for bank in banks for question in load_bank(bank)]
+        if not questions:
+            raise ValueError(f"No questions in {', '.join(banks)}")
+        if args.quiz or args.stats:
+            scheduler = QuizScheduler.load(questions, args.state)
+            if args.quiz:
+                run_quiz(scheduler)
+                scheduler.save(args.state)
+            print_stats(scheduler)
+            return
+        campaign = Campaign(args.days, args.flights_per_week, args.duration, args.interval)
+        start = time.perf_counter()
+        results = compare_proportions(questions, campaign, args.proportion, args.runs, args.seed)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+    print_results(results, campaign, len(questions))
+    print(f"\n{len(results) * args.runs} campaigns simulated in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import argparse
 import json
 import sys
 import os
@@ -27,11 +28,10 @@ def convert_quiz_to_markdown(json_file):
     return markdown
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python quiz_to_markdown.py <quiz_file.json>")
-        sys.exit(1)
-    
-    json_file = sys.argv[1]
+    parser = argparse.ArgumentParser(description='Convert a quiz JSON file to markdown, written next to it as .md.')
+    parser.add_argument('json_file', help='Quiz JSON file, as S22TG6-Quiz.json')
+
+    json_file = parser.parse_args().json_file
     if not json_file.endswith('.json'):
         print("Error: Input file must be a JSON file")
         sys.exit(1)
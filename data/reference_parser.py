@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Frozen copy of the line by line checklist parser, the reference of the fuzz harness.
+
+This is ChecklistParser of extract_checklists.py as it was before the parser
+moved to the token stream of checklist_lexer.py: every line is matched against
+the regular expressions of the grammar in order of precedence, without a lexer,
+a cache or a split of the manual. The profiling, logging and trace hooks are
+removed, the parsing is unchanged.
+
+fuzz_checklist_parser.py compares every engine, the live ChecklistParser
+included, with this one, so a change of the parser that changes its output is
+caught instead of being compared with itself. Do not change it to follow the
+live parser: change it only for a deliberate change of the grammar, in the same
+commit as the parser.
+
+Usage:
+    python reference_parser.py S22TG6-Checklists.txt   # checklists as JSON on stdout
+"""
+
+import argparse
+import json
+import re
+import sys
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+@dataclass
+class ChecklistStep:
+    instruction: str
+    action: str
+    is_conditional: bool
+    indent_level: int
+    step_number: Optional[str]
+    sub_steps: List['ChecklistStep']
+
+@dataclass
+class Checklist:
+    title: str
+    section: str
+    subsection: Optional[str]
+    alert: Optional[str]
+    alert_type: Optional[str]
+    alert_message: Optional[str]
+    steps: List[ChecklistStep]
+
+LINE_PATTERNS = {
+    'section': re.compile(r"#([A-Z].+)$"),
+    'subsection': re.compile(r"^##([A-Z].+)$"),
+    'checklist': re.compile(r"^###(.+)$"),
+    'item': re.compile(r"^(\s*)(?:(\d+)\.|\((\d+)\)|([a-z])\.)\s+(.+?)(?:\.\.\.\s*(.+))?$"),
+    'cas_message': re.compile(r"^([A-Z][A-Z0-9 ]+)(?: (Warning|Advisory|Caution))?$"),
+    'pfd_alert': re.compile(r'^PFD Alerts Window: [“"]([^“”"]*)[”"]$'),
+    'unnumbered': re.compile(r"^(\s*)(?!\d+\.|\(\d+\)|[a-z]\.)([^#].+?)(?:\.\.\.\s*(.+))?$")
+}
+
+class ReferenceChecklistParser:
+    def __init__(self):
+        self.checklists: List[Checklist] = []
+        self.current_checklist: Optional[Checklist] = None
+        self.current_step: Optional[ChecklistStep] = None
+        self.current_section: Optional[str] = None
+        self.current_subsection: Optional[str] = None
+        self.current_alert: Optional[str] = None
+        self.current_alert_type: Optional[str] = None
+        self.pending_pfd_alert: Optional[str] = None
+        self.patterns = LINE_PATTERNS
+
+    def create_checklist_step(self, instruction: str, action: str, indent_level: int,
+                              step_number: Optional[str] = None) -> ChecklistStep:
+        """Create a new ChecklistStep with the given parameters."""
+        is_conditional = instruction.lower().startswith(('if', 'when', 'verify'))
+        return ChecklistStep(
+            instruction=instruction,
+            action=action,
+            is_conditional=is_conditional,
+            indent_level=indent_level,
+            step_number=step_number,
+            sub_steps=[]
+        )
+
+    def find_parent_step(self, indent_level: int) -> Optional[ChecklistStep]:
+        """Find the appropriate parent step for the current indent level."""
+        if not self.current_checklist:
+            return None
+
+        step_stack = []
+
+        # Build stack of potential parent steps
+        for step in reversed(self.current_checklist.steps):
+            if step.indent_level < indent_level:
+                step_stack.append(step)
+
+            # Check substeps recursively
+            current = step
+            while current.sub_steps:
+                last_substep = current.sub_steps[-1]
+                if last_substep.indent_level < indent_level:
+                    step_stack.append(last_substep)
+                current = last_substep
+
+        # Find the closest parent with lower indent level
+        for potential_parent in step_stack:
+            if potential_parent.indent_level < indent_level:
+                return potential_parent
+
+        return None
+
+    def add_step_to_checklist(self, step: ChecklistStep, indent_level: int):
+        """Add a step to the current checklist at the appropriate level."""
+        if not self.current_checklist:
+            return
+
+        if indent_level == 0:
+            self.current_checklist.steps.append(step)
+            self.current_step = step
+        else:
+            parent = self.find_parent_step(indent_level)
+            if parent:
+                parent.sub_steps.append(step)
+            else:
+                self.current_checklist.steps.append(step)
+            self.current_step = step
+
+    def process_section_header(self, line: str) -> bool:
+        """Process a section header line. Returns True if the line is a section header."""
+        match = self.patterns['section'].match(line)
+        if match:
+            self.current_section = match.group(1)
+        return bool(match)
+
+    def process_subsection_header(self, line: str) -> bool:
+        """Process a subsection header line. Returns True if the line is a subsection header."""
+        match = self.patterns['subsection'].match(line)
+        if match:
+            self.current_subsection = match.group(1)
+        return bool(match)
+
+    def process_checklist_header(self, line: str) -> bool:
+        """Process a checklist header line. Returns True if the line is a checklist header."""
+        match = self.patterns['checklist'].match(line)
+        if match:
+            if self.current_checklist:
+                self.checklists.append(self.current_checklist)
+
+            self.current_checklist = Checklist(
+                title=match.group(1).strip(),
+                section=self.current_section or "",
+                subsection=self.current_subsection,
+                steps=[],
+                alert=None,
+                alert_type=None,
+                alert_message=None
+            )
+            self.current_step = None
+            self.current_alert = None
+            self.current_alert_type = None
+            self.pending_pfd_alert = None
+        return bool(match)
+
+    def process_pfd_alert(self, line: str) -> bool:
+        """Process a PFD alert line. Returns True if an alert message was set."""
+        match = self.patterns['pfd_alert'].match(line)
+        if match and self.current_checklist:
+            self.pending_pfd_alert = match.group(1).strip()
+            self.current_checklist.alert_message = self.pending_pfd_alert
+            return True
+        return False
+
+    def process_cas_message(self, line: str) -> bool:
+        """Process a CAS message line. Returns True if an alert was set."""
+        match = self.patterns['cas_message'].match(line)
+        if match and self.current_checklist:
+            self.current_alert = match.group(1).strip()
+            self.current_alert_type = match.group(2).strip() if match.group(2) else None
+            self.current_checklist.alert = self.current_alert
+            self.current_checklist.alert_type = self.current_alert_type
+            return True
+        return False
+
+    def process_numbered_step(self, line: str) -> bool:
+        """Process a numbered checklist step. Returns True if a step was processed."""
+        match = self.patterns['item'].match(line)
+        if match and self.current_checklist:
+            indent, num1, num2, num3, content, action = match.groups()
+
+            # Calculate indent level (2 spaces = 1 level)
+            indent_level = len(indent) // 2
+
+            # Split content into instruction and action
+            instruction = content.strip()
+            action = action.strip() if action else ""
+
+            # Remove dots from action text
+            if action:
+                action = re.sub(r'\.+', '', action).strip()
+
+            # Determine step number format
+            step_number = None
+            if num1:  # "1", "2", etc.
+                step_number = num1
+                indent_level = 0
+            elif num2:  # "(1)", "(2)", etc.
+                step_number = f"({num2})"
+                indent_level = 2
+            elif num3:  # "a", "b", etc.
+                step_number = num3
+                indent_level = 1
+
+            step = self.create_checklist_step(instruction, action, indent_level, step_number)
+            self.add_step_to_checklist(step, indent_level)
+            return True
+        return False
+
+    def process_unnumbered_step(self, line: str) -> bool:
+        """Process an unnumbered checklist step. Returns True if a step was processed."""
+        # Skip if this is a section, subsection, or checklist title
+        if (self.patterns['section'].match(line) or
+            self.patterns['subsection'].match(line) or
+            self.patterns['checklist'].match(line)):
+            return False
+
+        # Skip if this is a CAS message or PFD Alert
+        if (self.patterns['cas_message'].match(line) or
+            self.patterns['pfd_alert'].match(line)):
+            return False
+
+        match = self.patterns['unnumbered'].match(line)
+        if match and self.current_checklist:
+            indent, content, action = match.groups()
+
+            # Calculate indent level (2 spaces = 1 level)
+            indent_level = len(indent) // 2
+
+            # Split content into instruction and action
+            instruction = content.strip()
+            action = action.strip() if action else ""
+
+            # Remove dots from action text
+            if action:
+                action = re.sub(r'\.+', '', action).strip()
+
+            step = self.create_checklist_step(instruction, action, indent_level)
+            self.add_step_to_checklist(step, indent_level)
+            return True
+        return False
+
+    def process_line(self, line: str) -> None:
+        """Process one non empty line."""
+        # Process each type of line in order of precedence
+        # First check for headers and alerts
+        self.process_section_header(line)
+        self.process_subsection_header(line)
+        self.process_checklist_header(line)
+        self.process_cas_message(line)
+        self.process_pfd_alert(line)
+
+        # Then process steps - only process unnumbered if numbered didn't match
+        if not self.process_numbered_step(line):
+            self.process_unnumbered_step(line)
+
+    def parse_lines(self, lines: List[str]) -> List[Checklist]:
+        """Parse the lines of a manual. Returns the checklists that have steps."""
+        for line in lines:
+            line = line.rstrip()
+
+            # Skip empty lines
+            if not line:
+                continue
+
+            self.process_line(line)
+
+        # Add the last checklist
+        if self.current_checklist:
+            self.checklists.append(self.current_checklist)
+            self.current_checklist = None
+
+        # Filter out empty checklists and those without alert messages
+        self.checklists = [c for c in self.checklists if c.steps]
+        return self.checklists
+
+    def to_dicts(self) -> List[Dict]:
+        """Convert the parsed checklists to dictionaries for JSON serialization."""
+        return [asdict(checklist) for checklist in self.checklists]
+
+def parse_text(text: str) -> List[Dict]:
+    """The checklist dictionaries of a manual, as written by extract_checklists.py."""
+    parser = ReferenceChecklistParser()
+    parser.parse_lines(text.splitlines(keepends=True))
+    return parser.to_dicts()
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse a checklist manual with the frozen reference parser.')
+    parser.add_argument('txt_file', help='Checklist manual text file')
+
+    args = parser.parse_args()
+
+    try:
+        with open(args.txt_file, 'r', encoding='utf-8') as f:
+            checklist_parser = ReferenceChecklistParser()
+            checklist_parser.parse_lines(f.readlines())
+    except OSError as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+    json.dump(checklist_parser.to_dicts(), sys.stdout, indent=4)
+    print()
+
+if __name__ == "__main__":
+    main()
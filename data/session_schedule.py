@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Generate reproducible alert schedules of a training session for a class of students.
+
+The app schedules the alerts of a flight as Flight.computeAlerts does: one
+alert every interval after the protected start, moved by a random offset of up
+to randomOffsetRange, dropped if the offset takes it out of the flight without
+its protected start and end, and drawn by AlertManager.drawNextAlert:
+
+ - a knowledge question with the knowledge question proportion (uid -2), if
+   the aircraft has an <aircraft>-Quiz.json and the drawn section of it has
+   enough questions, as alert_analytics.knowledge_share
+ - otherwise an alert of the aircraft with a probability proportional to the
+   multiplier of its priority, among the alerts not in the last
+   alertRepeatThreshold alerts drawn
+
+generate_schedules draws the same for every student at once with numpy: the
+times and offsets as a students x slots array, then one batched draw per slot
+where the recently drawn alerts of each student have their weight zeroed and
+every student picks from the cumulative weights of their row. Thousands of
+timelines take a fraction of a second, and the same seed gives the same
+schedules.
+
+Usage:
+    python session_schedule.py -n 12 --seed 7 -o session.json --csv session.csv
+    python session_schedule.py -a SF50 -n 1000 --duration 90 --interval 5 --offset 2 --preset high-focus
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from alert_analytics import DURATION, INTERVAL, PRESETS, AlertColumns, Preset, parse_preset
+from profiling import NULL_PROFILER, add_profile_arguments, run_profiled
+from validate_alerts import PRIORITIES
+
+# numpy is imported by the functions using it, so importing this module or running --help doesn't load it
+if TYPE_CHECKING:
+    import numpy as np
+
+AIRCRAFT = "S22TG6"
+# uid of a knowledge question, as AlertManager.drawKnowledgeQuestion
+KNOWLEDGE_UID = -2
+# Default of the alert_repeat_threshold setting of the app
+REPEAT_THRESHOLD = 5
+# Batched draws before the students still drawing an alert of their ring draw from their own weights
+REJECTION_ROUNDS = 4
+
+@dataclass
+class SessionParameters:
+    """The flight and alert settings of the session, times in minutes."""
+    aircraft: str = AIRCRAFT
+    students: int = 30
+    duration: float = DURATION
+    interval: float = INTERVAL
+    offset: float = 0.0
+    protected_start: float = 0.0
+    protected_end: float = 0.0
+    repeat_threshold: int = REPEAT_THRESHOLD
+    preset: Preset = field(default_factory=lambda: PRESETS['default'])
+    seed: int = 0
+
+@dataclass
+class Schedules:
+    """Alert times (seconds from the start) and uids, students x slots, padded where a slot has no alert."""
+    parameters: SessionParameters
+    seconds: 'np.ndarray'
+    uids: 'np.ndarray'
+    valid: 'np.ndarray'
+
+    def student(self, index: int) -> Tuple['np.ndarray', 'np.ndarray']:
+        keep = self.valid[index]
+        return self.seconds[index][keep], self.uids[index][keep]
+
+def slot_times(parameters: SessionParameters) -> 'np.ndarray':
+    """The regular alert times of Flight.computeAlerts, in minutes."""
+    import numpy as np
+
+    end = parameters.duration - parameters.protected_end
+    if parameters.interval <= 0 or end <= parameters.protected_start:
+        return np.zeros(0)
+    first = parameters.protected_start + parameters.interval
+    return np.arange(first, end, parameters.interval)
+
+def draw_alerts(weights: 'np.ndarray', rng: 'np.random.Generator', slots: int, students: int,
+                repeat_threshold: int, knowledge: float, active: 'np.ndarray') -> 'np.ndarray':
+    """
+    Alert indexes (students x slots) drawn as drawNextAlert, -1 for knowledge questions and inactive slots.
+
+    The last `repeat_threshold` alerts of every student are kept in a ring. Every
+    slot draws for all the students at once from the cumulative weights, and
+    draws again for the students whose alert is in their ring until none is:
+    this gives the distribution of the alerts left available without building
+    a weight row per student. The few students still drawing after
+    REJECTION_ROUNDS (when the ring holds most of the weight) draw from their own
+    weight row.
+    """
+    import numpy as np
+
+    drawn = np.full((students, slots), -1, dtype=np.int64)
+    cumulative = np.cumsum(weights)
+    total = cumulative[-1] if len(cumulative) else 0.0
+    if total <= 0:
+        raise ValueError("No alert has a priority with a multiplier above 0")
+    ring = max(repeat_threshold, 0)
+    recent = np.full((students, ring), -1, dtype=np.int64)
+    filled = np.zeros(students, dtype=np.int64)
+    is_knowledge = rng.random((students, slots)) < knowledge
+    for slot in range(slots):
+        drawing = np.flatnonzero(active[:, slot] & ~is_knowledge[:, slot])
+        if ring:
+            # With every alert in the ring, the app has nothing left to exclude: draw from all of them
+            in_ring = np.where(recent >= 0, weights[np.maximum(recent, 0)], 0.0).sum(axis=1)
+            exhausted = in_ring >= total * (1 - 1e-9)
+        pending = drawing
+        for _ in range(REJECTION_ROUNDS):
+            if not len(pending):
+                break
+            picks = np.minimum(np.searchsorted(cumulative, rng.random(len(pending)) * total, side='right'),
+                               len(weights) - 1)
+            drawn[pending, slot] = picks
+            if not ring:
+                break
+            pending = pending[(recent[pending] == picks[:, None]).any(axis=1) & ~exhausted[pending]]
+        if ring and len(pending):
+            rows = np.broadcast_to(weights, (len(pending), len(weights))).copy()
+            held = recent[pending]
+            rows[np.repeat(np.arange(len(pending)), ring)[held.ravel() >= 0], held[held >= 0]] = 0.0
+            row_cumulative = np.cumsum(rows, axis=1)
+            targets = rng.random(len(pending)) * row_cumulative[:, -1]
+            drawn[pending, slot] = np.minimum((row_cumulative <= targets[:, None]).sum(axis=1), len(weights) - 1)
+        if ring:
+            recent[drawing, filled[drawing] % ring] = drawn[drawing, slot]
+            filled[drawing] += 1
+    return drawn
+
+def generate_schedules(columns: AlertColumns, parameters: SessionParameters) -> Schedules:
+    """Alert schedules of every student of the session."""
+    import numpy as np
+
+    rng = np.random.default_rng(parameters.seed)
+    aircraft_code = np.flatnonzero(columns.aircraft == parameters.aircraft)
+    if not len(aircraft_code):
+        raise ValueError(f"No alerts for aircraft {parameters.aircraft}")
+    alerts = np.flatnonzero(columns.aircraft_codes == aircraft_code[0])
+    weights = np.array(parameters.preset.multipliers())[columns.priority_codes[alerts]]
+
+    times = slot_times(parameters)
+    students, slots = parameters.students, len(times)
+    offsets = rng.uniform(-parameters.offset, parameters.offset, (students, slots)) if parameters.offset > 0 \
+        else np.zeros((students, slots))
+    minutes = times[None, :] + offsets
+    active = (minutes >= parameters.protected_start) & (minutes <= parameters.duration - parameters.protected_end)
+
+    knowledge = parameters.preset.knowledge * columns.knowledge_share[aircraft_code[0]]
+    drawn = draw_alerts(weights, rng, slots, students, parameters.repeat_threshold, knowledge, active)
+    uids = np.where(drawn >= 0, columns.uids[alerts][np.maximum(drawn, 0)], KNOWLEDGE_UID)
+
+    # Offsets can swap neighbouring alerts, sorted by time as computeAlerts does, dropped ones last
+    seconds = np.rint(minutes * 60).astype(np.int64)
+    order = np.argsort(np.where(active, seconds, np.iinfo(np.int64).max), axis=1, kind='stable')
+    return Schedules(
+        parameters=parameters,
+        seconds=np.take_along_axis(seconds, order, axis=1),
+        uids=np.take_along_axis(uids, order, axis=1),
+        valid=np.take_along_axis(active, order, axis=1),
+    )
+
+def student_json(schedules: Schedules, index: int) -> Dict:
+    seconds, uids = schedules.student(index)
+    return {'student': index + 1, 'seconds': seconds.tolist(), 'uids': uids.tolist()}
+
+def schedules_to_json(schedules: Schedules, version: str) -> Dict:
+    parameters = schedules.parameters
+    preset = parameters.preset
+    return {
+        'alertsVersion': version,
+        'aircraftName': parameters.aircraft,
+        'seed': parameters.seed,
+        'duration': parameters.duration * 60,
+        'interval': parameters.interval * 60,
+        'randomOffsetRange': parameters.offset * 60,
+        'protectedStart': parameters.protected_start * 60,
+        'protectedEnd': parameters.protected_end * 60,
+        'alertParameters': {
+            'knowledgeQuestionProportion': preset.knowledge,
+            'alertRepeatThreshold': parameters.repeat_threshold,
+            'highPriorityMultiplier': preset.high,
+            'mediumPriorityMultiplier': preset.medium,
+            'lowPriorityMultiplier': preset.low,
+        },
+        'students': [student_json(schedules, index) for index in range(parameters.students)],
+    }
+
+def schedule_rows(schedules: Schedules, columns: AlertColumns) -> List[Dict]:
+    """One row per student and alert."""
+    positions = {int(uid): position for position, uid in enumerate(columns.uids)}
+    rows = []
+    for index in range(schedules.parameters.students):
+        seconds, uids = schedules.student(index)
+        for number, (second, uid) in enumerate(zip(seconds.tolist(), uids.tolist()), 1):
+            position = positions.get(uid)
+            rows.append({
+                'student': index + 1,
+                'alert': number,
+                'seconds': second,
+                'time': f"{second // 60:d}:{second % 60:02d}",
+                'uid': uid,
+                'priority': PRIORITIES[columns.priority_codes[position]] if position is not None else '',
+                'message': columns.messages[position] if position is not None else 'Knowledge Questions',
+            })
+    return rows
+
+def generate(json_file: str, parameters: SessionParameters, output: Optional[str] = None,
+             csv_file: Optional[str] = None, profiler=None) -> Tuple[Schedules, AlertColumns]:
+    """Generate the schedules and write them as JSON and CSV. Returns them with the alerts they draw from."""
+    profiler = profiler or NULL_PROFILER
+    with profiler.phase('load'):
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        columns = AlertColumns(data.get('alerts', []), os.path.dirname(os.path.abspath(json_file)))
+    with profiler.phase('draw'):
+        start = time.perf_counter()
+        schedules = generate_schedules(columns, parameters)
+        elapsed = time.perf_counter() - start
+    profiler.count('students', parameters.students)
+    profiler.count('alerts', int(schedules.valid.sum()))
+    print(f"{parameters.students} schedules of {parameters.aircraft}, {int(schedules.valid.sum())} alerts "
+          f"drawn in {elapsed * 1000:.1f} ms")
+
+    with profiler.phase('write'):
+        if output:
+            with open(output, 'w', encoding='utf-8') as f:
+                json.dump(schedules_to_json(schedules, data.get('version', '')), f, separators=(',', ':'))
+            print(f"Wrote {output}")
+        if csv_file:
+            rows = schedule_rows(schedules, columns)
+            with open(csv_file, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ['student'])
+                writer.writeheader()
+                writer.writerows(rows)
+            print(f"Wrote {len(rows)} rows to {csv_file}")
+    return schedules, columns
+
+def print_schedules(schedules: Schedules, columns: AlertColumns, count: int) -> None:
+    messages = dict(zip(columns.uids.tolist(), columns.messages))
+    for index in range(min(count, schedules.parameters.students)):
+        seconds, uids = schedules.student(index)
+        alerts = ', '.join(f"{second // 60}:{second % 60:02d} {messages.get(uid, 'Knowledge Questions')}"
+                           for second, uid in zip(seconds.tolist(), uids.tolist()))
+        print(f"  student {index + 1}: {alerts}")
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description='Generate seeded alert schedules of a session for a class of students.')
+    parser.add_argument('json_file', nargs='?', default=os.path.join(script_dir, 'AlertsToSimulate.json'),
+                        help='Alerts JSON file (default: AlertsToSimulate.json)')
+    parser.add_argument('-a', '--aircraft', default=AIRCRAFT, help=f'Aircraft of the session (default: {AIRCRAFT})')
+    parser.add_argument('-n', '--students', type=int, default=30, help='Number of students (default: 30)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the session (default: 0)')
+    parser.add_argument('--duration', type=float, default=DURATION, help=f'Flight duration in minutes (default: {DURATION:g})')
+    parser.add_argument('--interval', type=float, default=INTERVAL, help=f'Alert interval in minutes (default: {INTERVAL:g})')
+    parser.add_argument('--offset', type=float, default=0.0, help='Random offset range of the alerts in minutes (default: 0)')
+    parser.add_argument('--protected-start', type=float, default=0.0, help='Minutes without alerts after the start (default: 0)')
+    parser.add_argument('--protected-end', type=float, default=0.0, help='Minutes without alerts before the end (default: 0)')
+    parser.add_argument('--repeat-threshold', type=int, default=REPEAT_THRESHOLD,
+                        help=f'Alerts drawn before an alert can repeat (default: {REPEAT_THRESHOLD})')
+    parser.add_argument('--preset', default='default', metavar='NAME=H,M,L[,K]',
+                        help=f'Priority multipliers and knowledge proportion, or one of {", ".join(PRESETS)} (default: default)')
+    parser.add_argument('-o', '--output', help='Write the schedules as JSON to this file')
+    parser.add_argument('--csv', help='Write one row per student and alert to this CSV file')
+    add_profile_arguments(parser)
+
+    args = parser.parse_args()
+
+    if args.students < 1:
+        parser.error("--students must be at least 1")
+    try:
+        preset = PRESETS[args.preset] if args.preset in PRESETS else parse_preset(args.preset)
+        parameters = SessionParameters(args.aircraft, args.students, args.duration, args.interval, args.offset,
+                                       args.protected_start, args.protected_end, args.repeat_threshold,
+                                       preset, args.seed)
+        schedules, columns = run_profiled('session_schedule', args, lambda profiler: generate(
+            args.json_file, parameters, args.output, args.csv, profiler))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+
+    if not args.output and not args.csv:
+        print_schedules(schedules, columns, 5)
+
+if __name__ == "__main__":
+    main()
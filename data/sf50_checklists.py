@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Extract the SF50 checklists from the procedure texts into the checklist JSON format.
+
+sf50_emergency.txt and sf50_abnormal.txt are text dumps of the SF50 handbook
+procedure sections. They are read in a single pass, line by line, by a state
+machine producing the same structure as extract_checklists.py, so the app can
+use SF50-Checklists.json like S22TG6-Checklists.json.
+
+Line patterns:
+ SECTION 3: EMERGENCY PROCEDURES sets the section (EMERGENCY, ABNORMAL)
+ Emergency Procedures, Abnormal CAS Procedures, AFCS Alerts... set the sub section
+ a short paragraph not ending with a period is a procedure title candidate, it
+   becomes the title of the checklist when the procedure first step follows
+ MESSAGE Caution followed by MESSAGE is a CAS procedure title, the sentence
+   that follows is the alert description
+ 1. description ....... ACTION, a. and (1) are items at level 0, 1 and 2
+ ◆ If condition: and unnumbered lines ending with a colon are conditional steps
+ lines continuing an unfinished item or condition (wrapped lines) are merged into it
+ • NOTE •, • CAUTION • and • WARNING • blocks, page headers and footers,
+   (Continued) markers and tables are skipped
+ Procedure Complete ends a procedure
+
+The text comes from a PDF and is not always in reading order: a procedure can
+continue after its Procedure Complete line, so a checklist only ends when a new
+title is followed by a first step.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from dataclasses import asdict
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from extract_checklists import SCHEMAS, Checklist, ChecklistStep, dump_json, to_app_schema
+from profiling import NULL_PROFILER, add_profile_arguments, run_profiled
+
+INPUT_FILES = ["sf50_emergency.txt", "sf50_abnormal.txt"]
+OUTPUT_FILE = "SF50-Checklists.json"
+AIRCRAFT = "SF50"
+
+SECTION_PATTERN = re.compile(r'^SECTION 3A?: (EMERGENCY|ABNORMAL) PROCEDURES$')
+SUBSECTIONS = {"Emergency Procedures", "Abnormal Procedures", "Emergency CAS Procedures",
+               "Abnormal CAS Procedures", "AFCS Alerts"}
+FURNITURE_PATTERN = re.compile(r'^(P/N \d{5}-\d{3}|Revision \d+|3A?-\d+|CIRRUS|VISION SF50|'
+                               r'(EMERGENCY|ABNORMAL)( CAS)? PROCEDURES|\(Continued( on next page)?\))$')
+NOTE_PATTERN = re.compile(r'^• (NOTE|CAUTION|WARNING) •$')
+CAS_PATTERN = re.compile(r'^([A-Z0-9][A-Z0-9 /#-]*[A-Z0-9]) (Warning|Caution|Advisory)(?: - (.+))?$')
+NUMBER_PATTERN = re.compile(r'^(\d{1,2})\.(?!\d)\s*(.*)$')
+LETTER_PATTERN = re.compile(r'^([a-z])\.(?:\s+(.*))?$')
+SUB_NUMBER_PATTERN = re.compile(r'^\((\d+)\)\s*(.*)$')
+CONDITION_PATTERN = re.compile(r'^[◆❍]\s*(.*)$')
+LEADER_PATTERN = re.compile(r'^(.*?)\s*\.{3,}[\s.]*(.*)$')
+PROCEDURE_COMPLETE = "Procedure Complete"
+
+def join_wrapped(text: str, continuation: str) -> str:
+    """Join a wrapped line to the text it continues, undoing hyphenation."""
+    if not text:
+        return continuation
+    if len(text) > 1 and text.endswith('-') and text[-2].isalpha() and continuation[:1].islower():
+        return text[:-1] + continuation
+    return f"{text} {continuation}"
+
+class SF50ChecklistParser:
+    """Single pass state machine turning SF50 procedure text into checklists."""
+
+    def __init__(self, profiler=None):
+        self.profiler = profiler or NULL_PROFILER
+        self.checklists: List[Checklist] = []
+        # CAS procedures without any step (advisories with only a note), not part of the output
+        self.procedures_without_steps: List[Checklist] = []
+        self.section: Optional[str] = None
+        self.subsection: Optional[str] = None
+        self.current: Optional[Checklist] = None
+        # Steps from the top level down to the last step added, to attach sub steps
+        self.parents: List[ChecklistStep] = []
+        # Last step or condition while it is unfinished, so wrapped lines are merged into it
+        self.open_step: Optional[ChecklistStep] = None
+        self.open_in_action = False
+        self.in_note = False
+        self.paragraph: List[str] = []
+        # Dot leader line left out of any step, for an item label that comes alone after it
+        self.pending_leader: Optional[str] = None
+        self.title: Optional[str] = None
+        self.cas: Optional[Tuple[str, str]] = None
+        self.pending_cas: Optional[Tuple[str, str, str]] = None
+        self.description: Optional[str] = None
+        self.expect_description = False
+        self.line_count = 0
+
+    # Procedures and steps
+
+    def start_checklist(self) -> None:
+        self.finish_checklist()
+        alert, alert_type = self.cas if self.cas else (None, None)
+        self.current = Checklist(
+            title=self.title,
+            section=self.section or "",
+            subsection=self.subsection,
+            alert=alert,
+            alert_type=alert_type,
+            alert_message=self.description if self.cas else None,
+            steps=[],
+        )
+        self.title = None
+        self.cas = None
+        self.description = None
+        self.expect_description = False
+        self.parents = []
+
+    def drop_title(self) -> None:
+        """Forget the pending title, keeping it in procedures_without_steps if it is a CAS procedure."""
+        if self.cas:
+            self.procedures_without_steps.append(Checklist(
+                title=self.title,
+                section=self.section or "",
+                subsection=self.subsection,
+                alert=self.cas[0],
+                alert_type=self.cas[1],
+                alert_message=self.description,
+                steps=[],
+            ))
+        self.title = None
+        self.cas = None
+
+    def finish_checklist(self) -> None:
+        if self.current and self.current.steps:
+            self.checklists.append(self.current)
+        self.current = None
+        self.open_step = None
+
+    def add_step(self, instruction: str, indent_level: int, step_number: Optional[str] = None,
+                 is_conditional: Optional[bool] = None, raw: str = "") -> None:
+        if self.current is None:
+            return
+        action = ""
+        has_leader = False
+        match = LEADER_PATTERN.match(instruction)
+        if match:
+            instruction, action = match.group(1), match.group(2)
+            has_leader = True
+        if is_conditional is None:
+            is_conditional = instruction.lower().startswith(('if', 'when', 'verify'))
+        step = ChecklistStep(
+            instruction=instruction.strip(),
+            action=action.strip(),
+            is_conditional=is_conditional,
+            indent_level=indent_level,
+            step_number=step_number,
+            sub_steps=[],
+        )
+        while self.parents and self.parents[-1].indent_level >= indent_level:
+            self.parents.pop()
+        if self.parents:
+            self.parents[-1].sub_steps.append(step)
+        else:
+            self.current.steps.append(step)
+        self.parents.append(step)
+
+        # A step is unfinished when its line was cut: trailing space or punctuation, no
+        # instruction yet, or a plain sentence without final punctuation
+        text = step.action if has_leader else step.instruction
+        unfinished = (not text or raw != raw.rstrip() or text[-1] in ',-–/'
+                      or (not has_leader and text[-1] not in '.:)!?'))
+        if step_number is None and is_conditional:
+            unfinished = not step.instruction.endswith(':')
+        self.open_step = step if unfinished else None
+        self.open_in_action = has_leader
+
+    def continue_step(self, text: str, raw: str) -> None:
+        step = self.open_step
+        if self.open_in_action:
+            step.action = join_wrapped(step.action, text)
+        elif not step.instruction:
+            # Item number alone on its line, the item follows
+            match = LEADER_PATTERN.match(text)
+            if match:
+                step.instruction, step.action = match.group(1).strip(), match.group(2).strip()
+                self.open_in_action = True
+            else:
+                step.instruction = text
+        else:
+            step.instruction = join_wrapped(step.instruction, text)
+        finished_text = step.action if self.open_in_action else step.instruction
+        if step.step_number is None and step.is_conditional:
+            finished = finished_text.endswith(':')
+        else:
+            finished = raw == raw.rstrip() and (self.open_in_action or finished_text[-1] in '.:)!?')
+        if finished:
+            self.open_step = None
+
+    def item(self, number: str, text: str, indent_level: int, raw: str, leader: Optional[str] = None) -> None:
+        self.flush_paragraph()
+        if not text and (self.pending_leader or leader):
+            # The dump sometimes puts the text of an item before its label: ITT ....MONITOR then b.
+            text = raw = self.pending_leader or leader
+        self.pending_leader = None
+        self.in_note = False
+        if self.title and (number == "1" or self.cas):
+            self.start_checklist()
+        step_number = f"({number})" if indent_level == 2 else number
+        self.add_step(text, indent_level, step_number, raw=raw)
+
+    def condition(self, text: str, indent_level: int, raw: str) -> None:
+        if self.title:
+            self.start_checklist()
+        self.add_step(text, indent_level, is_conditional=True, raw=raw)
+
+    # Paragraphs of text outside steps
+
+    def is_title(self, lines: List[str]) -> bool:
+        text = " ".join(lines)
+        return (len(lines) <= 3 and len(text) <= 90 and text[0].isupper()
+                and text[-1] not in '.:;,' and any(c.islower() for c in text))
+
+    def flush_paragraph(self) -> None:
+        """Decide what the buffered paragraph is, now that it ended."""
+        if not self.paragraph:
+            return
+        lines = self.paragraph
+        self.paragraph = []
+        text = " ".join(lines)
+        if self.is_title(lines):
+            self.drop_title()
+            self.title = text
+            self.in_note = False
+        elif self.in_note:
+            return
+        elif self.expect_description and text.endswith('.'):
+            self.description = text
+            self.expect_description = False
+        elif self.current is not None and text.endswith(':'):
+            self.condition(text, 0, text)
+        elif self.current is not None and len(lines) == 1 and LEADER_PATTERN.match(text):
+            self.pending_leader = text
+
+    # Lines
+
+    def feed(self, raw: str) -> None:
+        """Process one line of a procedure file."""
+        self.line_count += 1
+        raw = raw.rstrip('\r\n')
+        line = raw.strip()
+        if not line:
+            self.flush_paragraph()
+            return
+        # A leader line only goes to a label on the next line that is not blank
+        leader, self.pending_leader = self.pending_leader, None
+
+        if self.pending_cas:
+            message, cas_type, cas_line = self.pending_cas
+            self.pending_cas = None
+            # Messages covering several alerts are followed by each of them: FUEL LOW LEFT/RIGHT/TOTAL
+            if line == message or (line.isupper() and line.split()[0] == message.split()[0]):
+                self.drop_title()
+                self.title = cas_line
+                self.cas = (message, cas_type)
+                self.description = None
+                self.expect_description = True
+                self.in_note = False
+                return
+            if not self.in_note:
+                self.paragraph.append(cas_line)
+
+        match = SECTION_PATTERN.match(line)
+        if match:
+            self.section = match.group(1)
+            return
+        if FURNITURE_PATTERN.match(line):
+            return
+        if line in SUBSECTIONS:
+            self.flush_paragraph()
+            self.subsection = line
+            self.in_note = False
+            return
+        if line == PROCEDURE_COMPLETE:
+            self.flush_paragraph()
+            self.open_step = None
+            self.in_note = False
+            return
+        if NOTE_PATTERN.match(line):
+            self.flush_paragraph()
+            self.open_step = None
+            self.in_note = True
+            return
+
+        match = CAS_PATTERN.match(line)
+        if match:
+            self.flush_paragraph()
+            self.pending_cas = (match.group(1), match.group(2), line)
+            return
+
+        match = NUMBER_PATTERN.match(line)
+        if match:
+            self.item(match.group(1), match.group(2), 0, raw, leader)
+            return
+        match = LETTER_PATTERN.match(line)
+        if match:
+            self.item(match.group(1), match.group(2) or "", 1, raw, leader)
+            return
+        match = SUB_NUMBER_PATTERN.match(line)
+        if match:
+            self.item(match.group(1), match.group(2), 2, raw, leader)
+            return
+        match = CONDITION_PATTERN.match(line)
+        if match:
+            self.flush_paragraph()
+            self.in_note = False
+            self.condition(match.group(1), 0, raw)
+            return
+
+        if self.open_step is not None and not self.in_note and not self.paragraph:
+            self.continue_step(line, raw)
+            return
+        self.paragraph.append(line)
+
+    def parse_lines(self, lines: Iterable[str]) -> List[Checklist]:
+        with self.profiler.phase('parse'):
+            for line in lines:
+                self.feed(line)
+            # A file ends its last procedure
+            if self.pending_cas and not self.in_note:
+                self.paragraph.append(self.pending_cas[2])
+            self.pending_cas = None
+            self.flush_paragraph()
+            self.finish_checklist()
+            self.drop_title()
+        self.profiler.count('lines', self.line_count)
+        return self.checklists
+
+    def parse_file(self, file_path: str) -> List[Checklist]:
+        """Parse one procedure file, streaming its lines."""
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return self.parse_lines(f)
+
+    def to_dicts(self, schema: str = 'parser') -> Union[List[Dict], Dict]:
+        if schema == 'app':
+            return to_app_schema(self.checklists, AIRCRAFT)
+        checklists = [asdict(checklist) for checklist in self.checklists]
+        if schema == 'compact':
+            # Imported here, like the store, so --help doesn't load them
+            from compact_checklists import to_compact
+            return to_compact(checklists)
+        return checklists
+
+    def write_json(self, output_path: str, schema: str = 'parser') -> None:
+        with self.profiler.phase('serialize'):
+            if schema == 'jsonl':
+                from checklist_store import write_store
+                write_store(output_path, AIRCRAFT, self.to_dicts('parser'))
+                return
+            with open(output_path, 'w', encoding='utf-8') as f:
+                dump_json(self.to_dicts(schema), f, schema)
+
+def empty_steps(checklists: List[Checklist]) -> List[str]:
+    """Checklist title and number of the steps without an instruction, which the parser lost the text of."""
+    def visit(title: str, steps: List[ChecklistStep]) -> Iterable[str]:
+        for step in steps:
+            if not step.instruction:
+                yield f"{title} step {step.step_number or '(unnumbered)'}"
+            yield from visit(title, step.sub_steps)
+    return [found for checklist in checklists for found in visit(checklist.title, checklist.steps)]
+
+def extract_sf50_checklists(input_files: List[str], output_file: str, profiler=None,
+                            schema: str = 'parser') -> SF50ChecklistParser:
+    """Parse the procedure files in order and write the checklists JSON, unless a step has no instruction."""
+    parser = SF50ChecklistParser(profiler=profiler)
+    for input_file in input_files:
+        parser.parse_file(input_file)
+    empty = empty_steps(parser.checklists)
+    if empty:
+        raise ValueError(f"{len(empty)} steps without instruction, {output_file} was not written: {', '.join(empty)}")
+    parser.profiler.count('checklists', len(parser.checklists))
+    parser.write_json(output_file, schema)
+    return parser
+
+def main():
+    from checklist_store import STORE_FILE
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description='Extract SF50 checklists from the procedure texts into a JSON file.')
+    parser.add_argument('input_files', nargs='*', help=f'Procedure text files (default: {" ".join(INPUT_FILES)})')
+    parser.add_argument('-o', '--output', help=f'Output file path (default: {OUTPUT_FILE})')
+    parser.add_argument('--schema', choices=SCHEMAS, default='parser',
+                        help='Output schema: parser (snake_case, decoded by the app), app (camelCase with stable ids) '
+                             'or compact (shared strings and steps), or jsonl to replace the SF50 checklists '
+                             f'in a checklist store (default output: {STORE_FILE})')
+    add_profile_arguments(parser)
+
+    args = parser.parse_args()
+
+    input_files = args.input_files or [os.path.join(script_dir, name) for name in INPUT_FILES]
+    output_file = args.output or os.path.join(script_dir, STORE_FILE if args.schema == 'jsonl' else OUTPUT_FILE)
+
+    try:
+        result = run_profiled('sf50_checklists', args,
+                              lambda profiler: extract_sf50_checklists(input_files, output_file, profiler, args.schema))
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+    print(f"Extracted {len(result.checklists)} checklists. Output written to {output_file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic manuals in the line grammar understood by the data tools.
+
+The generated text follows the same patterns as the real files, so it can be
+fed to the parsers to benchmark them on inputs of any size, or to test them
+against random but well formed inputs:
+
+ - generate_checklist_manual: S22TG6-Checklists.txt grammar for extract_checklists.py
+   and validate_checklist.py (#SECTION, ##subsection, ###checklist, 1./a./(1) items
+   with dot leader actions, unnumbered comments, CAS messages and PFD Alerts Window)
+ - generate_sf50_summary: sf50_summary.txt grammar for process_sf50.py
+   (Section headers, CAS alerts with their type and situation alerts)
+ - generate_sf50_procedures: sf50_emergency.txt/sf50_abnormal.txt grammar
+   (procedures with CAS descriptions, AFCS alerts, notes and page furniture)
+ - generate_alerts: AlertsToSimulate.json content for validate_alerts.py, optionally
+   with a proportion of invalid values and duplicate uids
+
+All generators are deterministic for a given seed.
+
+Usage:
+    python synthetic_manuals.py checklists -n 500 --depth 3 -o manual.txt
+    python synthetic_manuals.py sf50-summary -n 200 -o summary.txt
+    python synthetic_manuals.py sf50-procedures -n 200 -o procedures.txt
+    python synthetic_manuals.py alerts -n 100000 -o alerts.json
+"""
+
+import argparse
+import json
+import random
+from typing import Dict, List, Optional, Tuple
+
+NOUNS = [
+    "Airspeed", "Power Lever", "Mixture", "Fuel Pump", "Fuel Selector", "Flaps", "Autopilot",
+    "Alternator", "Battery", "Circuit Breaker", "Pitot Heat", "Cabin Heat", "Landing Gear",
+    "Throttle", "Oxygen System", "Avionics Switch", "Ignition Switch", "Parking Brake",
+    "Bleed Air", "Generator", "Transponder", "Trim", "Defrost", "Engine Knob",
+]
+QUALIFIERS = ["", "", "1", "2", "Left", "Right", "Main", "Standby", "Emergency", "Alternate"]
+ACTIONS = [
+    "ON", "OFF", "CHECK", "SET", "MAINTAIN", "IDLE", "PULL", "PRESS", "AS REQUIRED", "VERIFY",
+    "CHECK & SET", "FULL OPEN", "MONITOR", "CYCLE", "REDUCE", "INCREASE", "100%, CHECK LIGHT ON",
+]
+VERBS = ["Land", "Monitor", "Verify", "Avoid", "Consider", "Select", "Reduce", "Maintain", "Exit"]
+OBJECTS = [
+    "as soon as practical", "engine parameters", "icing conditions", "the nearest suitable airport",
+    "abrupt control inputs", "a lower altitude", "the alternate source", "fuel balance",
+]
+CONDITIONS = ["If", "When", "Verify"]
+SYSTEMS = ["ALT", "BATT", "FUEL", "OIL", "PITOT", "BLEED", "GEN", "HYD", "AOA", "START", "DOOR", "ANTI ICE"]
+FAULTS = ["FAIL", "LOW", "HIGH", "OPEN", "PRESS", "TEMP", "HEAT", "OFF", "MISCOMPARE"]
+CAS_TYPES = ["Warning", "Caution", "Advisory"]
+SECTIONS = ["NORMAL", "ABNORMAL", "EMERGENCY"]
+
+def _dots(rng: random.Random) -> str:
+    return "." * rng.randint(3, 40)
+
+def _instruction(rng: random.Random) -> str:
+    noun = rng.choice(NOUNS)
+    qualifier = rng.choice(QUALIFIERS)
+    return f"{noun} {qualifier}".strip()
+
+def _sentence(rng: random.Random) -> str:
+    return f"{rng.choice(VERBS)} {rng.choice(OBJECTS)}."
+
+def _item(rng: random.Random, number: str) -> str:
+    """A checklist item line: either a dot leader action or a plain sentence."""
+    roll = rng.random()
+    if roll < 0.7:
+        return f"{number} {_instruction(rng)} {_dots(rng)} {rng.choice(ACTIONS)}"
+    if roll < 0.85:
+        return f"{number} {rng.choice(CONDITIONS)} {rng.choice(OBJECTS)}"
+    return f"{number} {_sentence(rng)}"
+
+def _cas_message(index: int) -> str:
+    """CAS message for an index, the same in every generated file so they cross reference."""
+    return f"{SYSTEMS[index % len(SYSTEMS)]} {index} {FAULTS[index * 7 % len(FAULTS)]}"
+
+def _situation(index: int) -> str:
+    """Situation alert name for an index, the same in every generated file."""
+    return f"{NOUNS[index % len(NOUNS)]} {FAULTS[index * 5 % len(FAULTS)].capitalize()} {index}"
+
+def _items(rng: random.Random, depth: int, level: int, count: int) -> List[str]:
+    """Generate `count` items at `level` (0: 1., 1: a., 2: (1)) with sub items up to `depth`."""
+    lines = []
+    for n in range(1, count + 1):
+        if level == 0:
+            number = f"{n}."
+        elif level == 1:
+            number = f"{chr(ord('a') + (n - 1) % 26)}."
+        else:
+            number = f"({n})"
+        lines.append(_item(rng, number))
+        if level + 1 < depth and rng.random() < 0.35:
+            lines.extend(_items(rng, depth, level + 1, rng.randint(1, 4)))
+    return lines
+
+def generate_checklist(rng: random.Random, title: str, depth: int, cas: Optional[Tuple[str, str]] = None,
+                       pfd_alert: Optional[str] = None) -> List[str]:
+    """Generate the lines of one checklist, starting with its ### title line."""
+    lines = [f"###{title}"]
+    if cas:
+        message, cas_type = cas
+        lines.append(f"{message} {cas_type}")
+        lines.append(message)
+        if pfd_alert:
+            lines.append(f'PFD Alerts Window: "{pfd_alert}"')
+        lines.append("")
+    if rng.random() < 0.2:
+        lines.append(_sentence(rng).capitalize())
+    lines.extend(_items(rng, depth, 0, rng.randint(2, 9)))
+    lines.append("")
+    return lines
+
+def generate_checklist_manual(checklists: int = 100, depth: int = 3, seed: int = 0,
+                              cas_ratio: float = 0.3, checklists_per_subsection: int = 6) -> str:
+    """Generate a checklist manual with `checklists` checklists nested up to `depth` item levels."""
+    rng = random.Random(seed)
+    depth = max(1, min(depth, 3))
+    lines: List[str] = []
+    per_section = max(1, -(-checklists // len(SECTIONS)))
+    index = 0
+    for section in SECTIONS:
+        if index >= checklists:
+            break
+        lines.extend([f"#{section}", ""])
+        for n in range(per_section):
+            if index >= checklists:
+                break
+            if n % checklists_per_subsection == 0:
+                lines.append(f"##{rng.choice(NOUNS)} {section.capitalize()} {n // checklists_per_subsection + 1}")
+            index += 1
+            title = f"{_instruction(rng)} {rng.choice(FAULTS).capitalize()} {index}"
+            cas = None
+            pfd_alert = None
+            if section != "NORMAL" and rng.random() < cas_ratio:
+                cas = (_cas_message(index), rng.choice(CAS_TYPES))
+                if rng.random() < 0.5:
+                    pfd_alert = f"{_instruction(rng)} {rng.choice(FAULTS).lower()}"
+            lines.extend(generate_checklist(rng, title, depth, cas, pfd_alert))
+    return "\n".join(lines) + "\n"
+
+def generate_sf50_summary(alerts: int = 200, seed: int = 0, cas_ratio: float = 0.6) -> str:
+    """Generate a summary of `alerts` CAS and situation alerts split across the procedure sections."""
+    rng = random.Random(seed)
+    sections = ["Section 3: Emergency Procedures", "Section 3A: Abnormal Procedures", "Section 4: Normal Procedures"]
+    per_section = max(1, -(-alerts // len(sections)))
+    lines: List[str] = []
+    index = 0
+    for section in sections:
+        if index >= alerts:
+            break
+        lines.extend([section, ""])
+        for _ in range(per_section):
+            if index >= alerts:
+                break
+            index += 1
+            if rng.random() < cas_ratio:
+                suffix = " - On Ground" if rng.random() < 0.1 else ""
+                lines.append(f"{_cas_message(index)} {rng.choice(CAS_TYPES)}{suffix}")
+            else:
+                lines.append(_situation(index))
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+def _page_furniture(rng: random.Random, page: int) -> List[str]:
+    return ["", "P/N 31452-002", "Revision 1", "", f"3-{page}", "", " ",
+            "SECTION 3: EMERGENCY PROCEDURES", "EMERGENCY PROCEDURES", "", "CIRRUS", "VISION SF50", ""]
+
+def _procedure_steps(rng: random.Random, depth: int) -> List[str]:
+    lines = []
+    for n in range(1, rng.randint(2, 7) + 1):
+        if rng.random() < 0.15:
+            # Long step wrapped over two lines
+            lines.append(f"{n}. {_sentence(rng)[:-1]} and {rng.choice(VERBS).lower()} ")
+            lines.append(f"{rng.choice(OBJECTS)}.")
+        else:
+            lines.append(f"{n}. {_instruction(rng)} {_dots(rng)}{rng.choice(ACTIONS)}")
+        if depth > 1 and rng.random() < 0.25:
+            lines.extend(["", f"◆ If {rng.choice(OBJECTS)}:", ""])
+            for letter in "abc"[:rng.randint(1, 3)]:
+                lines.append(f"{letter}. {_instruction(rng)} {_dots(rng)}{rng.choice(ACTIONS)}")
+                lines.append("")
+    return lines
+
+def generate_sf50_procedures(procedures: int = 200, seed: int = 0, depth: int = 2, cas_ratio: float = 0.6,
+                             afcs_alerts: int = 10) -> str:
+    """Generate a procedures file with `procedures` procedures, CAS ones carrying a description."""
+    rng = random.Random(seed)
+    lines: List[str] = ["SECTION 3: EMERGENCY PROCEDURES", "EMERGENCY PROCEDURES", ""]
+    page = 1
+    if afcs_alerts:
+        lines.extend(["AFCS Alerts", ""])
+        for n in range(1, afcs_alerts + 1):
+            lines.append(_situation(n))
+            lines.append(f"AP {n} annunciator on PFD.")
+        lines.extend(["", "Emergency CAS Procedures"])
+    for index in range(1, procedures + 1):
+        lines.append("")
+        if rng.random() < cas_ratio:
+            message = _cas_message(index)
+            lines.extend([f"{message} {rng.choice(CAS_TYPES)}", "", message, "",
+                          f"{_instruction(rng)} {rng.choice(FAULTS).lower()} {index}.", ""])
+        else:
+            lines.extend([_situation(index), ""])
+        if rng.random() < 0.2:
+            lines.extend(["• NOTE •", f"{_sentence(rng)} {_sentence(rng)}", ""])
+        lines.extend(_procedure_steps(rng, depth))
+        lines.extend(["", "Procedure Complete"])
+        if index % 4 == 0:
+            page += 1
+            lines.extend(_page_furniture(rng, page))
+    return "\n".join(lines) + "\n"
+
+def generate_alerts(alerts: int = 1000, seed: int = 0, invalid_ratio: float = 0.0) -> Dict:
+    """Generate the content of an alerts file, with about `invalid_ratio` of the alerts invalid."""
+    rng = random.Random(seed)
+    records = []
+    for uid in range(1, alerts + 1):
+        cas = rng.random() < 0.6
+        record = {
+            "uid": uid,
+            "category": rng.choice(["abnormal", "abnormal", "emergency", "normal"]),
+            "alertType": "cas" if cas else rng.choice(["situation", "memory"]),
+            "action": rng.choice(["simulate", "simulate", "review", "ignore"]),
+            "priority": rng.choice(["high", "medium", "low", "none"]),
+            "aircraftName": rng.choice(["S22TG6", "SF50"]),
+            "message": _cas_message(uid) if cas else _situation(uid),
+            "submessage": _sentence(rng) if rng.random() < 0.5 else "",
+        }
+        if rng.random() < invalid_ratio:
+            corruption = rng.randrange(4)
+            if corruption == 0:
+                record["uid"] = rng.randint(1, uid)
+            elif corruption == 1:
+                record["uid"] = float(uid)
+            elif corruption == 2:
+                record[rng.choice(["category", "alertType", "action", "priority"])] = rng.choice(["", "Abnormal", "warning"])
+            else:
+                del record["priority"]
+        records.append(record)
+    return {"version": "2025.01.01.0000", "alerts": records}
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic manuals for benchmarks and tests.')
+    parser.add_argument('kind', choices=['checklists', 'sf50-summary', 'sf50-procedures', 'alerts'], help='Kind of file to generate')
+    parser.add_argument('-n', '--size', type=int, default=100, help='Number of checklists, alerts or procedures (default: 100)')
+    parser.add_argument('--depth', type=int, default=3, help='Maximum nesting depth of items (default: 3)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('-o', '--output', help='Output file (default: standard output)')
+
+    args = parser.parse_args()
+
+    if args.kind == 'checklists':
+        text = generate_checklist_manual(args.size, args.depth, args.seed)
+    elif args.kind == 'sf50-summary':
+        text = generate_sf50_summary(args.size, args.seed)
+    elif args.kind == 'sf50-procedures':
+        text = generate_sf50_procedures(args.size, args.seed, args.depth)
+    else:
+        text = json.dumps(generate_alerts(args.size, args.seed), ensure_ascii=False, indent=4) + "\n"
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text, end='')
+
+if __name__ == "__main__":
+    main()
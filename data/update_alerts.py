@@ -34,14 +34,85 @@ Usage:
     python update_alerts.py --excel alerts.xlsx --sheet 0 --output alerts.json
     python update_alerts.py -e alerts.xlsx -s 0 -o alerts.json -v 1.0.0
     python update_alerts.py --validate -e alerts.xlsx -j alerts.json
+    python update_alerts.py --to-excel -o alerts.json -e alerts.xlsx
 """
 
 import argparse
-import pandas as pd
 import json
+import os
+import sys
 from datetime import datetime
 from collections import defaultdict
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+from profiling import NULL_PROFILER, add_profile_arguments, run_profiled
+
+# Sheet written by json_to_excel, and the width of its columns
+SHEET_TITLE = "Alerts"
+COLUMN_WIDTHS = {'aircraftName': 14.5, 'message': 41.5, 'submessage': 100}
+# Number of record differences printed by validate_files
+MAX_DIFFERENCES = 10
+# Bump when read_workbook gives different records for the same workbook, so cached records are read again
+WORKBOOK_VERSION = 3
+
+def workbook_digest(excel_file: str, cache_dir: Optional[str]) -> str:
+    """
+    Hash of the content of a workbook.
+
+    The hash is kept in the artifact cache with the size and modification time
+    of the file, and only computed again when they changed, which saving the
+    workbook always does.
+    """
+    # Imported here, like the validation, so running --help doesn't load them
+    from artifact_cache import ArtifactCache
+
+    path = os.path.abspath(excel_file)
+    stat = os.stat(path)
+    cache = ArtifactCache('workbook_stat', WORKBOOK_VERSION, cache_dir, sources=(__name__,))
+    key = cache.key(path)
+    known = cache.get(key)
+    if known and known.get('size') == stat.st_size and known.get('mtime_ns') == stat.st_mtime_ns:
+        return known['digest']
+    import hashlib
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    cache.put(key, {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'digest': digest})
+    return digest
+
+def read_workbook(excel_file: str, sheet_name: int, profiler=None, cache_dir: Optional[str] = None) -> List[Dict]:
+    """
+    The rows of a sheet as records, with empty cells as empty strings.
+
+    Reading the xlsx is by far the slowest step of publishing the alerts, so the
+    records of a sheet are kept as JSON in the artifact cache under the hash of
+    the workbook (workbook_digest) and shared by the conversion and the
+    validation: pandas only reads the workbook again after it was saved with
+    changes. JSON rather than pickle, as loading an entry of a cache directory
+    someone else can write must not run code; a sheet with cells JSON can't
+    represent, like dates, is read by pandas every time.
+    """
+    from artifact_cache import ArtifactCache
+
+    profiler = profiler or NULL_PROFILER
+    cache = ArtifactCache('workbook_rows', WORKBOOK_VERSION, cache_dir, sources=(__name__,))
+    records = None
+    with profiler.phase('read_excel'):
+        if cache.enabled:
+            key = cache.key(workbook_digest(excel_file, cache_dir), str(sheet_name))
+            cached = cache.get(key)
+            if isinstance(cached, list) and all(isinstance(record, dict) for record in cached):
+                records = cached
+        if records is None:
+            import pandas as pd
+            df = pd.read_excel(excel_file, sheet_name=sheet_name)
+    if records is None:
+        with profiler.phase('convert'):
+            records = df.fillna('').to_dict(orient='records')
+        # JSON turns other column names into strings: only cache the sheets it reads back the same
+        if cache.enabled and all(isinstance(column, str) for column in df.columns):
+            cache.put(key, records)
+    cache.report(profiler)
+    return records
 
 def analyze_alerts(data: List[Dict]) -> Dict:
     """
@@ -95,7 +166,27 @@ def print_analysis(excel_stats: Dict, json_stats: Dict):
         status = "✅" if excel_count == json_count else "❌"
         print(f"{plane} | {alert_type} | {excel_count:6d} | {json_count:6d} | {status}")
 
-def validate_files(excel_file: str, sheet_name: int, json_file: str) -> bool:
+def compare_records(excel_alerts: List[Dict], json_alerts: List[Dict]) -> List[str]:
+    """
+    Compare the alerts of the Excel and JSON files row by row.
+
+    Returns a description of every row that differs, in order, so a round trip
+    through json_to_excel must give back exactly the same records.
+    """
+    differences = []
+    for position, (excel_alert, json_alert) in enumerate(zip(excel_alerts, json_alerts)):
+        if excel_alert != json_alert:
+            uid = json_alert.get('uid', excel_alert.get('uid'))
+            fields = [key for key in dict.fromkeys([*excel_alert, *json_alert])
+                      if excel_alert.get(key) != json_alert.get(key)]
+            details = ', '.join(f"{key}: {excel_alert.get(key)!r} != {json_alert.get(key)!r}" for key in fields)
+            differences.append(f"row {position + 2} (uid {uid}): {details}")
+    if len(excel_alerts) != len(json_alerts):
+        differences.append(f"Excel has {len(excel_alerts)} alerts and JSON {len(json_alerts)}")
+    return differences
+
+def validate_files(excel_file: str, sheet_name: int, json_file: str, profiler=None,
+                   cache_dir: Optional[str] = None) -> bool:
     """
     Validate that Excel and JSON files contain the same data.
     
@@ -103,26 +194,34 @@ def validate_files(excel_file: str, sheet_name: int, json_file: str) -> bool:
         excel_file (str): Path to the Excel file
         sheet_name (int): Sheet number in Excel file
         json_file (str): Path to the JSON file
+        profiler (Profiler, optional): Records phase timings when profiling
+        cache_dir (str, optional): Artifact cache of the Excel records, None to always read the workbook
         
     Returns:
         bool: True if files are in sync, False otherwise
     """
+    profiler = profiler or NULL_PROFILER
+
     # Load Excel data
-    df = pd.read_excel(excel_file, sheet_name=sheet_name)
-    df = df.fillna('')
-    excel_alerts = df.to_dict(orient='records')
+    excel_alerts = read_workbook(excel_file, sheet_name, profiler, cache_dir)
     
     # Load JSON data
-    with open(json_file, 'r', encoding='utf-8') as f:
-        json_data = json.load(f)
+    with profiler.phase('read_json'):
+        with open(json_file, 'r', encoding='utf-8') as f:
+            json_data = json.load(f)
     json_alerts = json_data.get('alerts', [])
+    profiler.count('rows', len(excel_alerts))
     
     # Analyze both sources
-    excel_stats = analyze_alerts(excel_alerts)
-    json_stats = analyze_alerts(json_alerts)
+    with profiler.phase('analyze'):
+        excel_stats = analyze_alerts(excel_alerts)
+        json_stats = analyze_alerts(json_alerts)
     
     # Print analysis in table format
     print_analysis(excel_stats, json_stats)
+
+    with profiler.phase('compare'):
+        differences = compare_records(excel_alerts, json_alerts)
     
     # Check if files are in sync
     is_sync = True
@@ -136,6 +235,14 @@ def validate_files(excel_file: str, sheet_name: int, json_file: str) -> bool:
         if not is_sync:
             break
     
+    if differences:
+        is_sync = False
+        print(f"\n{len(differences)} alerts differ between Excel and JSON:")
+        for difference in differences[:MAX_DIFFERENCES]:
+            print(f"  - {difference}")
+        if len(differences) > MAX_DIFFERENCES:
+            print(f"  ... and {len(differences) - MAX_DIFFERENCES} more")
+
     if is_sync:
         print("\n✅ Files are in sync!")
     else:
@@ -143,7 +250,7 @@ def validate_files(excel_file: str, sheet_name: int, json_file: str) -> bool:
     
     return is_sync
 
-def excel_to_json(excel_file, sheet_name, json_file, version=None):
+def excel_to_json(excel_file, sheet_name, json_file, version=None, profiler=None, cache_dir=None):
     """
     Convert Excel file containing alert definitions to JSON format.
 
@@ -154,21 +261,23 @@ def excel_to_json(excel_file, sheet_name, json_file, version=None):
         version (str, optional): Version number for the alerts. If not provided,
                                a timestamp-based version will be generated
                                (format: YYYY.MM.DD.HHMM)
+        profiler (Profiler, optional): Records phase timings when profiling
+        cache_dir (str, optional): Artifact cache of the Excel records, None to always read the workbook
 
     Returns:
         None
 
     Raises:
         FileNotFoundError: If the input Excel file doesn't exist
-        ValueError: If the specified sheet doesn't exist
+        ValueError: If the specified sheet doesn't exist, or if alerts have values
+                    the app can't decode (the JSON file is then not written)
         PermissionError: If there are issues writing to the output file
     """
-    # Load the Excel file
-    df = pd.read_excel(excel_file, sheet_name=sheet_name)
-    df = df.fillna('')  # Replace NaN values with empty strings
-    
-    # Convert the DataFrame to a list of dictionaries for alerts
-    alerts = df.to_dict(orient='records')
+    profiler = profiler or NULL_PROFILER
+
+    # Load the Excel file, with NaN values replaced by empty strings
+    alerts = read_workbook(excel_file, sheet_name, profiler, cache_dir)
+    profiler.count('rows', len(alerts))
     
     # If no version provided, use timestamp-based version
     if version is None:
@@ -179,13 +288,76 @@ def excel_to_json(excel_file, sheet_name, json_file, version=None):
         "version": version,
         "alerts": alerts
     }
+
+    # A single invalid value makes the app fail to load the whole file
+    from validate_alerts import print_violations, validate_alerts
+    with profiler.phase('validate'):
+        violations = validate_alerts(alerts_data)
+    if violations:
+        print(f"❌ {len(violations)} invalid values in {excel_file}:")
+        print_violations(violations)
+        raise ValueError(f"{len(violations)} invalid values, {json_file} was not written")
     
     # Write the JSON data to a file
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(alerts_data, f, ensure_ascii=False, indent=4)
+    with profiler.phase('serialize'):
+        with open(json_file, 'w', encoding='utf-8') as f:
+            json.dump(alerts_data, f, ensure_ascii=False, indent=4)
     
     print(f"Data successfully converted to {json_file} with version {version}")
 
+def json_to_excel(json_file: str, excel_file: str, profiler=None) -> None:
+    """
+    Write the alerts of a JSON file to an Excel file, the reverse of excel_to_json.
+
+    The alerts are written in the order of the JSON file with one column per
+    field, in the order the fields first appear. The JSON file is read twice
+    with the incremental reader of validate_checklist.py, a first time for the
+    columns and a second time to append the rows to a write-only workbook that
+    streams them to disk, so the memory used doesn't grow with the number of
+    alerts. Empty strings are written as blank cells, which excel_to_json reads
+    back as empty strings. The file is written next to the destination and
+    moved in place, so an existing workbook is only replaced by a complete one.
+
+    Args:
+        json_file (str): Path to the alerts JSON file
+        excel_file (str): Path of the Excel file to write
+        profiler (Profiler, optional): Records phase timings when profiling
+    """
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+    from validate_checklist import iter_json_array
+
+    profiler = profiler or NULL_PROFILER
+
+    with profiler.phase('read_columns'):
+        columns: Dict[str, None] = {}
+        for alert in iter_json_array(json_file, key='alerts'):
+            columns.update(dict.fromkeys(alert))
+    columns = list(columns)
+
+    rows = 0
+    with profiler.phase('write_excel'):
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(SHEET_TITLE)
+        for index, column in enumerate(columns):
+            if column in COLUMN_WIDTHS:
+                sheet.column_dimensions[get_column_letter(index + 1)].width = COLUMN_WIDTHS[column]
+        sheet.append(columns)
+        for alert in iter_json_array(json_file, key='alerts'):
+            sheet.append([None if value == '' else value for value in (alert.get(column, '') for column in columns)])
+            rows += 1
+
+        temporary = f"{excel_file}.tmp"
+        try:
+            workbook.save(temporary)
+            os.replace(temporary, excel_file)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+    profiler.count('rows', rows)
+
+    print(f"Alerts of {json_file} successfully written to {excel_file} ({rows} rows)")
+
 def main():
     """
     Main entry point for the script. Parses command line arguments and
@@ -210,6 +382,9 @@ Examples:
 
     # Validate Excel and JSON files
     python update_alerts.py --validate -e alerts.xlsx -j alerts.json
+
+    # Write the Excel file from the JSON file
+    python update_alerts.py --to-excel -o alerts.json -e alerts.xlsx
         """
     )
     parser.add_argument('--excel', '-e', default='AlertsToSimulate.xlsx',
@@ -222,13 +397,30 @@ Examples:
                       help='Version number (default: timestamp-based version YYYY.MM.DD.HHMM)')
     parser.add_argument('--validate', action='store_true',
                       help='Validate Excel and JSON files instead of converting')
+    parser.add_argument('--to-excel', action='store_true',
+                      help='Write the Excel file from the JSON file instead of converting')
+    parser.add_argument('--no-cache', action='store_true',
+                      help='Read the Excel file without using the artifact cache')
+    add_profile_arguments(parser)
     
     args = parser.parse_args()
+    from artifact_cache import CACHE_DIR
+    cache_dir = None if args.no_cache else CACHE_DIR
     
-    if args.validate:
-        validate_files(args.excel, args.sheet, args.output)
+    if args.to_excel:
+        run_profiled('json_to_excel', args,
+                     lambda profiler: json_to_excel(args.output, args.excel, profiler))
+    elif args.validate:
+        run_profiled('validate_alerts', args,
+                     lambda profiler: validate_files(args.excel, args.sheet, args.output, profiler, cache_dir))
     else:
-        excel_to_json(args.excel, args.sheet, args.output, args.version)
+        try:
+            run_profiled('update_alerts', args,
+                         lambda profiler: excel_to_json(args.excel, args.sheet, args.output, args.version, profiler,
+                                                       cache_dir))
+        except ValueError as e:
+            print(f"Error: {str(e)}")
+            sys.exit(1)
 
 if __name__ == "__main__":
     main()
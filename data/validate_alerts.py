@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Validate AlertsToSimulate.json against the FlightAlert model of the app.
+
+The app decodes every alert into FlightAlert, whose category, alertType, action
+and priority are Swift enums: a single value outside of them, or a uid that is
+not an integer, fails the decoding of the whole file at launch. Alerts are also
+tracked by uid, so uids must be unique.
+
+The schema is compiled once into a check function specialised for its fields
+(generated Python source with the field names, accepted values and checks
+inlined), so validating a file is a single loop over the alerts without any
+interpretation of the schema per record. Every violation is reported with the
+uid of the alert, or its position when the uid itself is invalid.
+
+Usage:
+    python validate_alerts.py                        # validate AlertsToSimulate.json
+    python validate_alerts.py alerts.json --source   # also print the compiled check
+    python validate_alerts.py --benchmark 100000     # time a synthetic file of 100k alerts
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from profiling import NULL_PROFILER, add_profile_arguments, run_profiled
+
+# Must match the enums of FlightAlert in FlightAlert.swift
+CATEGORIES = ["abnormal", "emergency", "normal"]
+ALERT_TYPES = ["cas", "situation", "memory"]
+ACTIONS = ["simulate", "ignore", "review"]
+PRIORITIES = ["high", "medium", "low", "none"]
+
+@dataclass
+class FieldRule:
+    """How one field of an alert is decoded by the app."""
+    name: str
+    kind: str  # 'int', 'string' or 'enum'
+    required: bool = True
+    values: Optional[List[str]] = None
+    unique: bool = False
+
+ALERT_SCHEMA = [
+    FieldRule('uid', 'int', unique=True),
+    FieldRule('category', 'enum', values=CATEGORIES),
+    FieldRule('alertType', 'enum', values=ALERT_TYPES),
+    FieldRule('action', 'enum', values=ACTIONS),
+    FieldRule('priority', 'enum', values=PRIORITIES),
+    FieldRule('aircraftName', 'string', required=False),
+    FieldRule('message', 'string', required=False),
+    FieldRule('submessage', 'string', required=False),
+]
+
+@dataclass
+class Violation:
+    index: int
+    uid: Optional[int]
+    field: Optional[str]
+    message: str
+
+    def __str__(self) -> str:
+        where = f"uid {self.uid}" if self.uid is not None else f"alert #{self.index}"
+        return f"{where}: {self.field}: {self.message}" if self.field else f"{where}: {self.message}"
+
+class _Missing:
+    def __repr__(self) -> str:
+        return 'missing'
+
+MISSING = _Missing()
+
+def _describe(value: Any, expected: str) -> str:
+    """Message for a value that failed a check, only built for violations."""
+    if value is MISSING:
+        return f"missing, expected {expected}"
+    return f"{value!r} is not {expected}"
+
+def generate_check_source(schema: List[FieldRule]) -> str:
+    """Python source of a function checking a list of alerts against `schema`."""
+    uid_field = next((rule.name for rule in schema if rule.kind == 'int' and rule.unique), None)
+    # Constants are bound as default arguments so the loop reads them as fast locals
+    constants = ["MISSING=MISSING", "describe=describe"]
+    constants += [f"VALUES{position}=VALUES{position}" for position, rule in enumerate(schema) if rule.values is not None]
+    lines = [
+        f"def check_alerts(alerts, {', '.join(constants)}):",
+        "    violations = []",
+        "    report = violations.append",
+        "    seen = {}",
+        "    for index, alert in enumerate(alerts):",
+        "        if alert.__class__ is not dict:",
+        "            report((index, None, None, 'is not an object'))",
+        "            continue",
+    ]
+    if uid_field:
+        # Read first, so that every violation of the alert can be reported with it
+        lines += [
+            f"        uid_value = alert.get({uid_field!r}, MISSING)",
+            "        uid = uid_value if uid_value.__class__ is int else None",
+        ]
+    else:
+        lines.append("        uid = None")
+
+    for position, rule in enumerate(schema):
+        name = repr(rule.name)
+        if rule.name == uid_field:
+            value = "uid_value"
+        else:
+            value = f"value{position}"
+            lines.append(f"        {value} = alert.get({name}, MISSING)")
+        if rule.kind == 'enum':
+            expected = "one of " + ", ".join(rule.values)
+            # The class check first: unhashable values can't be looked up in the set
+            condition = f"{value}.__class__ is not str or {value} not in VALUES{position}"
+        elif rule.kind == 'int':
+            expected = "an integer"
+            condition = f"{value}.__class__ is not int"
+        elif rule.kind == 'string':
+            expected = "a string"
+            condition = f"{value}.__class__ is not str"
+        else:
+            raise ValueError(f"Unknown kind '{rule.kind}' for field {rule.name}")
+        if not rule.required:
+            condition = f"{value} is not MISSING and {value} is not None and {condition}"
+        lines += [
+            f"        if {condition}:",
+            f"            report((index, uid, {name}, describe({value}, {expected!r})))",
+        ]
+        if rule.unique:
+            lines += [
+                f"        elif {value} in seen:",
+                f"            report((index, uid, {name}, 'duplicate, also used by alert #%d' % seen[{value}]))",
+                "        else:",
+                f"            seen[{value}] = index",
+            ]
+    lines.append("    return violations")
+    return "\n".join(lines) + "\n"
+
+def compile_schema(schema: List[FieldRule]) -> Callable[[Sequence[Any]], List[Violation]]:
+    """Compile a schema into a function returning the violations of a list of alerts."""
+    source = generate_check_source(schema)
+    namespace: Dict[str, Any] = {'MISSING': MISSING, 'describe': _describe}
+    for position, rule in enumerate(schema):
+        if rule.values is not None:
+            namespace[f'VALUES{position}'] = frozenset(rule.values)
+    exec(compile(source, '<alert schema>', 'exec'), namespace)
+    check = namespace['check_alerts']
+
+    def check_alerts(alerts: Sequence[Any]) -> List[Violation]:
+        return [Violation(*violation) for violation in check(alerts)]
+
+    check_alerts.source = source
+    return check_alerts
+
+check_alerts = compile_schema(ALERT_SCHEMA)
+
+def validate_alerts(data: Any) -> List[Violation]:
+    """Check the content of an alerts file: its version, then every alert."""
+    if not isinstance(data, dict):
+        return [Violation(-1, None, None, "the file is not an object with version and alerts")]
+    violations = []
+    if not isinstance(data.get('version'), str):
+        violations.append(Violation(-1, None, 'version', _describe(data.get('version', MISSING), "a string")))
+    alerts = data.get('alerts')
+    if not isinstance(alerts, list):
+        violations.append(Violation(-1, None, 'alerts', _describe(data.get('alerts', MISSING), "a list")))
+        return violations
+    return violations + check_alerts(alerts)
+
+def print_violations(violations: List[Violation], limit: Optional[int] = None) -> None:
+    shown = violations if limit is None else violations[:limit]
+    for violation in shown:
+        print(f"  - {violation}")
+    if len(shown) < len(violations):
+        print(f"  ... and {len(violations) - len(shown)} more")
+
+def validate_alerts_file(json_file: str, profiler=None) -> List[Violation]:
+    profiler = profiler or NULL_PROFILER
+    with profiler.phase('read_json'):
+        with open(json_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    with profiler.phase('check'):
+        violations = validate_alerts(data)
+    if isinstance(data, dict) and isinstance(data.get('alerts'), list):
+        profiler.count('alerts', len(data['alerts']))
+    profiler.count('violations', len(violations))
+    return violations
+
+def run_benchmark(count: int, repeat: int = 5) -> None:
+    """Time the compiled check on a synthetic file of `count` alerts."""
+    from synthetic_manuals import generate_alerts
+
+    data = generate_alerts(count)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        violations = validate_alerts(data)
+        best = min(best, time.perf_counter() - start)
+    print(f"{count} alerts checked in {best * 1000:.1f} ms ({count / best:,.0f} alerts/s), "
+          f"{len(violations)} violations")
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description='Validate AlertsToSimulate.json against the app model.')
+    parser.add_argument('json_file', nargs='?', default=os.path.join(script_dir, 'AlertsToSimulate.json'),
+                        help='Alerts JSON file (default: AlertsToSimulate.json)')
+    parser.add_argument('--source', action='store_true', help='Print the source of the compiled check')
+    parser.add_argument('--benchmark', type=int, metavar='N', help='Time the check on N synthetic alerts instead')
+    add_profile_arguments(parser)
+
+    args = parser.parse_args()
+
+    if args.source:
+        print(check_alerts.source)
+    if args.benchmark:
+        run_benchmark(args.benchmark)
+        return
+
+    try:
+        violations = run_profiled('validate_alerts_schema', args,
+                                  lambda profiler: validate_alerts_file(args.json_file, profiler))
+    except (OSError, ValueError) as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+
+    if violations:
+        print(f"❌ {len(violations)} invalid values in {args.json_file}:")
+        print_violations(violations)
+        sys.exit(1)
+    print(f"✅ {args.json_file} is valid")
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,31 @@
 Validate the checklist JSON file against the source text file.
 This script runs a series of validation tests to ensure the JSON output
 matches the expected content from the source text file.
+
+The text file is read once as the tokens of checklist_lexer.py, the same the
+parser builds the JSON from, lexed once for all the tests, and its steps are
+indexed by checklist in one pass. The tokens and the index are kept in the
+artifact cache (artifact_cache.py) until the text file changes. With --stream
+the JSON file is read one checklist at a time and all the tests run in that
+single pass, so the memory used is bounded by the text index and the largest
+checklist instead of the whole JSON tree.
 """
 
 import json
 import re
 import os
 import argparse
-from typing import List, Dict, Set, Tuple, Optional
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Dict, Set, Tuple, Optional
+
+from profiling import add_profile_arguments, run_profiled
+
+# The lexer and the cache are imported by the functions reading the text file, so
+# the tools importing the validation results and running --help don't load them
+if TYPE_CHECKING:
+    from checklist_lexer import Token
+
+# Bump when checklist_steps_index changes, so cached indexes are built again
+INDEX_VERSION = 1
 
 class ValidationTest:
     def __init__(self, name: str, description: str):
@@ -72,97 +90,211 @@ class ValidationResult:
                     for error in test.error_messages:
                         print(f"    - {error}")
 
+def read_lines(txt_path: str) -> List[str]:
+    with open(txt_path, 'r', encoding='utf-8') as f:
+        return f.readlines()
+
+def read_tokens(txt_path: str, cache_dir: Optional[str] = None) -> List['Token']:
+    from checklist_lexer import tokenize_file
+    return tokenize_file(txt_path, cache_dir)
+
+def titles_from_tokens(tokens: Iterable['Token']) -> Set[str]:
+    """Extract all checklist titles (lines starting with ###) from the tokens of a text file."""
+    return {token.groups[0].strip() for token in tokens if token.kind == 'checklist'}
+
 def extract_checklist_titles(txt_path: str) -> Set[str]:
     """Extract all checklist titles (lines starting with ###) from the text file."""
-    titles = set()
-    checklist_pattern = re.compile(r'^###(.+)$')
-    
-    with open(txt_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            match = checklist_pattern.match(line.strip())
-            if match:
-                titles.add(match.group(1).strip())
-    
-    return titles
+    return titles_from_tokens(read_tokens(txt_path))
 
 def load_json_checklists(json_path: str) -> Dict:
     """Load the JSON file and return the checklist data."""
     with open(json_path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def validate_checklist_titles(txt_path: str, json_path: str) -> ValidationTest:
+def iter_json_array(json_path: str, chunk_size: int = 1 << 16, key: Optional[str] = None) -> Iterator[Dict]:
     """
-    Validate that all checklist titles in the text file exist in the JSON file
-    and vice versa.
+    Yield the elements of the JSON array in a file one at a time, reading it in chunks.
+    With a key, the file holds an object and the elements are the ones of its
+    array member `key`: the members before it are decoded and skipped, and an
+    object without it yields nothing.
     """
-    test = ValidationTest(
+    decoder = json.JSONDecoder()
+    with open(json_path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        pos = 0
+        eof = False
+
+        def fill(read_size: int) -> None:
+            nonlocal buffer, pos, eof
+            chunk = f.read(read_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+        def next_char() -> str:
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos].isspace():
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return buffer[pos] if pos < len(buffer) else ''
+                fill(chunk_size)
+
+        def expect(*chars: str) -> str:
+            nonlocal pos
+            char = next_char()
+            if char not in chars:
+                raise ValueError(f"Expected {' or '.join(repr(c) for c in chars)} at offset "
+                                 f"{f.tell() - len(buffer) + pos} of {json_path}")
+            pos += 1
+            return char
+
+        def next_value():
+            nonlocal pos
+            read_size = chunk_size
+            while True:
+                next_char()
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                    # A value ending with the buffer may continue in the next chunk
+                    complete = end < len(buffer) or eof
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    complete = False
+                if complete:
+                    pos = end
+                    return value
+                # Read more, twice as much each time, until the value fits
+                fill(read_size)
+                read_size *= 2
+
+        if key is not None:
+            if next_char() != '{':
+                raise ValueError(f"{json_path} is not a JSON object")
+            pos += 1
+            if next_char() == '}':
+                return
+            while True:
+                name = next_value()
+                expect(':')
+                if name == key:
+                    break
+                next_value()
+                if expect(',', '}') == '}':
+                    return
+        if next_char() != '[':
+            raise ValueError(f"{json_path} is not a JSON array" if key is None else f"{key} of {json_path} is not an array")
+        pos += 1
+        if next_char() == ']':
+            return
+        while True:
+            yield next_value()
+            if expect(',', ']') == ']':
+                return
+
+def check_titles(test: ValidationTest, txt_titles: Set[str], json_titles: Set[str]) -> None:
+    """Compare the titles of the text and of the JSON, and mark the test passed if they match."""
+    # Find matching titles
+    matching_titles = txt_titles & json_titles
+    test.add_verbose(f"Found {len(matching_titles)} matching checklist titles")
+    
+    # Add detailed title list in debug mode
+    if matching_titles:
+        test.add_debug("Matched titles:")
+        for title in sorted(matching_titles):
+            test.add_debug(f"  • {title}")
+    
+    # Check for missing titles in JSON
+    missing_in_json = txt_titles - json_titles
+    if missing_in_json:
+        test.add_error(f"Checklists found in text file but missing in JSON: {sorted(missing_in_json)}")
+    
+    # Check for extra titles in JSON
+    extra_in_json = json_titles - txt_titles
+    if extra_in_json:
+        test.add_error(f"Checklists found in JSON but missing in text file: {sorted(extra_in_json)}")
+    
+    if not test.error_messages:
+        test.success()
+
+def titles_test() -> ValidationTest:
+    return ValidationTest(
         name="Checklist Titles Validation",
         description="Verify all checklist titles from text file exist in JSON and vice versa"
     )
+
+def validate_checklist_titles(txt_path: str, json_path: str, tokens: Optional[List['Token']] = None) -> ValidationTest:
+    """
+    Validate that all checklist titles in the text file exist in the JSON file
+    and vice versa. tokens are the tokens of the text file if already read.
+    """
+    test = titles_test()
     
     try:
         # Get titles from text file
-        txt_titles = extract_checklist_titles(txt_path)
+        txt_titles = titles_from_tokens(tokens if tokens is not None else read_tokens(txt_path))
         
         # Get titles from JSON file
         json_data = load_json_checklists(json_path)
         json_titles = {checklist['title'] for checklist in json_data}
         
-        # Find matching titles
-        matching_titles = txt_titles & json_titles
-        test.add_verbose(f"Found {len(matching_titles)} matching checklist titles")
-        
-        # Add detailed title list in debug mode
-        if matching_titles:
-            test.add_debug("Matched titles:")
-            for title in sorted(matching_titles):
-                test.add_debug(f"  • {title}")
-        
-        # Check for missing titles in JSON
-        missing_in_json = txt_titles - json_titles
-        if missing_in_json:
-            test.add_error(f"Checklists found in text file but missing in JSON: {sorted(missing_in_json)}")
-        
-        # Check for extra titles in JSON
-        extra_in_json = json_titles - txt_titles
-        if extra_in_json:
-            test.add_error(f"Checklists found in JSON but missing in text file: {sorted(extra_in_json)}")
-        
-        if not test.error_messages:
-            test.success()
+        check_titles(test, txt_titles, json_titles)
             
     except Exception as e:
         test.add_error(f"Error during validation: {str(e)}")
     
     return test
 
+def cas_messages_from_tokens(tokens: Iterable['Token']) -> Set[str]:
+    """Extract all CAS messages from the tokens of a text file (ignoring the type)."""
+    return {token.groups[0].strip() for token in tokens if token.kind == 'cas_message'}
+
 def extract_cas_messages(txt_path: str) -> Set[str]:
     """Extract all CAS messages from the text file (ignoring the type)."""
-    messages = set()
-    cas_pattern = re.compile(r"^([A-Z][A-Z0-9 ]+)(?: (Warning|Advisory|Caution))?$")
+    return cas_messages_from_tokens(read_tokens(txt_path))
+
+def check_cas_messages(test: ValidationTest, txt_messages: Set[str], json_messages: Set[str]) -> None:
+    """Compare the CAS messages of the text and of the JSON, and mark the test passed if they match."""
+    # Find matching messages
+    matching_messages = txt_messages & json_messages
+    test.add_verbose(f"Found {len(matching_messages)} matching CAS messages")
     
-    with open(txt_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            match = cas_pattern.match(line.strip())
-            if match:
-                message = match.group(1).strip()
-                messages.add(message)
+    # Add detailed message list in debug mode
+    if matching_messages:
+        test.add_debug("Matched CAS messages:")
+        for msg in sorted(matching_messages):
+            test.add_debug(f"  • {msg}")
+    
+    # Check for missing messages in JSON
+    missing_in_json = txt_messages - json_messages
+    if missing_in_json:
+        test.add_error(f"CAS messages found in text file but missing in JSON: {sorted(missing_in_json)}")
     
-    return messages
+    # Check for extra messages in JSON
+    extra_in_json = json_messages - txt_messages
+    if extra_in_json:
+        test.add_error(f"CAS messages found in JSON but missing in text file: {sorted(extra_in_json)}")
+    
+    if not test.error_messages:
+        test.success()
 
-def validate_cas_messages(txt_path: str, json_path: str) -> ValidationTest:
+def cas_messages_test() -> ValidationTest:
+    return ValidationTest(
+        name="CAS Messages Validation",
+        description="Verify all CAS messages from text file exist in JSON and vice versa"
+    )
+
+def validate_cas_messages(txt_path: str, json_path: str, tokens: Optional[List['Token']] = None) -> ValidationTest:
     """
     Validate that all CAS messages in the text file exist in the JSON file
     and vice versa, ignoring the alert type.
     """
-    test = ValidationTest(
-        name="CAS Messages Validation",
-        description="Verify all CAS messages from text file exist in JSON and vice versa"
-    )
+    test = cas_messages_test()
     
     try:
         # Get CAS messages from text file
-        txt_messages = extract_cas_messages(txt_path)
+        txt_messages = cas_messages_from_tokens(tokens if tokens is not None else read_tokens(txt_path))
         
         # Get CAS messages from JSON file
         json_data = load_json_checklists(json_path)
@@ -172,59 +304,32 @@ def validate_cas_messages(txt_path: str, json_path: str) -> ValidationTest:
             if checklist['alert'] is not None
         }
         
-        # Find matching messages
-        matching_messages = txt_messages & json_messages
-        test.add_verbose(f"Found {len(matching_messages)} matching CAS messages")
-        
-        # Add detailed message list in debug mode
-        if matching_messages:
-            test.add_debug("Matched CAS messages:")
-            for msg in sorted(matching_messages):
-                test.add_debug(f"  • {msg}")
-        
-        # Check for missing messages in JSON
-        missing_in_json = txt_messages - json_messages
-        if missing_in_json:
-            test.add_error(f"CAS messages found in text file but missing in JSON: {sorted(missing_in_json)}")
-        
-        # Check for extra messages in JSON
-        extra_in_json = json_messages - txt_messages
-        if extra_in_json:
-            test.add_error(f"CAS messages found in JSON but missing in text file: {sorted(extra_in_json)}")
-        
-        if not test.error_messages:
-            test.success()
+        check_cas_messages(test, txt_messages, json_messages)
             
     except Exception as e:
         test.add_error(f"Error during validation: {str(e)}")
     
     return test
 
-def extract_checklist_steps(txt_path: str, checklist_title: str, checklist_section: str) -> Tuple[List[str], Optional[str]]:
-    """Extract all steps and CAS message from a specific checklist in the text file, matching both title and section."""
+def checklist_steps_from_tokens(tokens: List['Token'], checklist_title: str, checklist_section: str,
+                                current_section: Optional[str] = None) -> Tuple[List[str], Optional[str]]:
+    """
+    Extract all steps and CAS message of a specific checklist from the tokens of a text file,
+    matching both title and section. current_section is the section in effect before the first token.
+    """
     steps = []
     cas_message = None
-    in_section = False
+    in_section = current_section is not None and current_section == checklist_section
     in_checklist = False
-    current_section = None
-    section_pattern = re.compile(r"^#([A-Z].+)$")
-    checklist_pattern = re.compile(r'^###(.+)$')
-    item_pattern = re.compile(r'^(\s*)(?:(\d+)\.|\((\d+)\)|([a-z])\.)\s+(.+?)(?:\.\.\.\s*(.+))?$')
-    unnumbered_item_pattern = re.compile(r"^(\s*)([^#].+?)(?:\.\.\.\s*(.+))?$")
-    cas_pattern = re.compile(r"^([A-Z][A-Z0-9 ]+)(?: (Warning|Advisory|Caution))?$")
-    
-    with open(txt_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
         
-    for i, line in enumerate(lines):
-        line = line.strip()
-        if not line:
+    for i, token in enumerate(tokens):
+        kind = token.kind
+        if kind == 'blank':
             continue
         
         # Check for section header
-        section_match = section_pattern.match(line)
-        if section_match:
-            current_section = section_match.group(1).strip()
+        if kind == 'section':
+            current_section = token.groups[0].strip()
             in_section = (current_section == checklist_section)
             in_checklist = False  # Reset checklist flag when section changes
             continue
@@ -234,21 +339,14 @@ def extract_checklist_steps(txt_path: str, checklist_title: str, checklist_secti
             continue
             
         # Check for checklist title
-        checklist_match = checklist_pattern.match(line)
-        if checklist_match:
-            title = checklist_match.group(1).strip()
+        if kind == 'checklist':
+            title = token.groups[0].strip()
             if title == checklist_title:
                 in_checklist = True
                 # Look for CAS message in the next few lines (up to 5 lines)
-                for j in range(1, 6):  # Look at next 5 lines
-                    if i + j >= len(lines):
-                        break
-                    next_line = lines[i + j].strip()
-                    if not next_line:  # Skip empty lines
-                        continue
-                    cas_match = cas_pattern.match(next_line)
-                    if cas_match:
-                        cas_message = cas_match.group(1).strip()
+                for next_token in tokens[i + 1:i + 6]:
+                    if next_token.kind == 'cas_message':
+                        cas_message = next_token.groups[0].strip()
                         break
                 continue
             elif in_checklist:
@@ -257,107 +355,181 @@ def extract_checklist_steps(txt_path: str, checklist_title: str, checklist_secti
             continue
         
         if in_checklist:
-            # Try to match numbered items first
-            item_match = item_pattern.match(line)
-            if item_match:
-                content = item_match.group(5).strip()
-                steps.append(content)
-                continue
-            
-            # Then try unnumbered items
-            unnumbered_match = unnumbered_item_pattern.match(line)
-            if unnumbered_match:
-                content = unnumbered_match.group(2).strip()
-                # Skip if this looks like a section, subsection, CAS message, or PFD Alert
+            if kind == 'item':
+                steps.append(token.groups[4].strip())
+            elif kind == 'unnumbered':
+                content = token.groups[1].strip()
+                # Skip if this looks like a CAS message or PFD Alert
                 if not (content.isupper() or content.startswith('PFD Alerts Window:')):
                     steps.append(content)
     
     return steps, cas_message
 
+def checklist_steps_index(tokens: List['Token'], current_section: Optional[str] = None
+                          ) -> Dict[Tuple[Optional[str], str], Tuple[List[str], Optional[str]]]:
+    """
+    The steps and CAS message of every checklist of the tokens, by (section, title), in one pass.
+
+    Gives the same result as checklist_steps_from_tokens for every checklist: the
+    steps of a title run until the next checklist with another title, which ends
+    it for good, or until the next section, after which the title can continue
+    if the section comes again.
+    """
+    index: Dict[Tuple[Optional[str], str], Tuple[List[str], Optional[str]]] = {}
+    ended: Set[Tuple[Optional[str], str]] = set()
+    active: Optional[Tuple[Optional[str], str]] = None
+    for i, token in enumerate(tokens):
+        kind = token.kind
+        if kind == 'section':
+            current_section = token.groups[0].strip()
+            active = None
+        elif kind == 'checklist' and current_section is not None:
+            key = (current_section, token.groups[0].strip())
+            if active is not None and active != key:
+                ended.add(active)
+            active = None if key in ended else key
+            if active is not None:
+                steps, cas_message = index.setdefault(key, ([], None))
+                # Look for CAS message in the next few lines (up to 5 lines)
+                for next_token in tokens[i + 1:i + 6]:
+                    if next_token.kind == 'cas_message':
+                        index[key] = (steps, next_token.groups[0].strip())
+                        break
+        elif active is not None:
+            if kind == 'item':
+                index[active][0].append(token.groups[4].strip())
+            elif kind == 'unnumbered':
+                content = token.groups[1].strip()
+                # Skip if this looks like a CAS message or PFD Alert
+                if not (content.isupper() or content.startswith('PFD Alerts Window:')):
+                    index[active][0].append(content)
+    return index
+
+def read_text(txt_path: str) -> bytes:
+    with open(txt_path, 'rb') as f:
+        return f.read()
+
+def load_steps_index(txt_path: str, tokens: Optional[List['Token']] = None, cache_dir: Optional[str] = None,
+                     data: Optional[bytes] = None) -> Dict[Tuple[Optional[str], str], Tuple[List[str], Optional[str]]]:
+    """
+    checklist_steps_index of a text file, from the cache if it was indexed since it last changed.
+    data is the content of the file when the caller already read it, so it is not read again.
+    """
+    from artifact_cache import ArtifactCache
+    from checklist_lexer import LEXER_VERSION, tokenize_data
+
+    if data is None:
+        data = read_text(txt_path)
+    cache = ArtifactCache('steps_index', INDEX_VERSION, cache_dir, sources=(__name__, 'checklist_lexer'))
+    key = cache.key(data, str(LEXER_VERSION))
+    cached = cache.get(key)
+    if cached is not None:
+        return {(section, title): (steps, cas_message) for section, title, steps, cas_message in cached}
+    index = checklist_steps_index(tokens if tokens is not None else tokenize_data(data, cache_dir))
+    cache.put(key, [[section, title, steps, cas_message] for (section, title), (steps, cas_message) in index.items()])
+    return index
+
+def extract_checklist_steps(txt_path: str, checklist_title: str, checklist_section: str) -> Tuple[List[str], Optional[str]]:
+    """Extract all steps and CAS message from a specific checklist in the text file, matching both title and section."""
+    return checklist_steps_from_tokens(read_tokens(txt_path), checklist_title, checklist_section)
+
 def normalize_instruction(instruction: str) -> str:
     """Normalize instruction text for comparison by removing dots and extra whitespace."""
     return re.sub(r'\s+', ' ', instruction.replace('.', '').strip())
 
-def validate_checklist_steps(txt_path: str, json_path: str) -> ValidationTest:
+def check_checklist_steps(test: ValidationTest, checklist: Dict, txt_steps: List[str], txt_cas: Optional[str]) -> bool:
     """
-    Validate that all steps in each JSON checklist appear in the same order
-    in the text file, matching checklists by both title and section.
-    Also validates that CAS messages match between text and JSON.
+    Check that the steps of a JSON checklist appear in order in the steps of its text,
+    and that the CAS messages match. Returns True if the steps match.
     """
-    test = ValidationTest(
+    title = checklist['title']
+    section = checklist['section']
+    if not txt_steps:
+        test.add_error(f"Could not find steps for checklist '{title}' (section: {section}) in text file")
+        return False
+    
+    # Validate CAS message if present in JSON
+    json_alert = checklist.get('alert')
+    if json_alert:
+        if not txt_cas:
+            test.add_error(f"Checklist '{title}' (section: {section}) has alert in JSON but no CAS message in text file")
+        elif json_alert != txt_cas:
+            test.add_error(f"Checklist '{title}' (section: {section}) has mismatched CAS messages:")
+            test.add_error(f"  • JSON: {json_alert}")
+            test.add_error(f"  • Text: {txt_cas}")
+        
+    # Get all instructions from JSON steps (including sub-steps)
+    json_instructions = []
+    def collect_instructions(steps):
+        for step in steps:
+            if step['instruction']:
+                json_instructions.append(normalize_instruction(step['instruction']))
+            if step['sub_steps']:
+                collect_instructions(step['sub_steps'])
+    
+    collect_instructions(checklist['steps'])
+    
+    # Normalize text file steps
+    txt_instructions = [normalize_instruction(step) for step in txt_steps]
+    
+    # Check if all JSON instructions appear in order in text file
+    txt_idx = 0
+    json_idx = 0
+    missing_steps = []
+    
+    while json_idx < len(json_instructions):
+        json_instruction = json_instructions[json_idx]
+        
+        # Try to find the next JSON instruction in remaining text steps
+        found = False
+        while txt_idx < len(txt_instructions):
+            if json_instruction == txt_instructions[txt_idx]:
+                found = True
+                txt_idx += 1
+                break
+            txt_idx += 1
+        
+        if not found:
+            missing_steps.append(json_instruction)
+        
+        json_idx += 1
+    
+    if missing_steps:
+        test.add_error(f"Checklist '{title}' (section: {section}) has steps in JSON that don't appear in order in text file:")
+        for step in missing_steps:
+            test.add_error(f"  • {step}")
+        return False
+
+    test.add_debug(f"✓ Checklist '{title}' (section: {section}) steps match")
+    if json_alert and txt_cas:
+        test.add_debug(f"  • CAS message: {txt_cas}")
+    return True
+
+def checklist_steps_test() -> ValidationTest:
+    return ValidationTest(
         name="Checklist Steps Validation",
         description="Verify all checklist steps from JSON appear in order in the text file and CAS messages match"
     )
+
+def validate_checklist_steps(txt_path: str, json_path: str, tokens: Optional[List['Token']] = None,
+                             cache_dir: Optional[str] = None, data: Optional[bytes] = None) -> ValidationTest:
+    """
+    Validate that all steps in each JSON checklist appear in the same order
+    in the text file, matching checklists by both title and section.
+    Also validates that CAS messages match between text and JSON.
+    """
+    test = checklist_steps_test()
     
     try:
         json_data = load_json_checklists(json_path)
+        index = load_steps_index(txt_path, tokens, cache_dir, data)
         total_checklists = len(json_data)
         matching_checklists = 0
         
         for checklist in json_data:
-            title = checklist['title']
-            section = checklist['section']
-            txt_steps, txt_cas = extract_checklist_steps(txt_path, title, section)
-            
-            if not txt_steps:
-                test.add_error(f"Could not find steps for checklist '{title}' (section: {section}) in text file")
-                continue
-            
-            # Validate CAS message if present in JSON
-            json_alert = checklist.get('alert')
-            if json_alert:
-                if not txt_cas:
-                    test.add_error(f"Checklist '{title}' (section: {section}) has alert in JSON but no CAS message in text file")
-                elif json_alert != txt_cas:
-                    test.add_error(f"Checklist '{title}' (section: {section}) has mismatched CAS messages:")
-                    test.add_error(f"  • JSON: {json_alert}")
-                    test.add_error(f"  • Text: {txt_cas}")
-                
-            # Get all instructions from JSON steps (including sub-steps)
-            json_instructions = []
-            def collect_instructions(steps):
-                for step in steps:
-                    if step['instruction']:
-                        json_instructions.append(normalize_instruction(step['instruction']))
-                    if step['sub_steps']:
-                        collect_instructions(step['sub_steps'])
-            
-            collect_instructions(checklist['steps'])
-            
-            # Normalize text file steps
-            txt_instructions = [normalize_instruction(step) for step in txt_steps]
-            
-            # Check if all JSON instructions appear in order in text file
-            txt_idx = 0
-            json_idx = 0
-            missing_steps = []
-            
-            while json_idx < len(json_instructions):
-                json_instruction = json_instructions[json_idx]
-                
-                # Try to find the next JSON instruction in remaining text steps
-                found = False
-                while txt_idx < len(txt_instructions):
-                    if json_instruction == txt_instructions[txt_idx]:
-                        found = True
-                        txt_idx += 1
-                        break
-                    txt_idx += 1
-                
-                if not found:
-                    missing_steps.append(json_instruction)
-                
-                json_idx += 1
-            
-            if missing_steps:
-                test.add_error(f"Checklist '{title}' (section: {section}) has steps in JSON that don't appear in order in text file:")
-                for step in missing_steps:
-                    test.add_error(f"  • {step}")
-            else:
+            txt_steps, txt_cas = index.get((checklist['section'], checklist['title']), ([], None))
+            if check_checklist_steps(test, checklist, txt_steps, txt_cas):
                 matching_checklists += 1
-                test.add_debug(f"✓ Checklist '{title}' (section: {section}) steps match")
-                if json_alert and txt_cas:
-                    test.add_debug(f"  • CAS message: {txt_cas}")
         
         test.add_verbose(f"Found {matching_checklists}/{total_checklists} checklists with matching steps")
         
@@ -369,12 +541,58 @@ def validate_checklist_steps(txt_path: str, json_path: str) -> ValidationTest:
     
     return test
 
+def validate_streaming(txt_path: str, json_path: str, tokens: Optional[List['Token']] = None,
+                       cache_dir: Optional[str] = None, data: Optional[bytes] = None) -> ValidationResult:
+    """
+    Run the three tests in a single pass over the JSON file, reading one checklist
+    at a time. Only the titles and CAS messages of the JSON are kept.
+    """
+    titles, cas_messages, steps = titles_test(), cas_messages_test(), checklist_steps_test()
+    try:
+        if data is None:
+            data = read_text(txt_path)
+        if tokens is None:
+            from checklist_lexer import tokenize_data
+            tokens = tokenize_data(data, cache_dir)
+        index = load_steps_index(txt_path, tokens, cache_dir, data)
+        json_titles: Set[str] = set()
+        json_messages: Set[str] = set()
+        total_checklists = 0
+        matching_checklists = 0
+        for checklist in iter_json_array(json_path):
+            total_checklists += 1
+            json_titles.add(checklist['title'])
+            if checklist['alert'] is not None:
+                json_messages.add(checklist['alert'])
+            txt_steps, txt_cas = index.get((checklist['section'], checklist['title']), ([], None))
+            if check_checklist_steps(steps, checklist, txt_steps, txt_cas):
+                matching_checklists += 1
+
+        check_titles(titles, titles_from_tokens(tokens), json_titles)
+        check_cas_messages(cas_messages, cas_messages_from_tokens(tokens), json_messages)
+        steps.add_verbose(f"Found {matching_checklists}/{total_checklists} checklists with matching steps")
+        if not steps.error_messages:
+            steps.success()
+    except Exception as e:
+        for test in (titles, cas_messages, steps):
+            if not test.passed:
+                test.add_error(f"Error during validation: {str(e)}")
+
+    results = ValidationResult()
+    for test in (titles, cas_messages, steps):
+        results.add_test(test)
+    return results
+
 def main():
     parser = argparse.ArgumentParser(description='Validate checklist JSON against source text file.')
     parser.add_argument('-v', '--verbose', action='store_true', help='Enable verbose output')
     parser.add_argument('-d', '--debug', action='store_true', help='Enable debug output (includes all details)')
     parser.add_argument('--txt', default='S22TG6-Checklists.txt', help='Input text file path')
     parser.add_argument('--json', default='S22TG6-Checklists.json', help='Input JSON file path')
+    parser.add_argument('--no-cache', action='store_true', help='Read the text file without using the artifact cache')
+    parser.add_argument('--stream', action='store_true',
+                        help='Read the JSON one checklist at a time, for files too large to load at once')
+    add_profile_arguments(parser)
     
     args = parser.parse_args()
     
@@ -389,9 +607,26 @@ def main():
     results = ValidationResult()
     
     # Run validation tests
-    results.add_test(validate_checklist_titles(txt_path, json_path))
-    results.add_test(validate_cas_messages(txt_path, json_path))
-    results.add_test(validate_checklist_steps(txt_path, json_path))
+    def run(profiler):
+        from checklist_lexer import CACHE_DIR, tokenize_data
+
+        cache_dir = None if args.no_cache else CACHE_DIR
+        with profiler.phase('read'):
+            data = read_text(txt_path)
+        tokens = tokenize_data(data, cache_dir, profiler)
+        profiler.count('lines', len(tokens))
+        if args.stream:
+            with profiler.phase('stream'):
+                for test in validate_streaming(txt_path, json_path, tokens, cache_dir, data).tests:
+                    results.add_test(test)
+            return
+        with profiler.phase('titles'):
+            results.add_test(validate_checklist_titles(txt_path, json_path, tokens))
+        with profiler.phase('cas_messages'):
+            results.add_test(validate_cas_messages(txt_path, json_path, tokens))
+        with profiler.phase('steps'):
+            results.add_test(validate_checklist_steps(txt_path, json_path, tokens, cache_dir, data))
+    run_profiled('validate_checklist', args, run)
     
     # Print results
     results.print_results(args.verbose, args.debug)
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Validate sf50_summary.csv against the SF50 procedure files.
+
+Every CAS and situation alert of the summary should have a procedure in
+sf50_emergency.txt or sf50_abnormal.txt, and the descriptions that
+process_sf50.py attached to the alerts should still be the ones of the
+procedures.
+
+Both sides are indexed in one pass each: the procedures are parsed once with
+SF50ChecklistParser and indexed by CAS message and by title, the CSV rows are
+read once and indexed by alert. Each alert is then matched by hash lookups:
+
+ - by CAS message, then by title, then by title without its parenthesis
+ - several procedures for the same message (Warning and Caution, In Flight and
+   On Ground) are told apart by the CAS type of the alert category and by the
+   qualifier at the start of the submessage
+ - alerts left with no procedure are unmatched, with several are ambiguous
+
+The results are reported with the ValidationTest/ValidationResult of
+validate_checklist.py.
+
+Usage:
+    python validate_sf50.py
+    python validate_sf50.py -v --csv sf50_summary.csv sf50_emergency.txt sf50_abnormal.txt
+"""
+
+import argparse
+import csv
+import os
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from profiling import NULL_PROFILER, add_profile_arguments, run_profiled
+
+# The parsers and the validation results are imported by the code using them, so
+# running --help doesn't load the parser and validator chain
+if TYPE_CHECKING:
+    from extract_checklists import Checklist
+    from process_sf50 import AlertRules
+    from validate_checklist import ValidationResult, ValidationTest
+
+CSV_FILE = "sf50_summary.csv"
+
+@dataclass
+class Procedure:
+    """A procedure of the SF50 files, with the parts of its CAS title."""
+    checklist: 'Checklist'
+    cas_type: Optional[str]
+    qualifier: Optional[str]
+
+    @property
+    def title(self) -> str:
+        return self.checklist.title
+
+@dataclass
+class AlertRow:
+    line_number: int
+    category: str
+    alert_type: str
+    message: str
+    submessage: str
+
+    def __str__(self) -> str:
+        return f"line {self.line_number}: {self.message} ({self.category} {self.alert_type})"
+
+def normalize_title(title: str) -> str:
+    return ' '.join(title.split()).casefold()
+
+def base_title(title: str) -> str:
+    """The title without a trailing parenthesis, as in 'Automatic Flight Control Malfunction (Stick Pusher...)'."""
+    return re.sub(r'\s*\(.*$', '', normalize_title(title))
+
+def normalize_description(text: str) -> str:
+    return ' '.join(text.split()).rstrip('.')
+
+class ProcedureIndex:
+    """Procedures of the SF50 files indexed by CAS message, title and base title."""
+
+    def __init__(self, checklists: List['Checklist'], rules: 'AlertRules'):
+        types = '|'.join(re.escape(cas_type) for cas_type in rules.cas_categories)
+        title_pattern = re.compile(rf'^(.+?) ({types})(?: - (.+))?$')
+        self.procedures: List[Procedure] = []
+        self.by_alert: Dict[str, List[Procedure]] = defaultdict(list)
+        self.by_title: Dict[str, List[Procedure]] = defaultdict(list)
+        self.by_base_title: Dict[str, List[Procedure]] = defaultdict(list)
+        self.qualifiers = set()
+        for checklist in checklists:
+            match = title_pattern.match(checklist.title) if checklist.alert else None
+            procedure = Procedure(checklist, match.group(2) if match else None, match.group(3) if match else None)
+            self.procedures.append(procedure)
+            if checklist.alert:
+                self.by_alert[checklist.alert].append(procedure)
+            self.by_title[normalize_title(checklist.title)].append(procedure)
+            self.by_base_title[base_title(checklist.title)].append(procedure)
+            if procedure.qualifier:
+                self.qualifiers.add(procedure.qualifier)
+
+    def candidates(self, message: str) -> List[Procedure]:
+        return (self.by_alert.get(message) or self.by_title.get(normalize_title(message))
+                or self.by_base_title.get(base_title(message)) or [])
+
+def load_procedures(procedure_files: List[str], rules: 'AlertRules', profiler=None) -> ProcedureIndex:
+    from sf50_checklists import SF50ChecklistParser
+
+    profiler = profiler or NULL_PROFILER
+    parser = SF50ChecklistParser(profiler=profiler)
+    with profiler.phase('parse_procedures'):
+        for path in procedure_files:
+            parser.parse_file(path)
+    with profiler.phase('index_procedures'):
+        return ProcedureIndex(parser.checklists + parser.procedures_without_steps, rules)
+
+def load_alert_rows(csv_file: str) -> Tuple[List[AlertRow], Dict[Tuple[str, str, str], List[AlertRow]]]:
+    """Read the CSV rows, and index them by (message, category, submessage) to find duplicates."""
+    rows = []
+    index: Dict[Tuple[str, str, str], List[AlertRow]] = defaultdict(list)
+    with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+        for line_number, record in enumerate(csv.DictReader(f), 2):
+            row = AlertRow(line_number, record['category'], record['alert_type'], record['message'],
+                           record.get('submessage') or '')
+            rows.append(row)
+            index[(row.message, row.category, row.submessage)].append(row)
+    return rows, index
+
+class SF50Validator:
+    """Matches the alerts of the summary CSV with the procedures and runs the validation tests."""
+
+    def __init__(self, rules: 'AlertRules', procedures: ProcedureIndex, rows: List[AlertRow],
+                 row_index: Dict[Tuple[str, str, str], List[AlertRow]]):
+        self.rules = rules
+        self.procedures = procedures
+        self.rows = rows
+        self.row_index = row_index
+        # The CAS type giving each category, to tell Warning/Caution/Advisory procedures apart
+        self.category_types = {category: cas_type for cas_type, category in rules.cas_categories.items()}
+        self.matches: Dict[int, Procedure] = {}
+        self.unmatched: List[AlertRow] = []
+        self.ambiguous: List[Tuple[AlertRow, List[Procedure]]] = []
+
+    def qualifier(self, row: AlertRow) -> Optional[str]:
+        """The qualifier (On Ground...) that process_sf50.py put at the start of the submessage."""
+        first = row.submessage.split(' - ', 1)[0]
+        return first if first in self.procedures.qualifiers else None
+
+    def match(self, row: AlertRow) -> List[Procedure]:
+        candidates = self.procedures.candidates(row.message)
+        if len(candidates) > 1:
+            cas_type = self.category_types.get(row.category)
+            candidates = [p for p in candidates if p.cas_type == cas_type] or candidates
+        if len(candidates) > 1:
+            qualifier = self.qualifier(row)
+            candidates = [p for p in candidates if p.qualifier == qualifier] or candidates
+        return candidates
+
+    def match_all(self) -> None:
+        for row in self.rows:
+            candidates = self.match(row)
+            if not candidates:
+                self.unmatched.append(row)
+            elif len(candidates) > 1:
+                self.ambiguous.append((row, candidates))
+            else:
+                self.matches[row.line_number] = candidates[0]
+
+    def validate_matches(self) -> 'ValidationTest':
+        from validate_checklist import ValidationTest
+
+        test = ValidationTest(
+            name="SF50 Alert Procedures",
+            description="Verify every CAS and situation alert of the summary has exactly one procedure"
+        )
+        test.add_verbose(f"Matched {len(self.matches)}/{len(self.rows)} alerts with a procedure")
+        for row in self.unmatched:
+            test.add_error(f"No procedure for {row}")
+        for row, candidates in self.ambiguous:
+            test.add_error(f"Ambiguous {row}, matches: {', '.join(p.title for p in candidates)}")
+        for row in self.rows:
+            if row.line_number in self.matches:
+                test.add_debug(f"{row} -> {self.matches[row.line_number].title}")
+
+        matched = {id(procedure) for procedure in self.matches.values()}
+        without_alert = [p.title for p in self.procedures.procedures if id(p) not in matched]
+        if without_alert:
+            test.add_verbose(f"{len(without_alert)} procedures have no alert in the summary: {', '.join(without_alert)}")
+
+        for (message, category, _), rows in self.row_index.items():
+            if len(rows) > 1:
+                test.add_verbose(f"{message} ({category}) appears {len(rows)} times, lines "
+                                 f"{', '.join(str(row.line_number) for row in rows)}")
+
+        if not test.error_messages:
+            test.success()
+        return test
+
+    def description(self, row: AlertRow, procedure: Procedure) -> str:
+        """The description part of the submessage, without the qualifier."""
+        submessage = row.submessage
+        qualifier = self.qualifier(row)
+        if qualifier:
+            submessage = submessage[len(qualifier):].lstrip(' -')
+        return submessage
+
+    def validate_descriptions(self) -> 'ValidationTest':
+        from validate_checklist import ValidationTest
+
+        test = ValidationTest(
+            name="SF50 Alert Descriptions",
+            description="Verify the descriptions in the summary are the current descriptions of their procedures"
+        )
+        checked = 0
+        for row in self.rows:
+            procedure = self.matches.get(row.line_number)
+            if procedure is None:
+                continue
+            description = self.description(row, procedure)
+            current = procedure.checklist.alert_message or ''
+            if not description:
+                if current:
+                    test.add_verbose(f"{row} has no description, the procedure has: {current}")
+                continue
+            checked += 1
+            if normalize_description(description) == normalize_description(current):
+                continue
+            other = next((p for p in self.procedures.candidates(row.message) if p is not procedure
+                          and normalize_description(p.checklist.alert_message or '') == normalize_description(description)), None)
+            if other:
+                test.add_error(f"{row} has the description of '{other.title}' instead of '{procedure.title}': "
+                               f"{description}")
+            elif current:
+                test.add_error(f"{row} description is out of date: '{description}', procedure has: '{current}'")
+            else:
+                # Situation alerts get theirs from the AFCS alerts list, not from a procedure
+                test.add_verbose(f"{row} description can't be checked, its procedure has none: '{description}'")
+        test.add_verbose(f"Checked {checked} descriptions")
+        if not test.error_messages:
+            test.success()
+        return test
+
+def validate_sf50(csv_file: str, procedure_files: List[str], rules: Optional['AlertRules'] = None,
+                  profiler=None) -> 'ValidationResult':
+    from process_sf50 import load_rules
+    from validate_checklist import ValidationResult
+
+    profiler = profiler or NULL_PROFILER
+    rules = rules or load_rules()
+    procedures = load_procedures(procedure_files, rules, profiler)
+    with profiler.phase('index_csv'):
+        rows, row_index = load_alert_rows(csv_file)
+    profiler.count('alerts', len(rows))
+    profiler.count('procedures', len(procedures.procedures))
+
+    validator = SF50Validator(rules, procedures, rows, row_index)
+    results = ValidationResult()
+    with profiler.phase('match'):
+        validator.match_all()
+        results.add_test(validator.validate_matches())
+        results.add_test(validator.validate_descriptions())
+    return results
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description='Validate the SF50 summary CSV against the procedure files.')
+    parser.add_argument('procedure_files', nargs='*', help='Procedure text files (default: the INPUT_FILES of sf50_checklists.py)')
+    parser.add_argument('--csv', default=os.path.join(script_dir, CSV_FILE), help=f'Summary CSV file (default: {CSV_FILE})')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Enable verbose output')
+    parser.add_argument('-d', '--debug', action='store_true', help='Enable debug output (includes all matches)')
+    add_profile_arguments(parser)
+
+    args = parser.parse_args()
+
+    from sf50_checklists import INPUT_FILES
+    procedure_files = args.procedure_files or [os.path.join(script_dir, name) for name in INPUT_FILES]
+    results = run_profiled('validate_sf50', args, lambda profiler: validate_sf50(args.csv, procedure_files, profiler=profiler))
+    results.print_results(args.verbose, args.debug)
+
+    passed, total = results.summary()
+    exit(0 if passed == total else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Watch the checklist manuals and re-extract and re-validate them as they are edited.
+
+Running extract_checklists.py then validate_checklist.py after every edit pays
+the interpreter startup, the imports, a full parse and a full validation. This
+keeps them in memory instead:
+
+ - the manual is split into checklist blocks (split_checklist_blocks), and the
+   parsed checklists, titles, CAS messages and step validation of each block are
+   kept by the hash of the block
+ - the files are polled for changes, and a change is processed once the file has
+   not changed for the debounce delay, so an editor saving in several writes
+   triggers a single update
+ - on change only the blocks whose content or context changed are parsed and
+   validated again, and the title and CAS message checks are done on the sets
+   kept per block
+
+The validation is the same as validate_checklist.py, with the parsed checklists
+in place of the JSON file, except that each checklist is compared with the text
+of its own block. With --write the JSON file is written after every change.
+
+Usage:
+    python watch_checklists.py                        # watch S22TG6-Checklists.txt
+    python watch_checklists.py manual.txt --write -o manual.json
+    python watch_checklists.py --once -v              # a single update, then exit
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from checklist_lexer import lex_lines
+from extract_checklists import INPUT_FILE, ChecklistBlock, ChecklistParser, split_checklist_blocks
+from validate_checklist import (ValidationResult, ValidationTest, cas_messages_from_tokens, cas_messages_test,
+                                check_cas_messages, check_checklist_steps, check_titles, checklist_steps_from_tokens,
+                                checklist_steps_test, read_lines, titles_from_tokens, titles_test)
+
+POLL_INTERVAL = 0.1
+DEBOUNCE = 0.2
+
+@dataclass
+class BlockResult:
+    """Everything kept for one checklist block."""
+    checklists: List[Dict]
+    titles: Set[str]
+    cas_messages: Set[str]
+    # Errors and debug messages of the step validation of the block
+    step_errors: List[str]
+    step_debug: List[str]
+    matching: int
+
+def block_digest(block: ChecklistBlock) -> str:
+    """Hash of what the parse of a block depends on. Line numbers are left out, so moved blocks are reused."""
+    digest = hashlib.sha1()
+    digest.update(f"{block.section}\0{block.subsection}\0".encode('utf-8'))
+    for line in block.lines:
+        digest.update(line.encode('utf-8'))
+    return digest.hexdigest()
+
+def process_block(block: ChecklistBlock) -> BlockResult:
+    """Parse a block and validate its checklists against its own text, lexing it once for both."""
+    tokens = lex_lines(block.lines, block.first_line)
+    checklists = [asdict(checklist) for checklist in ChecklistParser().parse_block(block, tokens)]
+    test = ValidationTest("", "")
+    matching = 0
+    for checklist in checklists:
+        txt_steps, txt_cas = checklist_steps_from_tokens(tokens, checklist['title'], checklist['section'],
+                                                         current_section=block.section)
+        if check_checklist_steps(test, checklist, txt_steps, txt_cas):
+            matching += 1
+    return BlockResult(
+        checklists=checklists,
+        titles=titles_from_tokens(tokens),
+        cas_messages=cas_messages_from_tokens(tokens),
+        step_errors=test.error_messages,
+        step_debug=test.debug_messages,
+        matching=matching,
+    )
+
+class WatchedManual:
+    """A manual whose checklist blocks are parsed and validated incrementally."""
+
+    def __init__(self, txt_path: str, json_path: Optional[str] = None):
+        self.txt_path = txt_path
+        self.json_path = json_path
+        self.blocks: Dict[str, BlockResult] = {}
+        self.checklists: List[Dict] = []
+        self.results: Optional[ValidationResult] = None
+
+    def signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.txt_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def update(self) -> Tuple[int, int]:
+        """Re-read the manual, process the blocks that changed. Returns (blocks processed, total blocks)."""
+        blocks = split_checklist_blocks(read_lines(self.txt_path))
+        current: Dict[str, BlockResult] = {}
+        order: List[BlockResult] = []
+        processed = 0
+        for block in blocks:
+            digest = block_digest(block)
+            result = current.get(digest) or self.blocks.get(digest)
+            if result is None:
+                result = process_block(block)
+                processed += 1
+            current[digest] = result
+            order.append(result)
+        # Only keep the blocks of the current version
+        self.blocks = current
+
+        self.checklists = [checklist for result in order for checklist in result.checklists]
+        self.results = self.validate(order)
+        if self.json_path:
+            with open(self.json_path, 'w', encoding='utf-8') as f:
+                json.dump(self.checklists, f, indent=4)
+        return processed, len(blocks)
+
+    def validate(self, order: List[BlockResult]) -> ValidationResult:
+        """The validate_checklist.py tests, from the results kept per block."""
+        results = ValidationResult()
+
+        test = titles_test()
+        check_titles(test, set().union(*(result.titles for result in order)),
+                     {checklist['title'] for checklist in self.checklists})
+        results.add_test(test)
+
+        test = cas_messages_test()
+        check_cas_messages(test, set().union(*(result.cas_messages for result in order)),
+                           {checklist['alert'] for checklist in self.checklists if checklist['alert'] is not None})
+        results.add_test(test)
+
+        test = checklist_steps_test()
+        for result in order:
+            test.error_messages.extend(result.step_errors)
+            test.debug_messages.extend(result.step_debug)
+        matching = sum(result.matching for result in order)
+        test.add_verbose(f"Found {matching}/{len(self.checklists)} checklists with matching steps")
+        if not test.error_messages:
+            test.success()
+        results.add_test(test)
+        return results
+
+def report(manual: WatchedManual, verbose: bool, debug: bool) -> None:
+    start = time.perf_counter()
+    try:
+        processed, total = manual.update()
+    except Exception as e:
+        # Keep watching, the file may be saved again in a valid state
+        print(f"[{datetime.now():%H:%M:%S}] {os.path.basename(manual.txt_path)}: Error: {str(e)}")
+        return
+    elapsed = (time.perf_counter() - start) * 1000
+    passed, tests = manual.results.summary()
+    status = "✓" if passed == tests else "✗"
+    print(f"[{datetime.now():%H:%M:%S}] {status} {os.path.basename(manual.txt_path)}: "
+          f"{len(manual.checklists)} checklists, {processed}/{total} blocks parsed, "
+          f"tests passed {passed}/{tests} in {elapsed:.1f} ms")
+    if passed < tests or verbose or debug:
+        manual.results.print_results(verbose, debug)
+    sys.stdout.flush()
+
+def watch(manuals: List[WatchedManual], verbose: bool = False, debug: bool = False,
+          interval: float = POLL_INTERVAL, debounce: float = DEBOUNCE) -> None:
+    """Poll the manuals and update each one once it has been stable for `debounce` seconds."""
+    seen = {manual.txt_path: manual.signature() for manual in manuals}
+    changed_at: Dict[str, float] = {}
+    while True:
+        time.sleep(interval)
+        now = time.monotonic()
+        for manual in manuals:
+            signature = manual.signature()
+            if signature != seen[manual.txt_path]:
+                seen[manual.txt_path] = signature
+                changed_at[manual.txt_path] = now
+            elif manual.txt_path in changed_at and now - changed_at[manual.txt_path] >= debounce:
+                del changed_at[manual.txt_path]
+                if signature is not None:
+                    report(manual, verbose, debug)
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description='Watch checklist manuals and re-extract and validate them on change.')
+    parser.add_argument('txt_files', nargs='*', help=f'Manual text files (default: {INPUT_FILE})')
+    parser.add_argument('--write', action='store_true', help='Write the JSON file after every change')
+    parser.add_argument('-o', '--output', help='JSON file written with --write, for a single manual (default: <manual>.json)')
+    parser.add_argument('--once', action='store_true', help='Update once and exit')
+    parser.add_argument('--debounce', type=float, default=DEBOUNCE,
+                        help=f'Seconds a file must be unchanged before it is processed (default: {DEBOUNCE})')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Print the details of the tests')
+    parser.add_argument('-d', '--debug', action='store_true', help='Print the debug details of the tests')
+
+    args = parser.parse_args()
+
+    txt_files = args.txt_files or [os.path.join(script_dir, INPUT_FILE)]
+    if args.output and len(txt_files) > 1:
+        parser.error("--output can only be used with a single manual")
+    manuals = []
+    for txt_file in txt_files:
+        if not os.path.exists(txt_file):
+            print(f"Error: Input file '{txt_file}' not found")
+            sys.exit(1)
+        json_path = None
+        if args.write:
+            json_path = args.output or os.path.splitext(txt_file)[0] + '.json'
+        manuals.append(WatchedManual(txt_file, json_path))
+
+    for manual in manuals:
+        report(manual, args.verbose, args.debug)
+    if args.once:
+        sys.exit(0 if all(manual.results and manual.results.summary()[0] == manual.results.summary()[1]
+                          for manual in manuals) else 1)
+
+    print(f"Watching {', '.join(os.path.basename(manual.txt_path) for manual in manuals)} (Ctrl-C to stop)")
+    try:
+        watch(manuals, args.verbose, args.debug, debounce=args.debounce)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()